@@ -30,8 +30,6 @@ except Exception:
 hidden_imports = [
     'transcribe_with_whisper',
     'transcribe_with_whisper.server_app',
-    'docx',
-    'htmldocx
 ]
 hidden_imports.extend(pyannote_subs)
 
@@ -42,6 +40,7 @@ a = Analysis(
     # Start with static datas then extend with any pyannote package files
     datas=[
         ('branding', 'branding'),
+        ('transcribe_with_whisper/assets', 'transcribe_with_whisper/assets'),
         ('packaging/ffmpeg/ffmpeg.exe', '.'),
         ('packaging/ffmpeg/ffprobe.exe', '.'),
     ] + pyannote_datas,
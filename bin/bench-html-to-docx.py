@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark HTML->DOCX conversion against transcript size.
+
+Builds transcripts of 1k to 100k segments in the markup generate_html()
+writes, converts each with `convert_html_string_to_docx()` and prints the
+time per segment. Conversion is linear when that column stays flat as the
+transcript grows. A second table does the same for malformed pages (unclosed
+spans and html-only blocks, stray end tags), the input that made the old
+regex-based converter backtrack.
+
+Usage: python bin/bench-html-to-docx.py [max_segments]
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from transcribe_with_whisper.html_to_docx import convert_html_string_to_docx  # noqa: E402
+
+HEAD = ('<!DOCTYPE html>\n<html lang="en">\n  <head>\n    <title>bench.mp4</title>\n'
+        '    <style>\n      .transcript-segment { position: relative; }\n    </style>\n  </head>\n'
+        '  <body>\n    <div class="html-only"><h1>bench</h1></div>\n    <div id="content">\n')
+TAIL = '    </div>\n    <script>\n      var a = "<div class=\\"transcript-segment\\">";\n    </script>\n  </body>\n</html>'
+
+
+def segment(i: int) -> str:
+    start = i * 2.5
+    stamp = f"{int(start // 3600):01d}:{int(start % 3600 // 60):02d}:{start % 60:04.1f}"
+    return (f'      <div class="transcript-segment" data-start="{start}" data-end="{start + 2.5}" '
+            f'data-speaker="Speaker {i % 3 + 1}" data-vtt-file="{i // 40}.vtt" data-caption-idx="{i % 40}">\n'
+            f'        <span class="speaker-name">Speaker {i % 3 + 1}: </span>\n'
+            f'        <span class="timestamp">[{stamp}] </span>\n'
+            f'        <span class="transcript-text"><a href="#{stamp}" class="lt" '
+            f'onclick="jumptoTime({int(start)})">Caption {i} says something &amp; moves on.</a></span>\n'
+            '      </div>\n')
+
+
+def malformed(i: int) -> str:
+    return (f'      <div class="transcript-segment"><span class="speaker-name">S{i}: '
+            f'<span class="html-only"><div class="html-only"> x</span></span></b>\n'
+            f'        <span class="transcript-text">text {i} <!-- note --></div>\n')
+
+
+def build(n: int, make) -> str:
+    return HEAD + "".join(make(i) for i in range(n)) + TAIL
+
+
+def run(label: str, make, sizes) -> None:
+    print(f"\n{label}")
+    print(f"{'segments':>10} {'MB':>8} {'seconds':>9} {'us/segment':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "bench.docx"
+        for n in sizes:
+            html = build(n, make)
+            began = time.perf_counter()
+            convert_html_string_to_docx(html, out)
+            elapsed = time.perf_counter() - began
+            print(f"{n:>10} {len(html) / 1e6:>8.1f} {elapsed:>9.2f} {elapsed / n * 1e6:>11.1f}")
+
+
+def main(argv: list[str]) -> int:
+    largest = int(argv[1]) if len(argv) > 1 else 100_000
+    sizes = [n for n in (1_000, 3_000, 10_000, 30_000, 100_000, 300_000) if n <= largest]
+    run("Well-formed transcript", segment, sizes)
+    run("Malformed markup", malformed, sizes)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
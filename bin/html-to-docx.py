@@ -8,7 +8,7 @@ and the server share the same code path and behavior.
 Exit codes:
   0  success
   1  input file missing
-  2  missing Python dependencies (install python-docx)
+  2  usage error, or the transcribe_with_whisper package can't be imported
   3  conversion error
 """
 
@@ -40,18 +40,14 @@ def main(argv: list[str]) -> int:
     out_path = Path(argv[2]) if len(argv) == 3 else in_path.with_suffix(".docx")
 
     try:
-        # Import the shared converter. This will raise ImportError if python-docx
-        # (or the shared module) is not available, which we treat as a deps error.
-        from transcribe_with_whisper.html_to_docx import ensure_deps, convert_html_file_to_docx
+        # Import the shared converter (standard library only; fails if the package
+        # itself isn't installed or on the path).
+        from transcribe_with_whisper.html_to_docx import convert_html_file_to_docx
     except Exception as e:  # broad except to catch ImportError and other import-time failures
-        print("Error: missing Python dependencies. Install with: pip install python-docx", file=sys.stderr)
+        print("Error: could not import transcribe_with_whisper. Install it with: pip install transcribe-with-whisper", file=sys.stderr)
         print(f"(import error: {e})", file=sys.stderr)
         return 2
 
-    if not ensure_deps():
-        print("Error: missing Python dependencies. Install with: pip install python-docx", file=sys.stderr)
-        return 2
-
     try:
         out_path.parent.mkdir(parents=True, exist_ok=True)
         convert_html_file_to_docx(in_path, out_path)
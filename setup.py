@@ -20,16 +20,20 @@ setup(
     ],
     extras_require={
         # Web dependencies are now included in core install_requires
-        # Keep this for backward compatibility if needed
+        # Only needed for JOB_QUEUE=redis://...
+        "redis": ["redis>=4.2"],
     },
     entry_points={
         "console_scripts": [
             "transcribe-with-whisper=transcribe_with_whisper.main:main",
             "mercuryscribe=transcribe_with_whisper.mercuryscribe:main",
+            "transcribe-with-whisper-worker=transcribe_with_whisper.worker:main",
+            "transcribe-with-whisper-autotune=transcribe_with_whisper.autotune:main",
         ],
     },
     python_requires=">=3.8",
     include_package_data=True,
+    package_data={"transcribe_with_whisper": ["assets/*"]},
     description="Video transcription with speaker diarization and HTML output",
     long_description=long_description,
     long_description_content_type="text/markdown",
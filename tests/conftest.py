@@ -11,6 +11,26 @@ ARTIFACTS_BASE = Path(__file__).resolve().parent.parent / "artifacts" / "test-au
 ART_BASENAME = "test-audio"
 
 
+def _write_transcript(base: Path, turns=3, captions=4, seconds=2.0, text="turn {n} caption {c} Q&A"):
+    """<base>/talk/<n>.vtt with `captions` captions of `seconds` each per 10-second turn.
+
+    Returns the speaker groups and VTT paths for main.generate_html; `text` is
+    formatted with the turn `n` and caption `c`.
+    """
+    workdir = base / "talk"
+    workdir.mkdir(parents=True, exist_ok=True)
+    groups, vtts = [], []
+    for n in range(turns):
+        groups.append([f"[ 00:00:{n * 10 + 2:02d}.000 -->  00:00:{n * 10 + 10:02d}.000] _ SPEAKER_0{n % 2}"])
+        lines = ["WEBVTT", ""]
+        for c in range(captions):
+            lines += [f"00:00:{c * seconds:06.3f} --> 00:00:{(c + 1) * seconds:06.3f}", text.format(n=n, c=c), ""]
+        vtt = workdir / f"{n}.vtt"
+        vtt.write_text("\n".join(lines), encoding="utf-8")
+        vtts.append(str(vtt))
+    return groups, vtts
+
+
 def _reload_app_with_transcription_dir(tmpdir: Path):
     os.environ["SKIP_HF_STARTUP_CHECK"] = "1"
     os.environ["TRANSCRIPTION_DIR"] = str(tmpdir)
@@ -59,3 +79,9 @@ def app_with_artifacts(tmp_path: Path):
         basename=ART_BASENAME,
         vtt_dir=dest_vtt_dir,
     )
+
+
+@pytest.fixture()
+def write_transcript():
+    """Factory writing a small diarized transcript's VTT files (see _write_transcript)."""
+    return _write_transcript
@@ -0,0 +1,52 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from transcribe_with_whisper.asr_batcher import AsrBatcher
+
+
+class FakeFeatureExtractor:
+    chunk_length = 30
+
+    def __call__(self, chunk):
+        return np.zeros((80, len(chunk) // 160 + 1), dtype=np.float32)
+
+
+class RecordingBatcher(AsrBatcher):
+
+    def __init__(self, **kwargs):
+        model = SimpleNamespace(feature_extractor=FakeFeatureExtractor())
+        super().__init__(model, vad_filter=False, **kwargs)
+        self.batches = []
+
+    def _forward(self, features, metadata, word_timestamps):
+        self.batches.append(len(metadata))
+        return [[{'text': f"window at {m['offset']:g}", 'start': m['offset'],
+                  'end': m['offset'] + m['duration']}] for m in metadata]
+
+
+def test_segments_from_concurrent_jobs_share_a_batch():
+    batcher = RecordingBatcher(batch_size=8, max_latency=0.5)
+    results = {}
+
+    def job(name, seconds):
+        results[name] = batcher.transcribe(np.zeros(16000 * seconds, dtype=np.float32))
+
+    threads = [threading.Thread(target=job, args=(name, seconds))
+               for name, seconds in (('short-a', 10), ('short-b', 5), ('long', 70))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+
+    # 1 + 1 + 3 windows decoded together instead of five separate calls
+    assert batcher.batches == [5]
+    assert [(s.start, s.end) for s in results['long']] == [(0.0, 30.0), (30.0, 60.0), (60.0, 70.0)]
+    assert [s.text for s in results['short-b']] == ['window at 0']
+
+
+def test_partial_batch_runs_after_max_latency():
+    batcher = RecordingBatcher(batch_size=64, max_latency=0.01)
+    assert len(batcher.transcribe(np.zeros(16000 * 3, dtype=np.float32))) == 1
+    assert batcher.batches == [1]
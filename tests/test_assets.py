@@ -0,0 +1,85 @@
+import importlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+main = importlib.import_module("transcribe_with_whisper.main")
+from transcribe_with_whisper.assets import asset_text, asset_url, inline_assets
+
+SPEAKERS = {"SPEAKER_00": ("Alice", "lightgray", "darkorange"),
+            "SPEAKER_01": ("Bob", "#e1ffc7", "darkgreen")}
+
+
+def server(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    return TestClient(mod.app)
+
+
+def test_shared_page_links_hashed_assets_and_standalone_inlines_them(tmp_path: Path, write_transcript):
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS, standalone=False)
+    shared = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    assert re.search(r'<link rel="stylesheet" href="/assets/transcript\.[0-9a-f]{10}\.css">', shared)
+    assert f'<script src="{asset_url("transcript.js")}"></script>' in shared
+    assert "<style>" not in shared and "function jumptoTime" not in shared
+
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+    standalone = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    assert "/assets/" not in standalone
+    assert asset_text("transcript.css") in standalone and "function jumptoTime" in standalone
+    # Linking saves the bytes of every inlined asset
+    assert len(shared) < len(standalone) - len(asset_text("transcript.js"))
+    assert inline_assets(shared) == standalone
+
+
+def test_standalone_virtual_page_embeds_its_timeline(tmp_path: Path, write_transcript, monkeypatch):
+    monkeypatch.setattr(main, "VIRTUAL_VIEWER_MIN_CAPTIONS", 10)
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+    html = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    data = json.loads(re.search(r'<script type="application/json" id="timeline-data">(.*?)</script>',
+                                html).group(1))
+    assert data["captions"]["text"][0] == "turn 0 caption 0 Q&A"
+    assert html.index('id="timeline-data"') < html.index("window.transcriptViewer = ")
+
+
+def test_assets_route_caches_current_hashes_forever(tmp_path: Path, monkeypatch):
+    client = server(tmp_path, monkeypatch)
+    url = asset_url("transcript.css")
+    current = client.get(url)
+    assert current.status_code == 200
+    assert current.headers["content-type"].startswith("text/css")
+    assert "immutable" in current.headers["cache-control"]
+    assert current.text == asset_text("transcript.css")
+
+    # A page from an older release still gets the file, but it mustn't stick
+    stale = client.get("/assets/transcript.0123456789.css")
+    assert stale.status_code == 200 and stale.headers["cache-control"] == "no-cache"
+    assert client.get("/assets/secrets.0123456789.txt").status_code == 404
+
+
+def test_standalone_download_of_a_server_page(tmp_path: Path, write_transcript, monkeypatch):
+    monkeypatch.setattr(main, "VIRTUAL_VIEWER_MIN_CAPTIONS", 10)
+    client = server(tmp_path, monkeypatch)
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS,
+                       called_by_mercuryweb=True, standalone=False)
+
+    response = client.get("/standalone/talk.html")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="talk.html"'
+    html = response.text
+    assert "/assets/" not in html and 'id="timeline-data"' in html
+    assert html.index('id="timeline-data"') < html.index("window.transcriptViewer = ")
+    assert client.get("/standalone/missing.html").status_code == 404
+    assert client.get("/standalone/talk.mp4").status_code == 400
@@ -0,0 +1,78 @@
+import importlib
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+
+from transcribe_with_whisper import autotune
+
+# Simulated cost (seconds per call) and output of each compute type / beam size
+COST = {"float32": 0.08, "int8_float32": 0.06, "int8": 0.02}
+TEXT = "the quick brown fox jumps over the lazy dog every day"
+
+
+class FakeModel:
+
+    def __init__(self, compute_type, threads):
+        self.compute_type = compute_type
+        self.threads = threads
+
+    def transcribe(self, audio, language=None, beam_size=5):
+        import time
+        time.sleep(COST[self.compute_type] * beam_size / self.threads)
+        words = TEXT.split()
+        if self.compute_type == "int8" and beam_size == 1:
+            words = words[:-3]  # too lossy: 3 of 11 words missing
+        return iter([SimpleNamespace(text=" " + " ".join(words))]), None
+
+
+def test_word_error_rate():
+    assert autotune.word_error_rate("a b c d", "a b c d") == 0
+    assert autotune.word_error_rate("a b c d", "a x c") == 0.5
+
+
+def test_calibrate_picks_fastest_setting_within_the_error_budget():
+    result = autotune.calibrate(np.zeros(16000 * 10, dtype=np.float32),
+                                beam_sizes=[1, 2],
+                                thread_counts=[1, 2],
+                                max_wer=0.1,
+                                load_model=lambda size, dev, ct, threads: FakeModel(ct, threads),
+                                log=lambda msg: None)
+
+    assert len(result["trials"]) == 12
+    assert (result["compute_type"], result["beam_size"], result["cpu_threads"]) == ("int8", 2, 2)
+    assert result["wer"] == 0
+
+
+def test_saved_profile_feeds_model_and_decode_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("WHISPER_PROFILE", str(tmp_path / "profile.json"))
+    monkeypatch.delenv("WHISPER_AUTOTUNE", raising=False)
+    autotune.save_profile("base", {"compute_type": "int8", "cpu_threads": 6, "beam_size": 2})
+
+    assert autotune.load_profile("base") == {"compute_type": "int8", "cpu_threads": 6, "beam_size": 2}
+    assert autotune.load_profile("large-v3") == {}
+    main = importlib.import_module("transcribe_with_whisper.main")
+    assert main.decode_options("base") == {"beam_size": 2}
+
+    monkeypatch.setenv("WHISPER_AUTOTUNE", "0")
+    assert main.decode_options("base") == {}
+
+
+def test_profile_fills_in_model_settings_unless_overridden(tmp_path, monkeypatch):
+    monkeypatch.setenv("WHISPER_PROFILE", str(tmp_path / "profile.json"))
+    monkeypatch.delenv("WHISPER_AUTOTUNE", raising=False)
+    monkeypatch.delenv("WHISPER_CPU_THREADS", raising=False)
+    autotune.save_profile("base", {"compute_type": "int8", "cpu_threads": 6, "beam_size": 2})
+    main = importlib.import_module("transcribe_with_whisper.main")
+    calls = []
+    monkeypatch.setattr(main, "WhisperModel", lambda size, **kwargs: calls.append(kwargs) or SimpleNamespace(model=None))
+    monkeypatch.setattr(main, "is_apple_silicon", lambda: False)
+
+    main.create_whisper_model("base")
+    assert calls[-1] == {"device": "auto", "compute_type": "int8", "cpu_threads": 6, "num_workers": 1}
+
+    monkeypatch.setenv("WHISPER_CPU_THREADS", "3")
+    main.create_whisper_model("base", compute_type="float32")
+    assert calls[-1]["cpu_threads"] == 3 and calls[-1]["compute_type"] == "float32"
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from transcribe_with_whisper.cpu_budget import (parse_cores, partition_cores, pin_process, pinned_command,
+                                                thread_env)
+
+
+def test_partition_cores_splits_evenly_and_disjointly():
+    assert partition_cores(3, list(range(8))) == [[0, 1, 2], [3, 4, 5], [6, 7]]
+    assert partition_cores(1, [2, 3]) == [[2, 3]]
+    # More slots than cores: slots share single cores
+    assert partition_cores(3, [0, 1]) == [[0], [1], [0]]
+
+
+def test_parse_cores_accepts_taskset_lists():
+    assert parse_cores("0-3,8, 10-11") == [0, 1, 2, 3, 8, 10, 11]
+    with pytest.raises(ValueError):
+        parse_cores(",")
+
+
+def test_thread_env_sets_openmp_and_blas_counts():
+    assert thread_env(4)["OMP_NUM_THREADS"] == "4"
+    assert thread_env(0)["MKL_NUM_THREADS"] == "1"
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="no CPU affinity API")
+def test_pin_process_restricts_affinity():
+    import subprocess
+    import sys
+
+    core = sorted(os.sched_getaffinity(0))[0]
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        assert pin_process(proc.pid, [core])
+        assert os.sched_getaffinity(proc.pid) == {core}
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+@pytest.mark.skipif(pinned_command(["true"], [0]) is None, reason="no taskset")
+def test_child_is_pinned_before_it_runs_any_code():
+    import subprocess
+    import sys
+
+    core = sorted(os.sched_getaffinity(0))[-1]
+    cmd = pinned_command([sys.executable, "-c", "import os; print(sorted(os.sched_getaffinity(0)))"], [core])
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == f"[{core}]"
+    assert pinned_command(["true"], []) is None
@@ -0,0 +1,69 @@
+import importlib
+import os
+import zipfile
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+main = importlib.import_module("transcribe_with_whisper.main")
+from transcribe_with_whisper.docx_writer import timeline_paragraphs, write_docx
+from transcribe_with_whisper.html_to_docx import convert_html_string_to_docx
+
+SPEAKERS = {"SPEAKER_00": ("Alice", "lightgray", "darkorange"),
+            "SPEAKER_01": ("Bob & Co", "#e1ffc7", "darkgreen")}
+
+
+def paragraphs(path: Path):
+    return [p.text for p in Document(str(path)).paragraphs]
+
+
+def test_streamed_docx_matches_the_html_conversion(tmp_path: Path, write_transcript):
+    groups, vtts = write_transcript(tmp_path, captions=3, text="turn {n} caption {c}")
+    for inline in (True, False):
+        timeline = main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS,
+                                      speaker_inline=inline)
+        convert_html_string_to_docx((tmp_path / "talk.html").read_text(encoding="utf-8"),
+                                    tmp_path / "from-html.docx")
+        assert write_docx(timeline_paragraphs(timeline, inline), tmp_path / "direct.docx") == 9
+        assert paragraphs(tmp_path / "direct.docx") == paragraphs(tmp_path / "from-html.docx")
+    assert paragraphs(tmp_path / "direct.docx")[3] == "[0:00:10.0] turn 1 caption 0"
+    assert list(timeline_paragraphs(timeline))[3] == "Bob & Co: [0:00:10.0] turn 1 caption 0"
+
+
+def test_write_docx_escapes_text_and_replaces_atomically(tmp_path: Path):
+    out = tmp_path / "notes.docx"
+    write_docx(["old"], out)
+    assert write_docx(iter(["a < b & c", "bell\x07 ring", "  spaced  "]), out) == 3
+    assert paragraphs(out) == ["a < b & c", "bell ring", "  spaced  "]
+    with zipfile.ZipFile(out) as zf:
+        assert zf.testzip() is None
+        assert "word/styles.xml" in zf.namelist()
+
+    def broken():
+        yield "first"
+        raise RuntimeError("disk went away")
+
+    with pytest.raises(RuntimeError):
+        write_docx(broken(), out)
+    assert paragraphs(out) == ["a < b & c", "bell ring", "  spaced  "]
+    assert list(tmp_path.iterdir()) == [out]
+
+
+def test_write_docx_streams_to_disk_while_paragraphs_are_produced(tmp_path: Path):
+    out = tmp_path / "long.docx"
+    sizes = []
+
+    def lines():
+        for i in range(50000):
+            if i % 10000 == 0:
+                sizes.append(out.with_name("long.docx.tmp").stat().st_size)
+            yield f"line {i} {i * 7919 % 100003:x} {i * 104729 % 1000003:x}"
+
+    assert write_docx(lines(), out) == 50000
+    # Compressed paragraphs reach the file long before the generator is exhausted
+    assert sizes == sorted(sizes) and sizes[-1] > sizes[1] > sizes[0]
+    assert paragraphs(out)[-1].startswith("line 49999 ")
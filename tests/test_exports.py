@@ -0,0 +1,79 @@
+import importlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from docx import Document
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+main = importlib.import_module("transcribe_with_whisper.main")
+from transcribe_with_whisper.exports import ensure_export, export_path, missing_exports
+
+SPEAKERS = {"SPEAKER_00": ("Alice", "lightgray", "darkorange"),
+            "SPEAKER_01": ("Bob", "#e1ffc7", "darkgreen")}
+
+
+def render(write_transcript, base: Path, speakers=SPEAKERS, speaker_inline=True):
+    groups, vtts = write_transcript(base, turns=2, captions=2, seconds=1.5, text="turn {n} caption {c}")
+    main.generate_html(base / "talk.html", groups, vtts, "talk.mp4", speakers, speaker_inline=speaker_inline)
+
+
+def test_exports_are_built_once_and_rebuilt_when_the_transcript_changes(tmp_path: Path, write_transcript):
+    render(write_transcript, tmp_path)
+    assert missing_exports(tmp_path, "talk") == ["docx", "srt", "txt", "json"]
+
+    srt = ensure_export(tmp_path, "talk", "srt")
+    assert srt == tmp_path / "talk" / "talk.srt"
+    assert srt.read_text(encoding="utf-8").split("\n\n")[2] == (
+        "3\n00:00:10,000 --> 00:00:11,500\nBob: turn 1 caption 0")
+    built = srt.stat().st_mtime_ns
+    assert ensure_export(tmp_path, "talk", "srt").stat().st_mtime_ns == built
+    assert missing_exports(tmp_path, "talk") == ["docx", "txt", "json"]
+
+    data = json.loads(ensure_export(tmp_path, "talk", "json").read_text(encoding="utf-8"))
+    assert data["media"] == "talk.mp4" and [s["name"] for s in data["speakers"]] == ["Alice", "Bob"]
+    assert data["segments"][1] == {"start": 1.5, "end": 3.0, "speaker": "SPEAKER_00",
+                                   "speaker_name": "Alice", "text": "turn 0 caption 1"}
+
+    docx = ensure_export(tmp_path, "talk", "docx")
+    assert docx == tmp_path / "talk.docx"
+    assert [p.text for p in Document(str(docx)).paragraphs][0] == "Alice: [0:00:00.0] turn 0 caption 0"
+
+    # Renaming a speaker rewrites the HTML and timeline, so every export is stale
+    render(write_transcript, tmp_path, {**SPEAKERS, "SPEAKER_01": ("Robert", "#e1ffc7", "darkgreen")},
+           speaker_inline=False)
+    assert missing_exports(tmp_path, "talk") == ["docx", "srt", "txt", "json"]
+    assert ensure_export(tmp_path, "talk", "txt").read_text(encoding="utf-8").splitlines()[2] == (
+        "[0:00:10.0] turn 1 caption 0")
+    assert "Robert: turn 1 caption 0" not in ensure_export(tmp_path, "talk", "srt").read_text(encoding="utf-8")
+
+
+def test_export_route_list_links_and_idle_prewarm(tmp_path: Path, write_transcript, monkeypatch):
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    render(write_transcript, tmp_path)
+    client = TestClient(mod.app)
+
+    assert 'href="/export/talk.docx"' in client.get("/list").text
+    response = client.get("/export/talk.srt")
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="talk.srt"'
+    assert response.text.startswith("1\n00:00:00,000 --> 00:00:01,500\nAlice: turn 0 caption 0\n")
+    assert client.get("/export/talk.pdf").status_code == 400
+    assert client.get("/export/nothing.docx").status_code == 404
+
+    # Nothing is prepared while a transcription is running
+    mod.jobs["busy"] = {"status": "running"}
+    assert not mod._system_idle()
+    del mod.jobs["busy"]
+    monkeypatch.setenv("EXPORT_PREWARM_IDLE_SECONDS", "0")
+    mod._prewarm_pending.append("talk")
+    mod._prewarm_exports()
+    assert missing_exports(tmp_path, "talk") == [] and mod._prewarm_pending == []
+    assert export_path(tmp_path, "talk", "docx").exists()
@@ -0,0 +1,33 @@
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from transcribe_with_whisper.file_lock import LockTimeout, workdir_lock
+
+
+def test_second_holder_waits_for_the_first(tmp_path: Path):
+    workdir = tmp_path / 'talk'
+    events = []
+
+    def second():
+        with workdir_lock(workdir, on_wait=lambda: events.append('waiting'), poll_interval=0.01):
+            events.append('second')
+
+    with workdir_lock(workdir):
+        thread = threading.Thread(target=second)
+        thread.start()
+        time.sleep(0.2)
+        events.append('first done')
+    thread.join(timeout=5)
+
+    assert events == ['waiting', 'first done', 'second']
+    assert (workdir / '.lock').exists()
+
+
+def test_lock_times_out(tmp_path: Path):
+    with workdir_lock(tmp_path):
+        with pytest.raises(LockTimeout):
+            with workdir_lock(tmp_path, timeout=0.1):
+                pass
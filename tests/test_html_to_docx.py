@@ -0,0 +1,74 @@
+import time
+from pathlib import Path
+
+import pytest
+from docx import Document
+
+from transcribe_with_whisper.html_to_docx import convert_html_string_to_docx, iter_transcript_paragraphs
+
+ARTIFACT_HTML = Path(__file__).resolve().parent.parent / "artifacts" / "test-audio" / "test-audio.html"
+
+PAGE = """<html><head><style>.transcript-segment { color: red }</style></head><body>
+<div class="html-only"><div class="transcript-segment">header copy</div></div>
+<!-- <div class="transcript-segment">commented out</div> -->
+<div class="e">
+  <div class="transcript-segment" data-start="1.0">
+    <span class="timestamp">[0:00:01.0] </span>
+    <span class="speaker-name">Ana:
+    </span
+    >
+    <span class="transcript-text"
+      ><a href="#x" class="lt">Fish &amp; chips,
+         please</a
+    ></span>
+  </div>
+  <div class="transcript-segment editable"><br/>no spans at all<span class="html-only">hidden</span></div>
+  <div class="transcript-segment"><span class="speaker-name">Bo: <b>unclosed</span>
+    <span class="transcript-text">cut short</div>
+  </span></i>
+  <div class="transcript-segment">   </div>
+</div>
+<script>var s = '<div class="transcript-segment">in a script</div>';</script>
+</body></html>"""
+
+
+def test_paragraphs_from_well_formed_and_sloppy_markup():
+    assert list(iter_transcript_paragraphs(PAGE)) == [
+        "Ana: [0:00:01.0] Fish & chips, please",
+        "no spans at all",
+        "Bo: unclosed cut short",
+    ]
+
+
+def test_conversion_of_a_real_transcript(tmp_path: Path):
+    if not ARTIFACT_HTML.exists():
+        pytest.skip("artifact transcript not present")
+    convert_html_string_to_docx(ARTIFACT_HTML.read_text(encoding="utf-8"), tmp_path / "out.docx")
+    paragraphs = [p.text for p in Document(str(tmp_path / "out.docx")).paragraphs]
+    assert len(paragraphs) == 30
+    assert all(p.count("[") == 1 for p in paragraphs)
+
+    with pytest.raises(RuntimeError):
+        convert_html_string_to_docx("<html><body><p>nothing here</p></body></html>", tmp_path / "x.docx")
+
+
+def test_parsing_time_grows_linearly():
+    seg = ('<div class="transcript-segment"><span class="speaker-name">S: </span>'
+           '<span class="timestamp">[0:00:01.0] </span><span class="transcript-text">'
+           '<a class="lt">words &amp; more words</a></span></div>\n')
+    # Unclosed html-only spans and stray end tags are what regexes backtrack on
+    bad = '<div class="transcript-segment"><span class="html-only"><span class="transcript-text">t</div></i>\n'
+
+    def seconds(n):
+        html = (seg + bad) * n
+        best = float("inf")
+        for _ in range(3):
+            began = time.perf_counter()
+            count = sum(1 for _ in iter_transcript_paragraphs(html))
+            best = min(best, time.perf_counter() - began)
+        assert count == n
+        return best
+
+    small, large = seconds(1000), seconds(8000)
+    # 8x the input: about 8x the time, where quadratic growth would be 64x
+    assert large < small * 20
@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+SLEEPER = [sys.executable, '-c', "import time; print('Running preflight checks', flush=True); time.sleep(60)"]
+
+
+def make_module_with_temp_dir(tmpdir: Path, monkeypatch):
+    os.environ['SKIP_HF_STARTUP_CHECK'] = '1'
+    os.environ['TRANSCRIPTION_DIR'] = str(tmpdir)
+    if 'transcribe_with_whisper.server_app' in sys.modules:
+        del sys.modules['transcribe_with_whisper.server_app']
+    sys.path.insert(0, os.getcwd())
+    import importlib
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = Path(tmpdir)
+    # The job runner appends to bundle_run.log in the working directory
+    monkeypatch.chdir(tmpdir)
+    monkeypatch.setattr(mod, '_build_cli_cmd', lambda *args, **kwargs: list(SLEEPER))
+    return mod
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_cancel_kills_cli_and_removes_scratch_audio(tmp_path: Path, monkeypatch):
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    workdir = tmp_path / 'talk'
+    workdir.mkdir()
+    (workdir / 'talk-spaced.wav').write_bytes(b'scratch')
+    (workdir / '0.vtt').write_text('WEBVTT\n')
+
+    job_id = mod._start_transcription_job('talk.mp3')
+    assert wait_for(lambda: job_id in mod._job_processes)
+    proc = mod._job_processes[job_id]
+
+    client = TestClient(mod.app)
+    resp = client.post(f'/api/job/{job_id}/cancel')
+    assert resp.json()['success'] is True
+    assert proc.poll() is not None
+    assert mod.jobs[job_id]['status'] == 'cancelled'
+    assert not (workdir / 'talk-spaced.wav').exists()
+    assert (workdir / '0.vtt').exists()
+
+    # A finished job can't be cancelled again
+    assert client.post(f'/api/job/{job_id}/cancel').status_code == 409
+
+
+def test_cancel_leaves_scratch_audio_of_another_run_on_the_basename(tmp_path: Path, monkeypatch):
+    from transcribe_with_whisper.file_lock import workdir_lock
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    monkeypatch.setattr(mod, 'CLEANUP_LOCK_TIMEOUT', 0.2)
+    workdir = tmp_path / 'talk'
+    workdir.mkdir()
+    (workdir / 'talk.cache.wav').write_bytes(b'in use')
+    client = TestClient(mod.app)
+
+    # A job waiting behind another run on the same basename (the lock holder here)
+    with workdir_lock(workdir):
+        job_id = mod._start_transcription_job('talk.mp3')
+        assert wait_for(lambda: job_id in mod._job_processes)
+        assert client.post(f'/api/job/{job_id}/cancel').json()['success'] is True
+        assert (workdir / 'talk.cache.wav').exists()
+
+    # A job that never started removes nothing
+    mod.jobs['queued-only'] = {'status': 'queued', 'filename': 'talk.mp3', 'basename': 'talk'}
+    assert client.post('/api/job/queued-only/cancel').json()['success'] is True
+    assert (workdir / 'talk.cache.wav').exists()
+
+
+def test_watchdog_fails_job_stuck_in_a_stage(tmp_path: Path, monkeypatch):
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    monkeypatch.setenv('STAGE_TIMEOUT_STARTUP', '1')
+
+    job_id = mod._start_transcription_job('stuck.mp3')
+    assert wait_for(lambda: mod.jobs[job_id]['status'] == 'error')
+    job = mod.jobs[job_id]
+    assert job['error_reason'] == 'timeout'
+    assert "Stage 'startup' timed out" in job['message']
+    assert job_id not in mod._job_processes
+
+
+def test_identical_requests_share_one_running_job(tmp_path: Path, monkeypatch):
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    (tmp_path / 'talk.mp3').write_bytes(b'media')
+
+    first = mod._start_transcription_job('talk.mp3', num_speakers=2)
+    assert wait_for(lambda: first in mod._job_processes)
+    assert mod._start_transcription_job('talk.mp3', num_speakers=2) == first
+    assert mod.jobs[first]['subscribers'] == 2
+    # Different options produce a different transcript, so they get their own job
+    other = mod._start_transcription_job('talk.mp3', num_speakers=3)
+    assert other != first
+
+    client = TestClient(mod.app)
+    client.post(f'/api/job/{first}/cancel')
+    client.post(f'/api/job/{other}/cancel')
+    assert mod._start_transcription_job('talk.mp3', num_speakers=2) not in (first, other)
+    for job_id in list(mod._job_processes):
+        client.post(f'/api/job/{job_id}/cancel')
+
+
+PAUSABLE = ("import os, sys, time\n"
+            "pause = os.path.join(sys.argv[1], '.pause')\n"
+            "print('Running preflight checks', flush=True)\n"
+            "for _ in range(1200):\n"
+            "    if os.path.exists(pause):\n"
+            "        os.remove(pause)\n"
+            "        sys.exit(75)\n"
+            "    time.sleep(0.05)\n")
+
+
+def test_long_job_is_paused_for_a_short_one_and_resumed(tmp_path: Path, monkeypatch):
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    monkeypatch.setenv('MAX_CONCURRENT_JOBS', '1')
+    monkeypatch.setattr(mod, '_build_cli_cmd',
+                        lambda filename, *args, **kwargs: [sys.executable, '-c', PAUSABLE,
+                                                           Path(filename).stem])
+    client = TestClient(mod.app)
+
+    long_job = mod._start_transcription_job('lecture.mp3', file_duration=7200)
+    assert wait_for(lambda: long_job in mod._job_processes)
+    short_job = mod._start_transcription_job('memo.mp3', file_duration=60)
+    assert mod.jobs[short_job]['status'] == 'queued'
+
+    assert wait_for(lambda: short_job in mod._job_processes)
+    assert mod.jobs[long_job]['status'] == 'queued'
+    assert mod.jobs[long_job]['pauses'] == 1
+    assert long_job not in mod._job_processes
+
+    # Once the short job is out of the way the long one picks up again
+    client.post(f'/api/job/{short_job}/cancel')
+    assert wait_for(lambda: long_job in mod._job_processes)
+    client.post(f'/api/job/{long_job}/cancel')
+
+
+def test_concurrent_jobs_get_their_own_cores(tmp_path: Path, monkeypatch):
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    monkeypatch.setenv('MAX_CONCURRENT_JOBS', '2')
+    monkeypatch.setattr(mod, 'available_cores', lambda: [0, 1, 2, 3])
+    monkeypatch.setattr(mod, 'partition_cores',
+                        lambda slots: [[0, 1, 2, 3][i::slots] for i in range(slots)])
+    pinned, threads = [], []
+    # Record the cores each child is pinned to (the fake ones may not exist here)
+    monkeypatch.setattr(mod, 'pinned_command', lambda cmd, cores: pinned.append(cores) or cmd)
+
+    def build(*args, cpu_threads=None, **kwargs):
+        threads.append(cpu_threads)
+        return list(SLEEPER)
+
+    monkeypatch.setattr(mod, '_build_cli_cmd', build)
+
+    first = mod._start_transcription_job('a.mp3')
+    second = mod._start_transcription_job('b.mp3')
+    assert wait_for(lambda: first in mod._job_processes and second in mod._job_processes)
+    assert sorted(map(sorted, pinned)) == [[0, 2], [1, 3]]
+    assert threads == [2, 2]
+    assert mod.jobs[first]['cpu_slot'] != mod.jobs[second]['cpu_slot']
+
+    client = TestClient(mod.app)
+    for job_id in (first, second):
+        client.post(f'/api/job/{job_id}/cancel')
+
+
+def test_progressive_output_exposes_the_draft_result(tmp_path: Path, monkeypatch):
+    mod = make_module_with_temp_dir(tmp_path, monkeypatch)
+    mod.jobs['7'] = {'status': 'running', 'progress': 50, 'message': ''}
+
+    mod._update_progress_from_output('7', 'Drafting segment 2/4: 1.wav')
+    assert mod.jobs['7']['progress'] == 57
+    mod._update_progress_from_output('7', f'Draft transcript ready: {tmp_path}/talk.html')
+    assert mod.jobs['7']['draft_result'] == '/files/talk.html'
+    mod._update_progress_from_output('7', 'Transcribing segment 2/4: 1.wav')
+    assert mod.jobs['7']['progress'] == 72
@@ -0,0 +1,117 @@
+import importlib
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from transcribe_with_whisper.job_queue import JobQueue, SQLiteJobQueue, queue_from_url
+from transcribe_with_whisper.worker import run_job
+
+
+def test_sqlite_queue_claims_each_job_once(tmp_path: Path):
+    queue = SQLiteJobQueue(tmp_path / 'queue.db')
+    queue.enqueue({'filename': 'a.mp3'}, 'a', state={'progress': 0})
+    queue.enqueue({'filename': 'b.mp3'}, 'b')
+    other = queue_from_url(f"sqlite:///{tmp_path / 'queue.db'}")
+
+    assert queue.claim('w1') == ('a', {'filename': 'a.mp3'})
+    assert other.claim('w2') == ('b', {'filename': 'b.mp3'})
+    assert queue.claim('w1') is None
+
+    queue.update('a', {'status': 'running', 'progress': 40})
+    assert other.get('a') == {'progress': 40, 'status': 'running', 'worker': 'w1'}
+
+    # A cancel from a web node wins over the worker's next progress report
+    assert other.cancel('a') is True
+    queue.update('a', {'status': 'running', 'progress': 50})
+    assert queue.get('a')['status'] == 'cancelled'
+    assert queue.cancel('a') is False
+
+
+def test_stale_jobs_are_requeued(tmp_path: Path):
+    queue = SQLiteJobQueue(tmp_path / 'queue.db')
+    queue.enqueue({'filename': 'a.mp3'}, 'a')
+    queue.claim('dead-worker')
+    time.sleep(0.05)
+    assert queue.requeue_stale(0.01) == 1
+    assert queue.claim('w2')[0] == 'a'
+
+
+def test_a_job_that_keeps_losing_its_worker_fails(tmp_path: Path):
+    queue = SQLiteJobQueue(tmp_path / 'queue.db')
+    queue.enqueue({'filename': 'crash.mp3'}, 'crash', state={'progress': 0})
+    for attempt in range(2):
+        assert queue.claim(f'w{attempt}')[0] == 'crash'
+        time.sleep(0.02)
+        assert queue.requeue_stale(0.01, max_attempts=2) == (1 if attempt == 0 else 0)
+
+    job = queue.get('crash')
+    assert job['status'] == 'error' and job['error_reason'] == 'worker_lost'
+    assert queue.claim('w3') is None
+
+
+def test_queue_interface_is_abstract():
+    with pytest.raises(TypeError):
+        JobQueue()
+
+
+def test_web_node_enqueues_and_worker_reports_back(tmp_path: Path, monkeypatch):
+    os.environ['SKIP_HF_STARTUP_CHECK'] = '1'
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    monkeypatch.setenv('JOB_QUEUE', f"sqlite:///{tmp_path / 'queue.db'}")
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    import importlib
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    # The "CLI" succeeds immediately; the HTML is already there
+    monkeypatch.setattr(mod, '_build_cli_cmd', lambda *args, **kwargs: [sys.executable, '-c', 'pass'])
+    (tmp_path / 'talk.mp3').write_bytes(b'media')
+    (tmp_path / 'talk.html').write_text('<html><body><p>hi</p></body></html>')
+
+    job_id = mod._start_transcription_job('talk.mp3', num_speakers=2)
+    client = TestClient(mod.app)
+    assert client.get(f'/api/job/{job_id}').json()['status'] == 'queued'
+    assert job_id not in mod._job_processes
+
+    from transcribe_with_whisper.worker import run_worker
+    assert run_worker(mod._job_queue(), worker_id='gpu-1', once=True) == 1
+
+    # A web node that never saw the job locally can still report it
+    mod.jobs.pop(job_id, None)
+    status = client.get(f'/api/job/{job_id}').json()
+    assert status['status'] == 'completed'
+    assert status['worker'] == 'gpu-1'
+    assert status['result'] == '/files/talk.html'
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX record locks')
+def test_worker_removes_scratch_audio_after_a_remote_cancel(tmp_path: Path, monkeypatch):
+    os.environ['SKIP_HF_STARTUP_CHECK'] = '1'
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    monkeypatch.setattr(mod, 'CLEANUP_LOCK_TIMEOUT', 0.1)
+    # A "CLI" that holds the basename lock (as file_lock takes it) until it is killed
+    holder = ("import fcntl, sys, time\n"
+              "fh = open(sys.argv[1], 'a+'); fcntl.lockf(fh, fcntl.LOCK_EX)\n"
+              "print('locked', flush=True); time.sleep(60)")
+    monkeypatch.setattr(mod, '_build_cli_cmd',
+                        lambda *args, **kwargs: [sys.executable, '-c', holder, str(tmp_path / 'talk' / '.lock')])
+    (tmp_path / 'talk').mkdir()
+    (tmp_path / 'talk' / 'talk-spaced.wav').write_bytes(b'scratch')
+
+    queue = SQLiteJobQueue(tmp_path / 'queue.db')
+    queue.enqueue({'filename': 'talk.mp3'}, 'a')
+    job_id, payload = queue.claim('w1')
+    threading.Timer(1.0, queue.cancel, args=(job_id, )).start()
+    job = run_job(queue, job_id, payload, 'w1', sync_interval=0.2)
+
+    assert job['status'] == 'cancelled'
+    assert not (tmp_path / 'talk' / 'talk-spaced.wav').exists()
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+
+from transcribe_with_whisper.journal import JobPaused, Journal, read_journal, request_pause
+
+
+def test_journal_survives_a_pause_and_resumes(tmp_path: Path):
+    media = tmp_path / 'talk.mp3'
+    media.write_bytes(b'media')
+    workdir = tmp_path / 'talk'
+    workdir.mkdir()
+
+    journal = Journal(workdir, 'talk')
+    assert journal.begin(media, {'num_speakers': 2}) is True
+    journal.mark_stage('diarization')
+    journal.mark_segment(0, 3)
+    journal.checkpoint('segment 2')  # nothing requested yet
+
+    request_pause(workdir)
+    with pytest.raises(JobPaused):
+        journal.checkpoint('segment 2')
+    saved = read_journal(journal.path)
+    assert saved['state'] == 'paused' and saved['paused_at'] == 'segment 2'
+    assert not (workdir / '.pause').exists()
+
+    resumed = Journal(workdir, 'talk')
+    assert resumed.begin(media, {'num_speakers': 2}) is True
+    assert resumed.stage_done('diarization')
+    assert resumed.data['segments_done'] == [0]
+    assert resumed.data['state'] == 'running'
+
+
+def test_journal_for_a_replaced_input_starts_over(tmp_path: Path):
+    media = tmp_path / 'talk.mp3'
+    media.write_bytes(b'media')
+    journal = Journal(tmp_path, 'talk')
+    journal.begin(media, {})
+    journal.mark_stage('audio')
+
+    media.write_bytes(b'a different recording')
+    fresh = Journal(tmp_path, 'talk')
+    assert fresh.begin(media, {}) is False
+    assert not fresh.stage_done('audio')
@@ -0,0 +1,174 @@
+import importlib
+import os
+import sys
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+from transcribe_with_whisper import Transcriber
+from transcribe_with_whisper.live import LiveSession, OnlineSpeakers, PcmDecoder, SpectralEmbedder
+
+RATE = 16000
+
+
+class FakeWhisper:
+
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, clip, language=None, **options):
+        self.calls.append((len(clip), options.get("beam_size")))
+        segment = SimpleNamespace(start=0.0, end=len(clip) / RATE,
+                                  text=f" {len(clip) / RATE:.1f} seconds", words=[])
+        return iter([segment]), SimpleNamespace(language=language)
+
+
+def energy_vad(samples):
+    """Speech wherever a 100 ms frame is loud."""
+    frame = RATE // 10
+    loud = [np.abs(samples[i:i + frame]).mean() > 0.05 for i in range(0, len(samples), frame)]
+    regions, start = [], None
+    for i, on in enumerate(loud + [False]):
+        if on and start is None:
+            start = i * frame
+        elif not on and start is not None:
+            regions.append((start, min(i * frame, len(samples))))
+            start = None
+    return regions
+
+
+def pitch_embedding(samples):
+    spectrum = np.abs(np.fft.rfft(samples))
+    return np.array([1.0, 0.0]) if np.argmax(spectrum) * RATE / len(samples) < 500 else np.array([0.0, 1.0])
+
+
+def tone(freq, seconds):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def meeting():
+    quiet = np.zeros(RATE, dtype=np.float32)
+    return np.concatenate([tone(200, 2), quiet, tone(1000, 1.5), quiet, tone(200, 2), quiet])
+
+
+def make_transcriber():
+    transcriber = Transcriber(batched=False)
+    transcriber._whisper = FakeWhisper()
+    return transcriber
+
+
+def pcm_chunks(samples, seconds=0.25):
+    data = (samples * 32767).astype("<i2").tobytes()
+    step = int(seconds * RATE) * 2 + 1  # odd sizes split samples across chunks
+    return [data[i:i + step] for i in range(0, len(data), step)]
+
+
+def test_session_streams_partials_and_finals_and_saves_layout(tmp_path: Path):
+    transcriber = make_transcriber()
+    session = LiveSession(transcriber, tmp_path, "standup", embedder=pitch_embedding,
+                          vad=energy_vad, step=0.5, partial_interval=0.5)
+
+    events = [e for chunk in pcm_chunks(meeting()) for e in session.feed(chunk)]
+    tail, html_path = session.finish()
+    events += tail
+
+    finals = [e for e in events if e["type"] == "final"]
+    assert [(f["speaker"], f["start"], f["end"]) for f in finals] == [
+        ("SPEAKER_00", 0.0, 2.0), ("SPEAKER_01", 3.0, 4.5), ("SPEAKER_00", 5.5, 7.5)]
+    assert finals[1]["speaker_name"] == "Speaker 2" and finals[1]["text"] == "1.5 seconds"
+    # Partials come while speech is still going, decoded greedily
+    assert any(e["type"] == "partial" and e["start"] == 0.0 for e in events)
+    partials = [e for e in events if e["type"] == "partial"]
+    assert sum(beam == 1 for _, beam in transcriber._whisper.calls) == len(partials)
+
+    assert html_path == tmp_path / "standup.html"
+    assert "1.5 seconds" in html_path.read_text(encoding="utf-8")
+    assert sorted(p.name for p in (tmp_path / "standup").glob("*.vtt")) == ["0.vtt", "1.vtt", "2.vtt"]
+    with wave.open(str(tmp_path / "standup.wav")) as wf:
+        assert wf.getnframes() == len(meeting())
+
+
+def test_long_speech_is_cut_and_silence_writes_no_transcript(tmp_path: Path):
+    session = LiveSession(make_transcriber(), tmp_path, "quiet", embedder=pitch_embedding,
+                          vad=energy_vad, max_utterance=3.0)
+    events = [e for chunk in pcm_chunks(np.zeros(RATE * 2, dtype=np.float32)) for e in session.feed(chunk)]
+    assert events == []
+
+    events = [e for chunk in pcm_chunks(tone(200, 7)) for e in session.feed(chunk)]
+    assert [(e["start"], e["end"]) for e in events if e["type"] == "final"] == [(2.0, 5.0), (5.0, 8.0)]
+    tail, html_path = session.finish()
+    assert [(e["start"], e["end"]) for e in tail] == [(8.0, 9.0)]
+    assert html_path.exists()
+
+    empty = LiveSession(make_transcriber(), tmp_path, "nothing", embedder=pitch_embedding, vad=energy_vad)
+    empty.feed(b"\0\0" * RATE)
+    assert empty.finish() == ([], None)
+    assert (tmp_path / "nothing.wav").exists() and not (tmp_path / "nothing.html").exists()
+
+
+def test_online_speakers_respects_max_speakers_and_short_clips():
+    speakers = OnlineSpeakers(pitch_embedding, threshold=0.9, max_speakers=1)
+    assert speakers.assign(tone(200, 2)) == "SPEAKER_00"
+    assert speakers.assign(tone(1000, 2)) == "SPEAKER_00"
+
+    speakers = OnlineSpeakers(pitch_embedding, threshold=0.9)
+    assert speakers.assign(tone(200, 2)) == "SPEAKER_00"
+    assert speakers.assign(tone(1000, 2), update=False) == "SPEAKER_01"
+    assert speakers.centroids and len(speakers.centroids) == 1
+    # Too short to judge: stays with whoever spoke last
+    assert speakers.assign(tone(1000, 0.3)) == "SPEAKER_00"
+
+    # The model-free fingerprint tells a low voice from a high one
+    speakers = OnlineSpeakers(SpectralEmbedder())
+    assert [speakers.assign(tone(f, 2)) for f in (150, 900, 160)] == [
+        "SPEAKER_00", "SPEAKER_01", "SPEAKER_00"]
+
+
+def test_pcm_decoder_resamples_and_keeps_split_samples():
+    decoder = PcmDecoder("pcm_s16le", sample_rate=8000)
+    data = (np.full(8000, 16384, dtype="<i2")).tobytes()
+    first = decoder.feed(data[:101])
+    second = decoder.feed(data[101:])
+    assert len(first) + len(second) in (RATE - 1, RATE, RATE + 1)
+    assert np.allclose(second, 0.5)
+
+
+def test_websocket_endpoint_streams_captions(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv('SKIP_HF_STARTUP_CHECK', '1')
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    live = importlib.import_module('transcribe_with_whisper.live')
+    monkeypatch.setattr(live, "silero_speech", energy_vad)
+    monkeypatch.setattr(live, "default_embedder", lambda token=None: pitch_embedding)
+    monkeypatch.setattr(mod, "_live_transcriber", lambda language: make_transcriber())
+    (tmp_path / "standup.html").write_text("taken")
+
+    with TestClient(mod.app).websocket_connect("/ws/live") as ws:
+        ws.send_json({"format": "flac"})
+        assert "Unsupported audio format" in ws.receive_json()["error"]
+
+    with TestClient(mod.app).websocket_connect("/ws/live") as ws:
+        ws.send_json({"format": "pcm_s16le", "name": "standup", "language": "en"})
+        ready = ws.receive_json()
+        assert ready["type"] == "ready" and ready["basename"].startswith("standup-")
+        for chunk in pcm_chunks(meeting()):
+            ws.send_bytes(chunk)
+        ws.send_json({"type": "stop"})
+        events = []
+        while not events or events[-1]["type"] != "done":
+            events.append(ws.receive_json())
+
+    finals = [e for e in events if e["type"] == "final"]
+    assert [f["speaker"] for f in finals] == ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00"]
+    done = events[-1]
+    assert done["result"] == f"/files/{ready['basename']}.html" and done["duration"] == 8.5
+    assert (tmp_path / f"{ready['basename']}.html").exists()
@@ -0,0 +1,78 @@
+import os
+import threading
+from pathlib import Path
+
+from transcribe_with_whisper.manifest import Manifest, input_digest, manifest_path
+
+
+def test_artifact_is_current_until_its_inputs_or_the_file_change(tmp_path: Path):
+    vtt = tmp_path / "talk" / "0.vtt"
+    vtt.parent.mkdir()
+    vtt.write_text("WEBVTT\n\n00:00.000 --> 00:02.000\nhello\n", encoding="utf-8")
+    html = tmp_path / "talk.html"
+    html.write_text("<html>hello</html>", encoding="utf-8")
+    manifest = Manifest(tmp_path / "talk", "talk")
+
+    inputs = input_digest([vtt], speaker_inline=True)
+    assert not manifest.is_current(html, inputs)
+    manifest.record(html, inputs)
+    assert manifest_path(tmp_path / "talk", "talk").exists()
+    assert manifest.is_current(html, input_digest([vtt], speaker_inline=True))
+
+    # Other settings, or edited captions, mean a rebuild
+    assert not manifest.is_current(html, input_digest([vtt], speaker_inline=False))
+    vtt.write_text("WEBVTT\n\n00:00.000 --> 00:02.000\nhello there\n", encoding="utf-8")
+    assert not manifest.is_current(html, input_digest([vtt], speaker_inline=True))
+
+    # Touching the artifact keeps it current; changing or deleting it doesn't
+    os.utime(html, ns=(1, 1))
+    assert manifest.is_current(html, inputs)
+    html.write_text("<html>edited by hand</html>", encoding="utf-8")
+    assert not manifest.is_current(html, inputs)
+    html.unlink()
+    assert not manifest.is_current(html, inputs)
+
+
+def test_derived_artifact_follows_the_file_it_was_made_from(tmp_path: Path):
+    html, docx = tmp_path / "talk.html", tmp_path / "talk.docx"
+    html.write_text("<html>v1</html>", encoding="utf-8")
+    docx.write_bytes(b"PK docx")
+    manifest = Manifest(tmp_path / "talk", "talk")
+    manifest.record(docx, input_digest([html]))
+    manifest.record(html, "anything")
+
+    # A second reader (the web server) sees the same state
+    assert Manifest(tmp_path / "talk", "talk").is_current(docx, input_digest([html]))
+    html.write_text("<html>v2</html>", encoding="utf-8")
+    assert not Manifest(tmp_path / "talk", "talk").is_current(docx, input_digest([html]))
+
+    manifest.forget(docx)
+    assert manifest.entry(docx) is None and manifest.entry(html)["inputs"] == "anything"
+    # A corrupt manifest just means everything gets rebuilt
+    manifest.path.write_text("{not json", encoding="utf-8")
+    assert manifest.entry(html) is None
+
+
+def test_concurrent_records_all_land(tmp_path: Path):
+    artifacts = [tmp_path / f"t.{n}" for n in range(8)]
+    for path in artifacts:
+        path.write_text(path.name, encoding="utf-8")
+    start = threading.Barrier(len(artifacts))
+    errors = []
+
+    def record(path):
+        start.wait()
+        try:
+            for _ in range(20):
+                Manifest(tmp_path, "t").record(path, "inputs")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=record, args=(path,)) for path in artifacts]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert all(Manifest(tmp_path, "t").is_current(path, "inputs") for path in artifacts)
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")) == []
@@ -0,0 +1,46 @@
+import wave
+from pathlib import Path
+
+from transcribe_with_whisper import media_probe
+from transcribe_with_whisper.media_probe import MediaMetadataCache
+
+
+def write_wav(path: Path, seconds: float, rate: int = 16000):
+    with wave.open(str(path), 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b'\x00\x00' * int(seconds * rate))
+
+
+def test_cache_probes_once_and_reprobes_changed_files(tmp_path: Path, monkeypatch):
+    # Force the header fallback so the test doesn't depend on ffprobe being installed
+    monkeypatch.setattr(media_probe, 'find_ffprobe', lambda: None)
+    calls = []
+    real_probe = media_probe.probe_media
+    monkeypatch.setattr(media_probe, 'probe_media', lambda p: calls.append(p) or real_probe(p))
+
+    audio = tmp_path / 'clip.wav'
+    write_wav(audio, 1.5)
+    cache = MediaMetadataCache(tmp_path / 'media-metadata.json')
+
+    meta = cache.get(audio)
+    assert meta['duration'] == 1.5
+    assert meta['channels'] == 1 and meta['sample_rate'] == 16000
+    assert cache.duration(audio) == 1.5
+    assert len(calls) == 1
+
+    # A fresh cache instance reads the sidecar instead of probing again
+    assert MediaMetadataCache(tmp_path / 'media-metadata.json').duration(audio) == 1.5
+    assert len(calls) == 1
+
+    write_wav(audio, 3.0)
+    assert cache.duration(audio) == 3.0
+    assert len(calls) == 2
+
+
+def test_unprobeable_file_returns_none(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(media_probe, 'find_ffprobe', lambda: None)
+    bogus = tmp_path / 'notes.mp4'
+    bogus.write_text('x')
+    assert MediaMetadataCache(tmp_path / 'cache.json').duration(bogus) is None
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from transcribe_with_whisper.partial_transcript import PartialTranscript, partial_path, read_partial
+
+
+def fake_captions(index, vtt_file):
+    return [{"start": index * 10.0, "end": index * 10.0 + 2, "speaker_name": "Alice",
+             "text": Path(vtt_file).read_text()}]
+
+
+def test_partial_transcript_appends_and_reads_from_offsets(tmp_path: Path):
+    vtts = [tmp_path / f"{i}.vtt" for i in range(3)]
+    vtts[1].write_text("already done")
+    partial = PartialTranscript(partial_path(tmp_path, "talk"), fake_captions)
+
+    partial.reset([str(v) for v in vtts])
+    captions, offset = read_partial(partial.path)
+    assert [(c["segment"], c["text"]) for c in captions] == [(1, "already done")]
+
+    vtts[0].write_text("first")
+    partial.add(0, vtts[0])
+    # A line still being written is left for the next poll
+    with open(partial.path, "a", encoding="utf-8") as fh:
+        fh.write('{"segment": 2, "te')
+    captions, next_offset = read_partial(partial.path, offset)
+    assert [c["text"] for c in captions] == ["first"]
+    assert read_partial(partial.path, next_offset) == ([], next_offset)
+    assert read_partial(tmp_path / "missing.jsonl", 5) == ([], 5)
+
+
+def test_partial_endpoint_serves_new_captions(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv('SKIP_HF_STARTUP_CHECK', '1')
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    import importlib
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    mod.jobs['9'] = {'status': 'running', 'filename': 'talk.mp3', 'progress': 60, 'message': ''}
+    workdir = tmp_path / 'talk'
+    workdir.mkdir()
+    vtt = workdir / '0.vtt'
+    vtt.write_text('hello')
+    PartialTranscript(partial_path(workdir, 'talk'), fake_captions).add(0, vtt)
+
+    client = TestClient(mod.app)
+    first = client.get('/api/job/9/partial').json()
+    assert first['status'] == 'running'
+    assert [c['text'] for c in first['captions']] == ['hello']
+    again = client.get(f"/api/job/9/partial?offset={first['offset']}").json()
+    assert again['captions'] == [] and again['offset'] == first['offset']
+    assert client.get('/api/job/nope/partial').status_code == 404
@@ -0,0 +1,164 @@
+import importlib
+import os
+import threading
+import wave
+from pathlib import Path
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+main = importlib.import_module("transcribe_with_whisper.main")
+
+DIARIZATION = [
+    "[ 00:00:02.000 -->  00:00:03.000] A SPEAKER_00",
+    "[ 00:00:03.100 -->  00:00:04.000] B SPEAKER_01",
+]
+
+
+def fake_convert_to_wav(inputfile, outputfile):
+    with wave.open(outputfile, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(b"\0\0" * 16000 * 3)
+
+
+def fake_diarization(inputWav, diarizationFile, *args):
+    Path(diarizationFile).write_text("\n".join(DIARIZATION))
+    return DIARIZATION
+
+
+def fake_transcribe_segments(segment_files, **kwargs):
+    vtt_files = []
+    for f in segment_files:
+        vtt = Path(f).with_suffix(".vtt")
+        vtt.write_text(f"WEBVTT\n\n00:00:00.000 --> 00:00:01.000\nhello from {Path(f).parent.name}\n\n")
+        vtt_files.append(str(vtt))
+    return vtt_files
+
+
+def test_concurrent_jobs_use_their_own_directories(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(main, "convert_to_wav", fake_convert_to_wav)
+    monkeypatch.setattr(main, "get_diarization", fake_diarization)
+    monkeypatch.setattr(main, "transcribe_segments", fake_transcribe_segments)
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+
+    out = tmp_path / "out"
+    results, errors = {}, []
+
+    def run(name):
+        media = tmp_path / f"{name}.mp3"
+        media.write_bytes(b"media")
+        try:
+            results[name] = main.transcribe_video(str(media), output_dir=out)
+        except Exception as exc:  # pragma: no cover - surfaced by the assert below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(name, )) for name in ("first", "second")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=60)
+
+    assert not errors
+    assert Path.cwd() == elsewhere and not list(elsewhere.iterdir())
+    for name in ("first", "second"):
+        assert results[name] == out / f"{name}.html"
+        assert f"hello from {name}" in results[name].read_text(encoding="utf-8")
+        workdir = out / name
+        assert (workdir / f"{name}-speakers.json").exists()
+        assert not list(workdir.glob("*.wav"))
+
+
+def test_paused_run_resumes_from_its_journal(tmp_path: Path, monkeypatch):
+    from types import SimpleNamespace
+
+    from transcribe_with_whisper.journal import read_journal, request_pause
+
+    monkeypatch.setattr(main, "convert_to_wav", fake_convert_to_wav)
+    monkeypatch.setattr(main, "get_diarization", fake_diarization)
+    monkeypatch.delenv("ASR_BATCHING", raising=False)
+    workdir = tmp_path / "talk"
+    transcribed = []
+
+    class PausingModel:
+
+        def transcribe(self, path, language=None):
+            transcribed.append(Path(path).name)
+            if len(transcribed) == 1:
+                request_pause(workdir)  # as the server does for a higher-priority job
+            return [SimpleNamespace(start=0.0, end=1.0, text=" hi")], None
+
+    monkeypatch.setattr(main, "get_whisper_model", lambda *args: PausingModel())
+    media = tmp_path / "talk.mp3"
+    media.write_bytes(b"media")
+
+    assert main.transcribe_video(str(media), output_dir=tmp_path) is None
+    journal = read_journal(workdir / "talk-journal.json")
+    assert journal["state"] == "paused" and journal["segments_done"] == [0]
+    partial = (workdir / "talk-partial.jsonl").read_text(encoding="utf-8")
+    assert partial.count("\n") == 1 and '"speaker_name": "Speaker 1"' in partial
+
+    assert main.transcribe_video(str(media), output_dir=tmp_path) == tmp_path / "talk.html"
+    assert transcribed == ["0.wav", "1.wav"]
+    assert read_journal(workdir / "talk-journal.json")["state"] == "completed"
+    assert not (workdir / "talk-partial.jsonl").exists()
+
+
+def test_preset_selects_model_and_decoding_settings(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(main, "convert_to_wav", fake_convert_to_wav)
+    monkeypatch.setattr(main, "get_diarization", fake_diarization)
+    calls = []
+
+    def recording_transcribe_segments(segment_files, **kwargs):
+        calls.append(kwargs)
+        return fake_transcribe_segments(segment_files)
+
+    monkeypatch.setattr(main, "transcribe_segments", recording_transcribe_segments)
+    media = tmp_path / "memo.mp3"
+    media.write_bytes(b"media")
+
+    main.transcribe_video(str(media), output_dir=tmp_path, preset="draft")
+
+    assert calls[0]["model_size"] == "tiny" and calls[0]["compute_type"] == "int8"
+    assert (calls[0]["beam_size"], calls[0]["vad_filter"], calls[0]["batch_size"]) == (1, True, 16)
+
+
+def test_progressive_run_publishes_draft_then_refines_in_place(tmp_path: Path, monkeypatch, capsys):
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(main, "convert_to_wav", fake_convert_to_wav)
+    monkeypatch.setattr(main, "get_diarization", fake_diarization)
+    monkeypatch.setattr(main, "PROGRESSIVE_PUBLISH_SECONDS", 0)
+    monkeypatch.delenv("ASR_BATCHING", raising=False)
+
+    class Model:
+
+        def __init__(self, size):
+            self.size = size
+
+        def transcribe(self, path, language=None, **options):
+            return [SimpleNamespace(start=0.0, end=1.0, text=f" {self.size} text")], None
+
+    monkeypatch.setattr(main, "get_whisper_model", lambda size, *args: Model(size))
+    published = []
+    real_generate_html = main.generate_html
+
+    def recording_generate_html(output, groups, vtts, *args, **kwargs):
+        published.append([Path(v).name for v in vtts])
+        return real_generate_html(output, groups, vtts, *args, **kwargs)
+
+    monkeypatch.setattr(main, "generate_html", recording_generate_html)
+    media = tmp_path / "talk.mp3"
+    media.write_bytes(b"media")
+
+    html = main.transcribe_video(str(media), output_dir=tmp_path, progressive=True)
+
+    assert "Draft transcript ready" in capsys.readouterr().out
+    assert published == [["0.draft.vtt", "1.draft.vtt"], ["0.vtt", "1.draft.vtt"],
+                         ["0.vtt", "1.vtt"], ["0.vtt", "1.vtt"]]
+    assert "base text" in html.read_text(encoding="utf-8")
+    assert "tiny text" not in html.read_text(encoding="utf-8")
+    assert not list((tmp_path / "talk").glob("*.draft.vtt"))
@@ -0,0 +1,93 @@
+import importlib
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+from transcribe_with_whisper import stream_decode
+from transcribe_with_whisper.file_lock import workdir_lock
+from transcribe_with_whisper.stream_decode import StreamingDecoder
+
+# Stands in for ffmpeg: copies stdin to the output path (the last argument) behind a WAV-sized header
+STUB_FFMPEG = f"""#!{sys.executable}
+import sys
+data = sys.stdin.buffer.read()
+with open(sys.argv[-1], "wb") as out:
+    out.write(b"RIFF" + bytes(40) + data)
+"""
+
+
+def stub_ffmpeg(bin_dir: Path, monkeypatch):
+    bin_dir.mkdir(exist_ok=True)
+    script = bin_dir / "ffmpeg"
+    script.write_text(STUB_FFMPEG)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(stream_decode, "find_ffmpeg_tool", lambda name: str(script))
+
+
+def test_decoder_publishes_only_a_complete_stream(tmp_path: Path, monkeypatch):
+    stub_ffmpeg(tmp_path / "bin", monkeypatch)
+    out = tmp_path / "talk.cache.wav"
+    decoder = StreamingDecoder(out)
+    for chunk in (b"abc", b"def"):
+        decoder.feed(chunk)
+    assert decoder.finish(expected_bytes=6) is True
+    assert out.read_bytes()[44:] == b"abcdef"
+
+    short = StreamingDecoder(tmp_path / "short.cache.wav")
+    short.feed(b"abc")
+    assert short.finish(expected_bytes=6) is False
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bin", "talk.cache.wav"]
+
+
+def test_upload_cache_waits_in_the_upload_area_until_its_job_starts(tmp_path: Path, monkeypatch):
+    stub_ffmpeg(tmp_path / "bin", monkeypatch)
+    monkeypatch.setenv("TRANSCRIPTION_DIR", str(tmp_path))
+    sys.modules.pop("transcribe_with_whisper.server_app", None)
+    mod = importlib.import_module("transcribe_with_whisper.server_app")
+    mod.TRANSCRIPTION_DIR = tmp_path
+    started = []
+    monkeypatch.setattr(mod, "_prime_token_env", lambda: "hf_test")
+    monkeypatch.setattr(mod, "_get_audio_duration", lambda path: 1.0)
+    monkeypatch.setattr(mod, "_schedule", lambda: started.append(True))
+    client = TestClient(mod.app)
+    cache = tmp_path / "talk" / "talk.cache.wav"
+    cache.parent.mkdir()
+    cache.write_bytes(b"in use")
+
+    upload_id = client.post("/api/uploads", json={"filename": "talk.mp3", "size": 6}).json()["upload_id"]
+    client.put(f"/api/uploads/{upload_id}?offset=0", content=b"abcdef")
+    job_id = client.post(f"/api/uploads/{upload_id}/complete", json={}).json()["job_id"]
+    staged = Path(mod.jobs[job_id]["staged_audio"])
+    assert staged.parent == tmp_path / ".uploads" and cache.read_bytes() == b"in use"
+
+    # Another run still holds the basename: the CLI will decode the media itself
+    with workdir_lock(cache.parent):
+        mod._install_audio_cache("talk", str(staged))
+    assert not staged.exists() and cache.read_bytes() == b"in use"
+
+    staged.write_bytes(b"RIFF fresh")
+    mod._install_audio_cache("talk", str(staged))
+    assert not staged.exists() and cache.read_bytes() == b"RIFF fresh"
+
+
+def test_cli_reuses_a_cache_newer_than_the_media(tmp_path: Path, monkeypatch):
+    main = importlib.import_module("transcribe_with_whisper.main")
+    media, cache = tmp_path / "talk.mp3", tmp_path / "talk" / "talk.cache.wav"
+    cache.parent.mkdir()
+    media.write_bytes(b"media")
+    cache.write_bytes(b"RIFF decoded during upload")
+    monkeypatch.setattr(main.subprocess, "run", lambda *a, **k: (_ for _ in ()).throw(AssertionError))
+    main.convert_to_wav(str(media), str(cache))
+
+    main.discard_previous_work(cache.parent, "talk", media)
+    assert cache.exists()
+    os.utime(cache, (time.time() - 60, time.time() - 60))
+    main.discard_previous_work(cache.parent, "talk", media)
+    assert not cache.exists()
@@ -0,0 +1,110 @@
+import importlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+main = importlib.import_module("transcribe_with_whisper.main")
+from transcribe_with_whisper.html_to_docx import convert_html_file_to_docx
+from transcribe_with_whisper.timeline import read_timeline, time_range, timeline_path
+
+SPEAKERS = {"SPEAKER_00": ("Alice", "lightgray", "darkorange"),
+            "SPEAKER_01": ("Bob", "#e1ffc7", "darkgreen")}
+
+
+def test_small_transcript_is_inline_and_gets_a_sidecar(tmp_path: Path, write_transcript):
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+
+    html = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    assert html.count('class="transcript-segment"') == 12
+    assert "window.transcriptViewer = " not in html
+
+    timeline = read_timeline(timeline_path(tmp_path / "talk", "talk"))
+    assert [s["name"] for s in timeline["speakers"]] == ["Alice", "Bob"]
+    assert timeline["turns"] == {"speaker": [0, 1, 0], "vtt": ["0.vtt", "1.vtt", "2.vtt"],
+                                 "first": [0, 4, 8]}
+    assert timeline["captions"]["start"][4:6] == [10.0, 12.0]
+    assert timeline["captions"]["vtt_start"][5] == 2.0
+    assert time_range(timeline, 11.0, 14.5) == (4, 7)
+
+
+def test_inline_page_carries_sorted_cue_starts_for_highlighting(tmp_path: Path, write_transcript):
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+
+    html = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    cues = json.loads(re.search(r'<script type="application/json" id="cue-starts">(.*?)</script>',
+                                html).group(1))
+    assert cues == [float(v) for v in re.findall(r'class="transcript-segment" data-start="([^"]+)"', html)]
+    assert cues == sorted(cues) and len(cues) == 12
+    # No per-tick DOM scan or logging
+    assert "a.lt[onclick]" not in html and "console.log('Current video time" not in html
+
+
+def test_long_transcript_renders_from_the_timeline(tmp_path: Path, write_transcript, monkeypatch):
+    monkeypatch.setattr(main, "VIRTUAL_VIEWER_MIN_CAPTIONS", 10)
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+
+    html = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    assert 'class="transcript-segment"' not in html
+    assert '<div id="transcript" data-basename="talk" data-timeline="talk/talk-timeline.json">' in html
+    assert "window.transcriptViewer = " in html
+
+    # DOCX export reads the sidecar when the page has no caption markup
+    convert_html_file_to_docx(tmp_path / "talk.html", tmp_path / "talk.docx")
+    from docx import Document
+    paragraphs = [p.text for p in Document(str(tmp_path / "talk.docx")).paragraphs]
+    assert paragraphs[5] == "Bob: [0:00:12.0] turn 1 caption 1 Q&A"
+    assert len(paragraphs) == 12
+
+
+def test_timeline_endpoint_serves_index_and_ranges(tmp_path: Path, write_transcript, monkeypatch):
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    groups, vtts = write_transcript(tmp_path)
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+    client = TestClient(mod.app)
+
+    index = client.get("/api/timeline/talk").json()
+    assert index["count"] == 12 and index["duration"] == 28.0
+    assert index["starts"][:3] == [0.0, 2.0, 4.0]
+
+    page = client.get("/api/timeline/talk", params={"offset": 3, "limit": 2}).json()
+    assert page["offset"] == 3
+    assert [(r["i"], r["speaker"], r["vtt_file"], r["caption_idx"]) for r in page["captions"]] == [
+        (3, "SPEAKER_00", "0.vtt", 3), (4, "SPEAKER_01", "1.vtt", 0)]
+
+    window = client.get("/api/timeline/talk", params={"start": 21, "end": 24}).json()
+    assert [r["text"] for r in window["captions"]] == ["turn 2 caption 0 Q&A", "turn 2 caption 1 Q&A"]
+
+    assert client.get("/api/timeline/missing").status_code == 404
+    assert client.get("/api/timeline/a%5Cb").status_code == 400
+    assert json.loads((tmp_path / "talk" / "talk-timeline.json").read_text())["media"] == "talk.mp4"
+
+
+def test_overlapping_turns_are_found_by_time(tmp_path: Path, write_transcript):
+    groups, vtts = write_transcript(tmp_path, turns=2)
+    # Bob starts talking at 4 s while Alice's turn still runs to 8 s
+    groups[1] = ["[ 00:00:06.000 -->  00:00:14.000] _ SPEAKER_01"]
+    main.generate_html(tmp_path / "talk.html", groups, vtts, "talk.mp4", SPEAKERS)
+
+    timeline = read_timeline(timeline_path(tmp_path / "talk", "talk"))
+    assert timeline["captions"]["start"] == [0.0, 2.0, 4.0, 6.0, 4.0, 6.0, 8.0, 10.0]
+    assert timeline["search"]["start"] == [0.0, 2.0, 4.0, 4.0, 4.0, 6.0, 8.0, 10.0]
+    # Alice's caption 2 and Bob's caption 0 both run over 5 s
+    lo, hi = time_range(timeline, 5.0, 5.5)
+    assert {2, 4} <= set(range(lo, hi))
+    assert time_range(timeline, 8.5, 9.5) == (6, 7)
+    # Sidecars written without the search index get it computed
+    old = {k: v for k, v in timeline.items() if k != "search"}
+    assert time_range(old, 5.0, 5.5) == (lo, hi)
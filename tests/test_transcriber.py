@@ -0,0 +1,118 @@
+import io
+import os
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+from transcribe_with_whisper import Transcriber
+
+
+class FakeWhisper:
+
+    def __init__(self):
+        self.clip_lengths = []
+
+    def transcribe(self, clip, language=None, word_timestamps=False):
+        self.clip_lengths.append(len(clip))
+        words = [SimpleNamespace(start=0.1, end=0.4, word=" hello", probability=0.9),
+                 SimpleNamespace(start=0.5, end=0.9, word=" there", probability=0.8)]
+        segment = SimpleNamespace(start=0.1, end=0.9, text=" hello there", words=words)
+        return iter([segment]), SimpleNamespace(language="en")
+
+
+class FakeAnnotation:
+
+    def itertracks(self, yield_label=False):
+        for start, end, label in [(0.0, 1.0, "SPEAKER_00"), (1.0, 1.5, "SPEAKER_00"),
+                                  (2.0, 3.0, "SPEAKER_01")]:
+            yield SimpleNamespace(start=start, end=end), None, label
+
+
+def make_transcriber():
+    transcriber = Transcriber(batched=False)
+    transcriber._whisper = FakeWhisper()
+    transcriber._diarizer = lambda audio, **params: SimpleNamespace(speaker_diarization=FakeAnnotation())
+    return transcriber
+
+
+def wav_bytes(seconds=3, rate=16000):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(b"\0\0" * rate * seconds)
+    return buf.getvalue()
+
+
+def test_array_input_returns_turns_segments_and_words():
+    transcriber = make_transcriber()
+    # 8 kHz stereo int16 is converted to 16 kHz mono float
+    samples = np.zeros((2, 8000 * 3), dtype=np.int16)
+
+    result = transcriber.transcribe(samples, sample_rate=8000, speaker_names=["Alice", "Bob"])
+
+    assert result.duration == 3.0
+    assert [(t.speaker, t.start, t.end, t.speaker_name) for t in result.turns] == [
+        ("SPEAKER_00", 0.0, 1.5, "Alice"), ("SPEAKER_01", 2.0, 3.0, "Bob")]
+    assert transcriber._whisper.clip_lengths == [24000, 16000]
+    second = result.turns[1].segments[0]
+    assert (second.start, second.end, second.text) == (2.1, 2.9, "hello there")
+    assert [(w.text, w.start) for w in second.words] == [("hello", 2.1), ("there", 2.5)]
+    assert len(result.words) == 4
+    assert result.to_dict()["turns"][0]["segments"][0]["words"][0]["text"] == "hello"
+
+
+def test_bytes_input_can_write_artifacts(tmp_path: Path):
+    transcriber = make_transcriber()
+
+    result = transcriber.transcribe(wav_bytes(), output_dir=tmp_path, basename="call")
+
+    assert result.html_path == tmp_path / "call.html"
+    html = result.html_path.read_text(encoding="utf-8")
+    assert 'data-start="2.1"' in html and "hello there" in html
+    assert (tmp_path / "call" / "1.vtt").read_text().startswith("WEBVTT")
+    assert (tmp_path / "call" / "call-speakers.json").exists()
+
+
+def test_batched_turns_are_submitted_together():
+    submitted = []
+
+    class FakeBatcher:
+
+        def submit(self, clip, word_timestamps=False):
+            from concurrent.futures import Future
+            submitted.append(len(clip))
+            future = Future()
+            future.set_result([SimpleNamespace(start=0.0, end=0.5, text=" hi", words=[])])
+            return future
+
+    transcriber = make_transcriber()
+    transcriber.batched = True
+    transcriber._batcher = FakeBatcher()
+
+    result = transcriber.transcribe(np.zeros(16000 * 3, dtype=np.float32))
+
+    assert submitted == [24000, 16000]
+    assert transcriber._whisper.clip_lengths == []
+    assert [s.start for s in result.segments] == [0.0, 2.0]
+
+
+def test_importing_the_library_leaves_the_environment_alone(monkeypatch):
+    import importlib
+    import transcribe_with_whisper
+    from transcribe_with_whisper import transcriber
+    for name in ("SKIP_PREFLIGHT_CHECKS", "SKIP_HF_STARTUP_CHECK", "PYTEST_CURRENT_TEST"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(transcribe_with_whisper, "run_preflight", lambda: (_ for _ in ()).throw(AssertionError))
+
+    importlib.reload(transcriber)
+    assert "SKIP_PREFLIGHT_CHECKS" not in os.environ
+    with transcribe_with_whisper.preflight_skipped():
+        transcribe_with_whisper.ensure_preflight()
+    assert transcribe_with_whisper._preflight_skip_depth == 0
@@ -0,0 +1,148 @@
+from pathlib import Path
+
+import importlib
+import os
+import sys
+import threading
+
+import webvtt
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("SKIP_PREFLIGHT_CHECKS", "1")
+os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+
+main = importlib.import_module("transcribe_with_whisper.main")
+from transcribe_with_whisper import transcript_edits
+from transcribe_with_whisper.exports import ensure_export, missing_exports
+from transcribe_with_whisper.timeline import read_timeline, timeline_path
+from transcribe_with_whisper.transcript_edits import apply_caption_edits, save_caption_edits
+
+SPEAKERS = {"SPEAKER_00": ("Alice", "lightgray", "darkorange"),
+            "SPEAKER_01": ("Bob", "#e1ffc7", "darkgreen")}
+
+
+def write_vtt(path: Path, texts):
+    lines = ["WEBVTT", ""]
+    for i, text in enumerate(texts):
+        lines += [f"00:{i // 60:02d}:{i % 60:02d}.000 --> 00:{(i + 1) // 60:02d}:{(i + 1) % 60:02d}.000", text, ""]
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def test_edits_are_grouped_into_one_read_and_write_per_file(tmp_path: Path, monkeypatch):
+    write_vtt(tmp_path / "0.vtt", [f"zero {i}" for i in range(60)])
+    write_vtt(tmp_path / "1.vtt", ["one 0", "one 1"])
+    reads, writes = [], []
+    real_read, real_save = webvtt.read, transcript_edits.save_vtt
+    monkeypatch.setattr(transcript_edits.webvtt, "read", lambda p: reads.append(Path(p).name) or real_read(p))
+    monkeypatch.setattr(transcript_edits, "save_vtt", lambda c, p: writes.append(Path(p).name) or real_save(c, p))
+
+    changes = [{"vttFile": "0.vtt", "captionIdx": str(i), "text": f"edited {i}"} for i in range(50)]
+    changes.insert(10, {"vttFile": "1.vtt", "captionIdx": "1", "text": "one 1"})  # unchanged
+    outcome = apply_caption_edits(tmp_path, changes)
+
+    assert outcome["applied"] == 51 and outcome["modified"] == ["0.vtt"] and outcome["failed"] == []
+    assert outcome["edited"][:2] == [("0.vtt", 0, "edited 0"), ("0.vtt", 1, "edited 1")]
+    assert sorted(reads) == ["0.vtt", "1.vtt"] and writes == ["0.vtt"]
+    texts = [c.text for c in real_read(str(tmp_path / "0.vtt"))]
+    assert texts[:2] == ["edited 0", "edited 1"] and texts[49:51] == ["edited 49", "zero 50"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["0.vtt", "1.vtt"]
+
+
+def test_bad_changes_are_reported_in_order_without_blocking_good_ones(tmp_path: Path):
+    write_vtt(tmp_path / "0.vtt", ["zero 0"])
+    outcome = apply_caption_edits(tmp_path, [
+        {"vttFile": "0.vtt", "captionIdx": "5", "text": "x"},
+        {"vttFile": "../0.vtt", "captionIdx": "0", "text": "x"},
+        {"vttFile": "9.vtt", "captionIdx": "0", "text": "x"},
+        {"vttFile": "0.vtt", "captionIdx": "0", "text": "fixed"},
+        {"captionIdx": "0", "text": "x"},
+    ])
+    assert outcome["applied"] == 1 and outcome["modified"] == ["0.vtt"]
+    assert [f["error"] for f in outcome["failed"]] == [
+        "Caption index 5 out of range (0-0)",
+        "Invalid vttFile: ../0.vtt",
+        "VTT file not found: 9.vtt",
+        "Missing vttFile or captionIdx - HTML may be from legacy version",
+    ]
+    assert webvtt.read(str(tmp_path / "0.vtt"))[0].text == "fixed"
+
+
+def render(base: Path, standalone=True):
+    workdir = base / "talk"
+    groups = [[f"[ 00:00:{n * 10 + 2:02d}.000 -->  00:00:{n * 10 + 10:02d}.000] _ SPEAKER_0{n}"] for n in range(2)]
+    vtts = [str(workdir / f"{n}.vtt") for n in range(2)]
+    main.generate_html(base / "talk.html", groups, vtts, "talk.mp4", SPEAKERS, standalone=standalone)
+    return (base / "talk.html").read_text(encoding="utf-8")
+
+
+def server(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv('TRANSCRIPTION_DIR', str(tmp_path))
+    sys.modules.pop('transcribe_with_whisper.server_app', None)
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = tmp_path
+    client = TestClient(mod.app)
+    return lambda changes: client.post("/save_transcript_edits/talk", json={"changes": changes}).json()
+
+
+def make_transcript(tmp_path: Path):
+    (tmp_path / "talk").mkdir()
+    for n in range(2):
+        write_vtt(tmp_path / "talk" / f"{n}.vtt", [f"turn {n} caption {c}" for c in range(3)])
+
+
+def test_saved_edits_patch_the_page_timeline_and_current_exports(tmp_path: Path, monkeypatch):
+    make_transcript(tmp_path)
+    render(tmp_path)
+    ensure_export(tmp_path, "talk", "docx")
+    ensure_export(tmp_path, "talk", "srt")
+    edit = server(tmp_path, monkeypatch)
+    rerender = main.generate_html
+    monkeypatch.setattr(main, "generate_html", lambda *a, **k: (_ for _ in ()).throw(AssertionError))
+
+    data = edit([{"vttFile": "1.vtt", "captionIdx": "2", "text": "fixed & final"},
+                           {"vttFile": "0.vtt", "captionIdx": "0", "text": "turn 0 caption 0"}])
+    assert data["success"] is True
+    assert data["updated"] == ["talk-timeline.json", "talk.html", "talk.docx", "talk.srt"]
+    monkeypatch.setattr(main, "generate_html", rerender)
+
+    patched = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    assert patched == render(tmp_path)  # the same page a full re-render gives
+    timeline = read_timeline(timeline_path(tmp_path / "talk", "talk"))
+    assert timeline["captions"]["text"][5] == "fixed & final"
+    assert missing_exports(tmp_path, "talk") == ["txt", "json"]
+    assert "Bob: fixed & final" in (tmp_path / "talk" / "talk.srt").read_text(encoding="utf-8")
+
+
+def test_virtual_standalone_page_gets_its_embedded_timeline_patched(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(main, "VIRTUAL_VIEWER_MIN_CAPTIONS", 2)
+    make_transcript(tmp_path)
+    assert 'id="timeline-data"' in render(tmp_path)
+    edit = server(tmp_path, monkeypatch)
+
+    data = edit([{"vttFile": "0.vtt", "captionIdx": "1", "text": "new words"}])
+    assert data["updated"] == ["talk-timeline.json", "talk.html"]
+    assert (tmp_path / "talk.html").read_text(encoding="utf-8") == render(tmp_path)
+
+    # A linked page has nothing to patch but the sidecar
+    render(tmp_path, standalone=False)
+    data = edit([{"vttFile": "0.vtt", "captionIdx": "1", "text": "newer words"}])
+    assert data["updated"] == ["talk-timeline.json"]
+
+
+def test_concurrent_saves_each_reach_the_rendered_page(tmp_path: Path):
+    make_transcript(tmp_path)
+    render(tmp_path)
+    start = threading.Barrier(6)
+
+    def save(n, c):
+        start.wait()
+        save_caption_edits(tmp_path, "talk", [{"vttFile": f"{n}.vtt", "captionIdx": str(c), "text": f"saved {n}.{c}"}])
+
+    threads = [threading.Thread(target=save, args=(n, c)) for n in range(2) for c in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    patched = (tmp_path / "talk.html").read_text(encoding="utf-8")
+    assert all(f"saved {n}.{c}" in patched for n in range(2) for c in range(3))
+    assert patched == render(tmp_path)
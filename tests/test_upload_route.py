@@ -0,0 +1,143 @@
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+
+def make_module_with_temp_dir(tmpdir: Path, monkeypatch):
+    os.environ['SKIP_HF_STARTUP_CHECK'] = '1'
+    os.environ['TRANSCRIPTION_DIR'] = str(tmpdir)
+    if 'transcribe_with_whisper.server_app' in sys.modules:
+        del sys.modules['transcribe_with_whisper.server_app']
+    sys.path.insert(0, os.getcwd())
+    import importlib
+    mod = importlib.import_module('transcribe_with_whisper.server_app')
+    mod.TRANSCRIPTION_DIR = Path(tmpdir)
+    mod.app.mount('/files', mod.StaticFiles(directory=str(mod.TRANSCRIPTION_DIR)), name='files')
+    # Don't spawn the CLI; just record what would have run
+    started = []
+    monkeypatch.setattr(mod, '_prime_token_env', lambda: 'hf_test')
+    monkeypatch.setattr(mod, '_run_transcription_job', lambda *args: started.append(args))
+    monkeypatch.setattr(mod, '_get_audio_duration', lambda path: 12.5)
+    return mod, started
+
+
+def test_upload_streams_file_and_records_hash(tmp_path: Path, monkeypatch):
+    mod, started = make_module_with_temp_dir(tmp_path, monkeypatch)
+    client = TestClient(mod.app)
+    payload = os.urandom(3 * 1024 * 1024 + 17)
+    # A run on the same basename may be reading its audio cache: the upload leaves it alone
+    old_cache = tmp_path / 'talk' / 'talk.cache.wav'
+    old_cache.parent.mkdir()
+    old_cache.write_bytes(b'in use')
+
+    resp = client.post('/upload', files={'file': ('../talk.mp3', payload)}, follow_redirects=False)
+    assert resp.status_code == 303
+
+    dest = tmp_path / 'talk.mp3'
+    assert dest.read_bytes() == payload
+    job = mod.jobs[resp.headers['location'].rsplit('/', 1)[1]]
+    assert job['sha256'] == hashlib.sha256(payload).hexdigest()
+    assert job['file_duration'] == 12.5
+    assert not list((tmp_path / '.uploads').iterdir())
+    assert old_cache.read_bytes() == b'in use'
+
+
+def test_resumable_upload_resumes_from_server_offset(tmp_path: Path, monkeypatch):
+    mod, started = make_module_with_temp_dir(tmp_path, monkeypatch)
+    client = TestClient(mod.app)
+    payload = os.urandom(2500)
+
+    init = client.post('/api/uploads', json={'filename': 'meeting.wav', 'size': len(payload)}).json()
+    upload_id = init['upload_id']
+
+    assert client.put(f'/api/uploads/{upload_id}?offset=0', content=payload[:1000]).json()['offset'] == 1000
+    # Retrying a chunk that already landed reports where to resume instead of duplicating data
+    retry = client.put(f'/api/uploads/{upload_id}?offset=0', content=payload[:1000])
+    assert retry.status_code == 409 and retry.json()['offset'] == 1000
+
+    # Simulate a server restart losing the in-memory rolling hash
+    mod._upload_digests.clear()
+    offset = client.get(f'/api/uploads/{upload_id}').json()['offset']
+    client.put(f'/api/uploads/{upload_id}?offset={offset}', content=payload[offset:])
+
+    done = client.post(f'/api/uploads/{upload_id}/complete', json={'num_speakers': '2'}).json()
+    assert done['success'] is True
+    assert done['sha256'] == hashlib.sha256(payload).hexdigest()
+    assert (tmp_path / 'meeting.wav').read_bytes() == payload
+    deadline = time.time() + 2
+    while not started and time.time() < deadline:
+        time.sleep(0.01)
+    assert started and started[0][1] == 'meeting.wav' and started[0][3] == 2
+
+
+def test_upload_form_preset_is_passed_to_the_cli(tmp_path: Path, monkeypatch):
+    mod, started = make_module_with_temp_dir(tmp_path, monkeypatch)
+    client = TestClient(mod.app)
+    assert '<option value="draft">' in mod.INDEX_HTML
+
+    resp = client.post('/upload', files={'file': ('memo.mp3', b'media')}, data={'preset': 'draft'},
+                       follow_redirects=False)
+    assert resp.status_code == 303
+    assert started[0][6:] == ('draft', False)
+    assert mod.jobs[started[0][0]]['preset'] == 'draft'
+    assert mod._build_cli_cmd('memo.mp3', preset='draft')[-3:] == ['--preset', 'draft', 'memo.mp3']
+
+    bad = client.post('/upload', files={'file': ('memo2.mp3', b'media')}, data={'preset': 'turbo'})
+    assert bad.status_code == 400 and 'Unknown preset' in bad.text
+
+
+def test_concurrent_chunks_at_one_offset_are_appended_once(tmp_path: Path, monkeypatch):
+    mod, started = make_module_with_temp_dir(tmp_path, monkeypatch)
+    payload = os.urandom(4000)
+
+    async def upload():
+        transport = httpx.ASGITransport(app=mod.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+            init = (await client.post('/api/uploads', json={'filename': 'race.wav', 'size': 4000})).json()
+            url = f"/api/uploads/{init['upload_id']}?offset=0"
+            # The same chunk sent twice at once (a client retrying before the first reply)
+            return init['upload_id'], await asyncio.gather(*(client.put(url, content=payload[:2000]) for _ in range(2)))
+
+    upload_id, replies = asyncio.run(upload())
+    assert sorted(r.status_code for r in replies) == [200, 409]
+    assert (tmp_path / '.uploads' / f'{upload_id}.part').read_bytes() == payload[:2000]
+
+
+def test_abandoned_upload_sessions_expire(tmp_path: Path, monkeypatch):
+    mod, started = make_module_with_temp_dir(tmp_path, monkeypatch)
+    client = TestClient(mod.app)
+    old = client.post('/api/uploads', json={'filename': 'old.wav', 'size': 10}).json()['upload_id']
+    client.put(f'/api/uploads/{old}?offset=0', content=b'12345')
+    uploads = tmp_path / '.uploads'
+    (uploads / 'left.mp3.abc.part').write_bytes(b'direct upload cut off')
+    week_ago = time.time() - 7 * 24 * 3600
+    for path in uploads.iterdir():
+        os.utime(path, (week_ago, week_ago))
+
+    new = client.post('/api/uploads', json={'filename': 'new.wav', 'size': 10}).json()['upload_id']
+    assert client.get(f'/api/uploads/{old}').status_code == 404
+    assert sorted(p.name for p in uploads.iterdir()) == [f'{new}.json', f'{new}.part']
+
+
+def test_rerun_keeps_the_previous_preset_unless_given_one(tmp_path: Path, monkeypatch):
+    from transcribe_with_whisper.journal import Journal
+    mod, started = make_module_with_temp_dir(tmp_path, monkeypatch)
+    client = TestClient(mod.app)
+    media = tmp_path / 'memo.mp3'
+    media.write_bytes(b'media')
+    (tmp_path / 'memo').mkdir()
+    Journal(tmp_path / 'memo', 'memo').begin(media, {'preset': 'draft'})
+
+    assert client.post('/rerun', data={'filename': 'memo.mp3'}, follow_redirects=False).status_code == 303
+    assert started[-1][6] == 'draft'
+    client.post('/rerun', data={'filename': 'memo.mp3', 'preset': 'accurate'}, follow_redirects=False)
+    assert started[-1][6] == 'accurate'
+    client.post('/rerun', data={'filename': 'memo.mp3', 'preset': ''}, follow_redirects=False)
+    assert started[-1][6] is None
+    assert client.post('/rerun', data={'filename': 'memo.mp3', 'preset': 'turbo'}).status_code == 400
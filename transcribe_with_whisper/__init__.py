@@ -4,6 +4,7 @@ import platform
 import shutil
 import subprocess
 import sys
+from contextlib import contextmanager
 
 REQUIRED_LIBS = [
     "pyannote.audio",
@@ -137,9 +138,30 @@ def run_preflight():
   print("✅ All checks passed!\n")
 
 
+_preflight_skip_depth = 0
+
+
+@contextmanager
+def preflight_skipped():
+  """Don't run the preflight checks for imports made inside this block.
+
+  For library use: importing the pipeline module would otherwise run the CLI's
+  preflight (which can exit). Unlike setting SKIP_PREFLIGHT_CHECKS, this leaves
+  the environment of the host program alone.
+  """
+  global _preflight_skip_depth
+  _preflight_skip_depth += 1
+  try:
+    yield
+  finally:
+    _preflight_skip_depth -= 1
+
+
 def should_run_preflight() -> bool:
   """Return True if preflight checks should run in this context."""
 
+  if _preflight_skip_depth:
+    return False
   if os.getenv("SKIP_PREFLIGHT_CHECKS"):
     return False
   if os.getenv("SKIP_HF_STARTUP_CHECK"):
@@ -272,5 +294,16 @@ def main():
     transcribe_video(inputfile, default_speakers)
 
 
+_LAZY_EXPORTS = {"Transcriber", "TranscriptionResult", "Turn", "Segment", "Word"}
+
+
+def __getattr__(name):
+  # The library API loads numpy/faster-whisper; only pay for it when it's used
+  if name in _LAZY_EXPORTS:
+    from transcribe_with_whisper import transcriber
+    return getattr(transcriber, name)
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
   main()
@@ -0,0 +1,230 @@
+"""Resident Whisper service that batches segments across concurrent jobs.
+
+Transcribing diarized segments one at a time leaves most of the model's
+throughput unused: each call decodes a single window of at most 30 seconds. An
+``AsrBatcher`` owns one model and one background thread. Any number of jobs (or
+``Transcriber`` calls) running on threads in the same process submit their
+segments, which are cut into ≤30 s windows and queued. The service thread runs
+whatever is pending as one batch (up to ``batch_size`` windows) as soon as the
+batch is full or the oldest window has waited ``max_latency`` seconds, then hands
+each job its own segments back through a Future.
+
+Decoding uses faster-whisper's batched pipeline (greedy/beam decoding without
+conditioning on previous text), so the text can differ slightly from the serial
+``WhisperModel.transcribe`` path.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import numpy as np
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import (BatchedInferencePipeline, Segment, TranscriptionOptions,
+                                       Word, get_compression_ratio, get_suppressed_tokens,
+                                       pad_or_trim, restore_speech_timestamps)
+from faster_whisper.vad import VadOptions, collect_chunks, get_speech_timestamps
+
+SAMPLE_RATE = 16000
+
+
+@dataclass
+class _Request:
+  future: Future
+  clip_timestamps: list[dict]
+  word_timestamps: bool
+  outputs: list = field(default_factory=list)
+  remaining: int = 0
+
+
+@dataclass
+class _Window:
+  request: _Request
+  index: int
+  features: np.ndarray
+  metadata: dict
+  queued_at: float
+
+
+class AsrBatcher:
+  """Collect windows from every caller into dynamic batches for one WhisperModel."""
+
+  def __init__(self,
+               model,
+               batch_size: int = 8,
+               max_latency: float = 0.05,
+               language: str = "en",
+               beam_size: int = 5,
+               vad_filter: bool = True):
+    self.model = model
+    self.batch_size = max(1, batch_size)
+    self.max_latency = max_latency
+    self.language = language
+    self.beam_size = beam_size
+    self.vad_filter = vad_filter
+    self.batches_run = 0
+    self.windows_run = 0
+    self._pipeline = BatchedInferencePipeline(model)
+    self._pending: deque[_Window] = deque()
+    self._cond = threading.Condition()
+    self._thread: threading.Thread | None = None
+    self._tokenizer = None
+    self._options: dict[bool, TranscriptionOptions] = {}
+
+  # -- caller side ---------------------------------------------------------------
+
+  def submit(self, audio: np.ndarray, word_timestamps: bool = False) -> Future:
+    """Queue 16 kHz mono samples; the Future resolves to a list of faster-whisper Segments."""
+    future: Future = Future()
+    audio = np.asarray(audio, dtype=np.float32)
+    chunk_length = self.model.feature_extractor.chunk_length
+    if self.vad_filter:
+      clips = get_speech_timestamps(
+          audio, VadOptions(max_speech_duration_s=chunk_length, min_silence_duration_ms=160))
+    else:
+      step = chunk_length * SAMPLE_RATE
+      clips = [{"start": s, "end": min(s + step, len(audio))} for s in range(0, len(audio), step)]
+    if not clips:
+      future.set_result([])
+      return future
+
+    # Feature extraction happens on the caller's thread, in parallel across jobs
+    audio_chunks, metadata = collect_chunks(audio, clips, max_duration=chunk_length)
+    request = _Request(future=future,
+                       clip_timestamps=clips,
+                       word_timestamps=word_timestamps,
+                       outputs=[None] * len(audio_chunks),
+                       remaining=len(audio_chunks))
+    now = time.monotonic()
+    windows = [
+        _Window(request, i, pad_or_trim(self.model.feature_extractor(chunk)[..., :-1]), meta, now)
+        for i, (chunk, meta) in enumerate(zip(audio_chunks, metadata))
+    ]
+    with self._cond:
+      self._pending.extend(windows)
+      self._ensure_thread()
+      self._cond.notify()
+    return future
+
+  def transcribe(self, audio: np.ndarray, word_timestamps: bool = False) -> list[Segment]:
+    return self.submit(audio, word_timestamps).result()
+
+  # -- service thread --------------------------------------------------------------
+
+  def _ensure_thread(self) -> None:
+    if self._thread is None or not self._thread.is_alive():
+      self._thread = threading.Thread(target=self._serve, name="asr-batcher", daemon=True)
+      self._thread.start()
+
+  def _next_batch(self) -> list[_Window]:
+    with self._cond:
+      while not self._pending:
+        self._cond.wait()
+      # Wait for a full batch, but never longer than max_latency past the oldest window
+      deadline = self._pending[0].queued_at + self.max_latency
+      while len(self._pending) < self.batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+          break
+        self._cond.wait(remaining)
+      # Only windows decoded with the same options can share a batch
+      key = self._pending[0].request.word_timestamps
+      batch, rest = [], deque()
+      while self._pending and len(batch) < self.batch_size:
+        window = self._pending.popleft()
+        (batch if window.request.word_timestamps == key else rest).append(window)
+      self._pending.extendleft(reversed(rest))
+      return batch
+
+  def _serve(self) -> None:
+    while True:
+      batch = self._next_batch()
+      try:
+        outputs = self._forward(np.stack([w.features for w in batch]), [w.metadata for w in batch],
+                                batch[0].request.word_timestamps)
+      except Exception as exc:
+        for request in {id(w.request): w.request for w in batch}.values():
+          if not request.future.done():
+            request.future.set_exception(exc)
+        continue
+      self.batches_run += 1
+      self.windows_run += len(batch)
+      for window, output in zip(batch, outputs):
+        request = window.request
+        if request.future.done():
+          continue
+        request.outputs[window.index] = output
+        request.remaining -= 1
+        if request.remaining == 0:
+          request.future.set_result(self._finish(request))
+
+  def _forward(self, features: np.ndarray, metadata: list[dict], word_timestamps: bool) -> list:
+    tokenizer = self._get_tokenizer()
+    self._pipeline.last_speech_timestamp = 0.0
+    return self._pipeline.forward(features, tokenizer, metadata, self._get_options(word_timestamps))
+
+  def _finish(self, request: _Request) -> list[Segment]:
+    segments = []
+    for output in request.outputs:
+      for seg in output:
+        words = None
+        if request.word_timestamps:
+          words = [Word(**w) for w in seg.get("words") or []]
+        segments.append(
+            Segment(id=len(segments) + 1,
+                    seek=seg.get("seek", 0),
+                    text=seg["text"],
+                    start=round(seg["start"], 3),
+                    end=round(seg["end"], 3),
+                    tokens=seg.get("tokens", []),
+                    avg_logprob=seg.get("avg_logprob", 0.0),
+                    compression_ratio=seg.get("compression_ratio",
+                                              get_compression_ratio(seg["text"])),
+                    no_speech_prob=seg.get("no_speech_prob", 0.0),
+                    words=words,
+                    temperature=0.0))
+    return list(restore_speech_timestamps(segments, request.clip_timestamps, SAMPLE_RATE))
+
+  def _get_tokenizer(self) -> Tokenizer:
+    if self._tokenizer is None:
+      self._tokenizer = Tokenizer(self.model.hf_tokenizer,
+                                  self.model.model.is_multilingual,
+                                  task="transcribe",
+                                  language=self.language)
+    return self._tokenizer
+
+  def _get_options(self, word_timestamps: bool) -> TranscriptionOptions:
+    if word_timestamps not in self._options:
+      self._options[word_timestamps] = TranscriptionOptions(
+          beam_size=self.beam_size,
+          best_of=5,
+          patience=1,
+          length_penalty=1,
+          repetition_penalty=1,
+          no_repeat_ngram_size=0,
+          log_prob_threshold=-1.0,
+          no_speech_threshold=0.6,
+          compression_ratio_threshold=2.4,
+          condition_on_previous_text=False,
+          prompt_reset_on_temperature=0.5,
+          temperatures=[0.0],
+          initial_prompt=None,
+          prefix=None,
+          suppress_blank=True,
+          suppress_tokens=get_suppressed_tokens(self._get_tokenizer(), [-1]),
+          # Keep timestamps so each window still yields caption-sized segments
+          without_timestamps=False,
+          max_initial_timestamp=0.0,
+          word_timestamps=word_timestamps,
+          prepend_punctuations="\"'“¿([{-",
+          append_punctuations="\"'.。,，!！?？:：”)]}、",
+          multilingual=False,
+          max_new_tokens=None,
+          clip_timestamps="0",
+          hallucination_silence_threshold=None,
+          hotwords=None,
+      )
+    return self._options[word_timestamps]
@@ -0,0 +1,126 @@
+"""Stylesheet, scripts and icon shared by every HTML transcript.
+
+The files live in ``transcribe_with_whisper/assets/`` (the favicon in the
+repository's ``branding/`` folder). A transcript either inlines them, so the
+page is a single file that works offline and can be shared as is, or links
+them by a content-hashed name such as ``/assets/transcript.3f9c2a1b7e.css``.
+The web server serves those with an immutable cache lifetime, so a library of
+transcripts stores and downloads the bytes once. A new release changes the
+hash and therefore the URL.
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+
+ASSET_DIR = Path(__file__).resolve().parent / "assets"
+ASSET_URL_PREFIX = "/assets/"
+_SOURCES = {
+    "transcript.css": ASSET_DIR / "transcript.css",
+    "transcript.js": ASSET_DIR / "transcript.js",
+    "viewer.js": ASSET_DIR / "viewer.js",
+    "favicon.png": ASSET_DIR.parent.parent / "branding" / "icon-square.png",
+}
+MEDIA_TYPES = {
+    ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8",
+    ".png": "image/png",
+}
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+_LINKED = re.compile(r'"' + re.escape(ASSET_URL_PREFIX) + r'([A-Za-z0-9_.-]+)"')
+
+
+@lru_cache(maxsize=None)
+def _load(name: str) -> tuple[bytes, str] | None:
+  """(content, hashed file name) for a logical asset name; None if it isn't installed."""
+  try:
+    data = _SOURCES[name].read_bytes()
+  except (KeyError, OSError):
+    return None
+  stem, dot, ext = name.rpartition(".")
+  return data, f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{dot}{ext}"
+
+
+def asset_text(name: str) -> str:
+  loaded = _load(name)
+  return loaded[0].decode("utf-8") if loaded else ""
+
+
+def asset_url(name: str) -> str | None:
+  loaded = _load(name)
+  return ASSET_URL_PREFIX + loaded[1] if loaded else None
+
+
+def asset_data_uri(name: str) -> str | None:
+  loaded = _load(name)
+  if not loaded:
+    return None
+  media_type = MEDIA_TYPES[Path(name).suffix].split(";")[0]
+  return f"data:{media_type};base64,{base64.b64encode(loaded[0]).decode('ascii')}"
+
+
+def logical_name(hashed: str) -> str:
+  """``transcript.3f9c2a1b7e.css`` -> ``transcript.css`` (unchanged if not hashed)."""
+  parts = hashed.split(".")
+  if len(parts) == 3 and re.fullmatch(r"[0-9a-f]{10}", parts[1]):
+    return f"{parts[0]}.{parts[2]}"
+  return hashed
+
+
+def resolve_asset(hashed: str) -> tuple[bytes, str, bool] | None:
+  """Content, media type and whether ``hashed`` names the current version.
+
+  A page written by an older release links an older hash; it still gets the
+  current file, but that response must not be cached as immutable.
+  """
+  name = logical_name(hashed)
+  loaded = _load(name)
+  if loaded is None:
+    return None
+  return loaded[0], MEDIA_TYPES[Path(name).suffix], loaded[1] == hashed
+
+
+def style_tag(standalone: bool) -> str:
+  if standalone:
+    return f"<style>\n{asset_text('transcript.css')}    </style>"
+  return f'<link rel="stylesheet" href="{asset_url("transcript.css")}">'
+
+
+def favicon_tag(standalone: bool) -> str:
+  href = asset_data_uri("favicon.png") if standalone else asset_url("favicon.png")
+  return f'<link rel="icon" type="image/png" href="{href}">' if href else ""
+
+
+def script_tag(name: str, standalone: bool) -> str:
+  if standalone:
+    return f"<script>\n{asset_text(name)}</script>"
+  return f'<script src="{asset_url(name)}"></script>'
+
+
+def json_script_tag(element_id: str, payload: str) -> str:
+  """Embed JSON in a page; ``</`` is escaped so the data can't end the script early."""
+  payload = payload.replace("</", "<\\/")
+  return f'<script type="application/json" id="{element_id}">{payload}</script>'
+
+
+def inline_assets(html: str) -> str:
+  """Turn a page that links shared assets into a single self-contained file."""
+
+  def inline(tag: re.Match) -> str:
+    url = _LINKED.search(tag.group(0))
+    name = logical_name(url.group(1)) if url else ""
+    if name not in _SOURCES:
+      return tag.group(0)
+    if tag.group(0).startswith("<script"):
+      return script_tag(name, True)
+    if name == "favicon.png":
+      return favicon_tag(True)
+    return style_tag(True)
+
+  pattern = (r'<link rel="(?:stylesheet|icon)"[^>]*href="' + re.escape(ASSET_URL_PREFIX) +
+             r'[^"]*"[^>]*>|<script src="' + re.escape(ASSET_URL_PREFIX) + r'[^"]*"></script>')
+  return re.sub(pattern, inline, html)
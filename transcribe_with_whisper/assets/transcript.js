@@ -0,0 +1,368 @@
+console.log('Loading video highlight script...');
+
+// Detect if viewing as local file and hide server-dependent buttons
+if (window.location.protocol === 'file:') {
+    console.log('Detected local file mode - hiding server-dependent buttons');
+    document.body.classList.add('local-file-mode');
+}
+
+function jumptoTime(time){
+    var v = document.getElementsByTagName('video')[0];
+    // Jump directly to the exact time (no offset)
+    if (v) {
+        v.currentTime = time;
+    }
+}
+
+// Segment start times in page order, written by the generator, so the segment
+// playing at any moment is a binary search away instead of a scan of the page
+var cueStarts = null;
+var cueSegments = null;
+var currentHighlighted = -1;
+
+function loadCues() {
+    var data = document.getElementById('cue-starts');
+    cueStarts = data ? JSON.parse(data.textContent) : [];
+    cueSegments = document.querySelectorAll('.transcript-segment');
+}
+
+// Index of the last segment starting at or before time (-1 before the first)
+function cueAt(time) {
+    var lo = 0, hi = Math.min(cueStarts.length, cueSegments.length);
+    while (lo < hi) {
+        var mid = (lo + hi) >> 1;
+        if (cueStarts[mid] <= time) lo = mid + 1; else hi = mid;
+    }
+    return lo - 1;
+}
+
+function highlightCurrentSegment() {
+    var v = document.getElementsByTagName('video')[0];
+    if (!v) return;
+    if (cueStarts === null) loadCues();
+
+    var index = cueAt(v.currentTime);
+    if (index === currentHighlighted) return;
+    if (currentHighlighted >= 0) {
+        cueSegments[currentHighlighted].classList.remove('current');
+    }
+    currentHighlighted = index;
+    if (index >= 0) {
+        var segment = cueSegments[index];
+        segment.classList.add('current');
+        // Scroll to keep current segment visible
+        segment.scrollIntoView({
+            behavior: 'smooth',
+            block: 'center'
+        });
+    }
+}
+
+// Initialize when DOM is ready
+function initializeVideoTracking() {
+    console.log('Initializing video tracking...');
+    var v = document.getElementsByTagName('video')[0];
+    if (v && window.transcriptViewer) {
+        window.transcriptViewer.track(v);
+    } else if (v) {
+        console.log('Video found, adding event listeners');
+        // Update highlighting as video plays
+        v.addEventListener('timeupdate', highlightCurrentSegment);
+
+        // Also update when user seeks
+        v.addEventListener('seeked', highlightCurrentSegment);
+
+        // Initial highlight check
+        setTimeout(highlightCurrentSegment, 100);
+    } else {
+        console.log('Video not found, retrying in 500ms');
+        setTimeout(initializeVideoTracking, 500);
+    }
+}
+
+// Edit mode functionality
+let editMode = false;
+let originalContent = {};
+
+function toggleEditMode() {
+    editMode = !editMode;
+    const editButton = document.querySelector('#edit-mode-btn');
+    const saveButton = document.querySelector('#save-btn');
+    const cancelButton = document.querySelector('#cancel-btn');
+    const body = document.body;
+    const segments = document.querySelectorAll('.transcript-segment');
+
+    if (editMode) {
+        // Enter edit mode
+        body.classList.add('editing');
+        editButton.textContent = '📝 Editing...';
+        // Let CSS control button visibility in edit mode
+        saveButton.style.display = 'inline-block';
+        // Intentionally keep cancel hidden; only Save should show while editing
+
+        // Store original content and make segments editable
+        segments.forEach(segment => {
+            // Store only the transcript text content, not timestamp/speaker
+            const transcriptTextSpan = segment.querySelector('.transcript-text');
+            originalContent[segment.dataset.start] = transcriptTextSpan ? transcriptTextSpan.textContent : '';
+
+            // Make only the transcript-text span editable, not the whole segment
+            const textSpan = segment.querySelector('.transcript-text');
+            if (textSpan) {
+                textSpan.contentEditable = true;
+            }
+            segment.classList.add('editable');
+        });
+    } else {
+        // Exit edit mode
+        body.classList.remove('editing');
+        editButton.textContent = '📝 Edit Mode';
+        saveButton.style.display = 'none';
+        // Keep cancel hidden
+
+        // Make segments non-editable
+        segments.forEach(segment => {
+            const textSpan = segment.querySelector('.transcript-text');
+            if (textSpan) {
+                textSpan.contentEditable = false;
+            }
+            segment.classList.remove('editable');
+        });
+
+        originalContent = {};
+    }
+    if (window.transcriptViewer) {
+        window.transcriptViewer.setEditing(editMode);
+    }
+}
+
+function saveChanges() {
+    const segments = window.transcriptViewer ? [] : document.querySelectorAll('.transcript-segment');
+    const changes = window.transcriptViewer ? window.transcriptViewer.changes() : [];
+
+    segments.forEach(segment => {
+        const start = segment.dataset.start;
+        const end = segment.dataset.end;
+        const speaker = segment.dataset.speaker || '';
+        const vttFile = segment.dataset.vttFile || '';
+        const vttStart = segment.dataset.vttStart || '';
+        const vttEnd = segment.dataset.vttEnd || '';
+        const captionIdx = segment.dataset.captionIdx || '';
+
+        // Extract only the text from the transcript-text span, not the timestamp and speaker
+        const transcriptTextSpan = segment.querySelector('.transcript-text');
+        const newText = transcriptTextSpan ? transcriptTextSpan.textContent.trim() : '';
+        const originalText = originalContent[start] || '';
+
+        if (newText !== originalText) {
+            changes.push({
+                // absolute timings are still included for UI uses, but server will rely on VTT-local hints
+                start: start,
+                end: end,
+                speaker: speaker,
+                text: newText,
+                originalText: originalText,
+                vttFile: vttFile,
+                vttStart: vttStart,
+                vttEnd: vttEnd,
+                captionIdx: captionIdx
+            });
+        }
+    });
+
+    if (changes.length === 0) {
+        alert('No changes detected.');
+        toggleEditMode();
+        return;
+    }
+
+    // Send changes to server
+    const videoFile = window.location.pathname.split('/').pop().replace('.html', '');
+
+    fetch(`/save_transcript_edits/${videoFile}`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ changes: changes })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            if (window.transcriptViewer) {
+                window.transcriptViewer.commit();
+            }
+            const updated = data.updated || [];
+            if (updated.some(name => name.endsWith('.html') || name.endsWith('-timeline.json'))) {
+                // The server patched the page (and exports) with the new text
+                alert('Changes saved.');
+            } else {
+                alert('Changes saved to VTT files! To see your changes in the HTML, click "Reprocess".');
+            }
+            toggleEditMode(); // Exit edit mode
+        } else {
+            alert('Error saving changes: ' + (data.error || 'Unknown error'));
+        }
+    })
+    .catch(error => {
+        console.error('Error saving changes:', error);
+        alert('Error saving changes: ' + error.message);
+    });
+}
+
+function cancelEdits() {
+    if (confirm('Are you sure you want to cancel all edits?')) {
+        const segments = document.querySelectorAll('.transcript-segment');
+
+        // Restore original content
+        segments.forEach(segment => {
+            const start = segment.dataset.start;
+            if (originalContent[start]) {
+                const textSpan = segment.querySelector('.transcript-text');
+                if (textSpan) {
+                    textSpan.textContent = originalContent[start];
+                }
+            }
+        });
+        if (window.transcriptViewer) {
+            window.transcriptViewer.discard();
+        }
+
+        toggleEditMode();
+    }
+}
+
+function reprocessFile() {
+    if (confirm('This will reprocess the current video file. This may take several minutes. Continue?')) {
+        // Extract filename from current URL or use a data attribute
+        const videoElement = document.querySelector('video source');
+        if (videoElement) {
+            const videoSrc = videoElement.src;
+            const filename = videoSrc.substring(videoSrc.lastIndexOf('/') + 1);
+
+            // Create a form and submit it like the working version on the main page
+            const form = document.createElement('form');
+            form.method = 'post';
+            form.action = '/rerun';
+
+            const input = document.createElement('input');
+            input.type = 'hidden';
+            input.name = 'filename';
+            input.value = filename;
+
+            form.appendChild(input);
+            document.body.appendChild(form);
+            form.submit();
+        } else {
+            alert('Could not determine video filename');
+        }
+    }
+}
+
+function goBackToList() {
+    window.location.href = '/list';
+}
+
+function editSpeakers() {
+    // Extract current speakers from the page
+    // The virtual viewer only has the visible turns in the DOM; it knows all the speakers
+    const speakerBlocks = window.transcriptViewer ? [] : document.querySelectorAll('.e[data-speaker-id]');
+    const speakers = window.transcriptViewer ? window.transcriptViewer.speakerNames() : [];
+    const seenSpeakerIds = new Set();
+
+    speakerBlocks.forEach(block => {
+        const speakerId = block.dataset.speakerId;
+        if (!speakerId || seenSpeakerIds.has(speakerId)) {
+            return;
+        }
+        seenSpeakerIds.add(speakerId);
+        const speakerName = (block.dataset.speakerName || speakerId).trim();
+        if (speakerName) {
+            speakers.push(speakerName);
+        }
+    });
+
+    if (speakers.length === 0) {
+        alert('No speakers found in transcript');
+        return;
+    }
+
+    // Create a simple dialog for editing speaker names
+    let dialogContent = 'Edit Speaker Names:\n\n';
+    const newNames = [];
+
+    for (let i = 0; i < speakers.length; i++) {
+        const currentName = speakers[i];
+        const newName = prompt(dialogContent + `Speaker ${i+1} (currently "${currentName}"):`);
+
+        if (newName === null) {
+            // User cancelled
+            return;
+        }
+
+        newNames.push(newName.trim() || currentName);
+        dialogContent += `Speaker ${i+1}: "${newNames[i]}"\n`;
+    }
+
+    // Show confirmation
+    const confirmed = confirm(
+        'Update speakers with these names?\n\n' + 
+        speakers.map((old, i) => `"${old}" → "${newNames[i]}"`).join('\n') +
+        '\n\nThis will reprocess the file with updated speaker names.'
+    );
+
+    if (confirmed) {
+        updateSpeakersAndReprocess(speakers, newNames);
+    }
+}
+
+function updateSpeakersAndReprocess(oldNames, newNames) {
+    const videoElement = document.querySelector('video source');
+    if (!videoElement) {
+        alert('Could not determine video filename');
+        return;
+    }
+
+    const videoSrc = videoElement.src;
+    const filename = videoSrc.substring(videoSrc.lastIndexOf('/') + 1);
+    const basename = filename.replace(/\.[^/.]+$/, ""); // Remove extension
+
+    // Create speaker mapping
+    const speakerMapping = {};
+    for (let i = 0; i < oldNames.length; i++) {
+        speakerMapping[oldNames[i]] = newNames[i];
+    }
+
+    // Send update request
+    fetch('/update-speakers', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            filename: basename,
+            speakers: speakerMapping
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Speaker names updated! Reprocessing file...');
+            // Now reprocess with updated speakers
+            reprocessFile();
+        } else {
+            alert('Error updating speakers: ' + (data.message || 'Unknown error'));
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error updating speakers: ' + error.message);
+    });
+}
+
+// Start initialization when DOM loads
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initializeVideoTracking);
+} else {
+    initializeVideoTracking();
+}
@@ -0,0 +1,261 @@
+// Virtualised transcript: captions come from the timeline (embedded in a standalone
+// page, else through the server's /api/timeline or the sidecar file) in blocks,
+// and only the blocks near the viewport are in the DOM. Everything else is an
+// empty placeholder of the block's last measured (or estimated) height.
+window.transcriptViewer = (function() {
+    var root = document.getElementById('transcript');
+    var BLOCK = 100;
+    var api = '/api/timeline/' + encodeURIComponent(root.dataset.basename);
+    var local = null;      // the whole sidecar when there is no server API
+    var starts = [];
+    var speakers = {};
+    var speakerList = [];
+    var blocks = [];
+    var loaded = {};       // block -> rows with their saved text
+    var edits = {};        // caption index -> edited text not saved yet
+    var rowHeight = 30;
+    var measured = false;
+    var current = -1;
+    var reveal = -1;
+    var editing = false;
+    var showSection = metaFlag('speaker-section');
+    var showInline = metaFlag('speaker-inline');
+
+    function metaFlag(name) {
+        var m = document.querySelector('meta[name="' + name + '"]');
+        return !m || m.content !== 'false';
+    }
+    function esc(s) {
+        return String(s).replace(/[&<>"']/g, function(c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+    function stamp(t) {
+        var s = (t % 60).toFixed(1);
+        var m = Math.floor((t % 3600) / 60);
+        return Math.floor(t / 3600) + ':' + (m < 10 ? '0' : '') + m + ':' + (s.length < 4 ? '0' : '') + s;
+    }
+    function getJSON(url) {
+        return fetch(url).then(function(r) {
+            if (!r.ok) throw new Error('HTTP ' + r.status);
+            return r.json();
+        });
+    }
+    function localRows(lo, hi) {
+        var c = local.captions, t = local.turns, rows = [];
+        for (var i = lo; i < Math.min(hi, c.start.length); i++) {
+            var turn = c.turn[i];
+            rows.push({i: i, start: c.start[i], end: c.end[i], turn: turn,
+                       speaker: local.speakers[t.speaker[turn]].id, vtt_file: t.vtt[turn],
+                       vtt_start: c.vtt_start[i], vtt_end: c.vtt_end[i],
+                       caption_idx: i - t.first[turn], text: c.text[i]});
+        }
+        return rows;
+    }
+    function useLocal(tl) {
+        local = tl;
+        // Overlapping turns can start a caption before the one above it; the
+        // search column is the earliest start from each caption on (never decreasing)
+        var seek = tl.search ? tl.search.start : tl.captions.start.slice();
+        if (!tl.search) {
+            for (var i = seek.length - 2; i >= 0; i--) seek[i] = Math.min(seek[i], seek[i + 1]);
+        }
+        return {speakers: tl.speakers, count: tl.captions.start.length, starts: seek};
+    }
+    function loadIndex() {
+        // A standalone page carries the timeline itself
+        var embedded = document.getElementById('timeline-data');
+        if (embedded) return Promise.resolve(useLocal(JSON.parse(embedded.textContent)));
+        var fromApi = window.location.protocol === 'file:' ? Promise.reject() : getJSON(api);
+        return fromApi.catch(function() {
+            // Served as plain files: read the sidecar itself and slice it here
+            return getJSON(root.dataset.timeline).then(useLocal);
+        });
+    }
+    function loadRows(b) {
+        if (loaded[b]) return Promise.resolve(loaded[b]);
+        var lo = b * BLOCK;
+        var rows = local ? Promise.resolve(localRows(lo, lo + BLOCK))
+                         : getJSON(api + '?offset=' + lo + '&limit=' + BLOCK).then(function(d) { return d.captions; });
+        return rows.then(function(r) { loaded[b] = r; return r; });
+    }
+    function savedRow(i) {
+        var rows = loaded[Math.floor(i / BLOCK)];
+        return rows ? rows[i % BLOCK] : null;
+    }
+    function renderRows(rows) {
+        var html = [], turn = null;
+        rows.forEach(function(r) {
+            var who = speakers[r.speaker] || {name: r.speaker, bg: 'white', fg: 'orange'};
+            if (r.turn !== turn) {
+                if (turn !== null) html.push('</div>');
+                turn = r.turn;
+                html.push('<div class="e" data-speaker-id="' + esc(r.speaker) + '" data-speaker-name="' +
+                          esc(who.name) + '" style="background-color:' + esc(who.bg) + '">');
+                if (showSection && r.caption_idx === 0) {
+                    html.push('<span style="color:' + esc(who.fg) + '">' + esc(who.name) + '</span><br>');
+                }
+            }
+            var text = r.i in edits ? edits[r.i] : r.text;
+            html.push('<div class="transcript-segment' + (r.i === current ? ' current' : '') +
+                      '" data-index="' + r.i + '" data-start="' + r.start + '" data-end="' + r.end +
+                      '" data-speaker="' + esc(who.name) + '" data-vtt-file="' + esc(r.vtt_file) +
+                      '" data-vtt-start="' + r.vtt_start + '" data-vtt-end="' + r.vtt_end +
+                      '" data-caption-idx="' + r.caption_idx + '">' +
+                      (showInline ? '<span class="speaker-name">' + esc(who.name) + ': </span>' : '') +
+                      '<span class="timestamp">[' + stamp(r.start) + '] </span>' +
+                      '<span class="transcript-text"><a href="#" class="lt" onclick="jumptoTime(' + r.start +
+                      '); return false;">' + esc(text) + '</a></span></div>');
+        });
+        if (turn !== null) html.push('</div>');
+        return html.join('');
+    }
+    function estimate(el) {
+        var b = +el.dataset.block;
+        return Math.min(BLOCK, starts.length - b * BLOCK) * rowHeight;
+    }
+    function setEditable(el, on) {
+        el.querySelectorAll('.transcript-segment').forEach(function(seg) {
+            var span = seg.querySelector('.transcript-text');
+            if (span) span.contentEditable = on;
+            seg.classList.toggle('editable', on);
+        });
+    }
+    function keepEdits(el) {
+        el.querySelectorAll('.transcript-segment').forEach(function(seg) {
+            var i = +seg.dataset.index, row = savedRow(i);
+            var span = seg.querySelector('.transcript-text');
+            if (!row || !span) return;
+            var text = span.textContent.trim();
+            if (text !== row.text.trim()) edits[i] = text; else delete edits[i];
+        });
+    }
+    function show(el) {
+        if (el.dataset.state) return;
+        el.dataset.state = 'loading';
+        loadRows(+el.dataset.block).then(function(rows) {
+            if (el.dataset.state !== 'loading') return;
+            el.innerHTML = renderRows(rows);
+            el.dataset.state = 'shown';
+            el.style.minHeight = '';
+            if (!measured && rows.length) {
+                measured = true;
+                rowHeight = el.offsetHeight / rows.length;
+                blocks.forEach(function(other) {
+                    if (!other.dataset.state) other.style.minHeight = estimate(other) + 'px';
+                });
+            }
+            if (editing) setEditable(el, true);
+            if (reveal >= 0 && Math.floor(reveal / BLOCK) === +el.dataset.block) {
+                var seg = el.querySelector('[data-index="' + reveal + '"]');
+                reveal = -1;
+                if (seg) seg.scrollIntoView({block: 'center'});
+            }
+        });
+    }
+    function hide(el) {
+        if (el.dataset.state === 'shown') {
+            if (editing) keepEdits(el);
+            el.style.minHeight = el.offsetHeight + 'px';
+            el.innerHTML = '';
+        }
+        delete el.dataset.state;
+    }
+    function rerender() {
+        blocks.forEach(function(el) {
+            if (el.dataset.state === 'shown') {
+                el.innerHTML = renderRows(loaded[+el.dataset.block]);
+                if (editing) setEditable(el, true);
+            }
+        });
+    }
+    function captionAt(t) {
+        // The last caption (in transcript order) to have started by t
+        var lo = 0, hi = starts.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (starts[mid] <= t) lo = mid + 1; else hi = mid;
+        }
+        return lo - 1;
+    }
+    function highlight(t) {
+        var i = captionAt(t);
+        if (i === current) return;
+        var old = root.querySelector('.transcript-segment.current');
+        if (old) old.classList.remove('current');
+        current = i;
+        if (i < 0) return;
+        var el = blocks[Math.floor(i / BLOCK)];
+        var seg = el.dataset.state === 'shown' && el.querySelector('[data-index="' + i + '"]');
+        if (seg) {
+            seg.classList.add('current');
+            seg.scrollIntoView({behavior: 'smooth', block: 'center'});
+        } else {
+            reveal = i;
+            el.scrollIntoView({block: 'start'});
+            show(el);
+        }
+    }
+
+    loadIndex().then(function(index) {
+        starts = index.starts;
+        speakerList = index.speakers;
+        speakerList.forEach(function(s) { speakers[s.id] = s; });
+        var observer = new IntersectionObserver(function(entries) {
+            entries.forEach(function(e) {
+                if (e.isIntersecting) show(e.target); else hide(e.target);
+            });
+        }, {rootMargin: '1500px 0px'});
+        for (var b = 0; b * BLOCK < index.count; b++) {
+            var el = document.createElement('div');
+            el.className = 'tl-block';
+            el.dataset.block = b;
+            el.style.minHeight = estimate(el) + 'px';
+            root.appendChild(el);
+            blocks.push(el);
+            observer.observe(el);
+        }
+    }).catch(function(err) {
+        root.textContent = 'The transcript could not be loaded (' + err + '). Open it through the ' +
+            'transcription server, or keep ' + root.dataset.timeline + ' next to this page.';
+    });
+
+    return {
+        track: function(video) {
+            var update = function() { highlight(video.currentTime); };
+            video.addEventListener('timeupdate', update);
+            video.addEventListener('seeked', update);
+        },
+        setEditing: function(on) {
+            editing = on;
+            blocks.forEach(function(el) {
+                if (el.dataset.state === 'shown') setEditable(el, on);
+            });
+        },
+        // Edits across the whole transcript, including blocks scrolled out of view
+        changes: function() {
+            blocks.forEach(function(el) {
+                if (el.dataset.state === 'shown') keepEdits(el);
+            });
+            return Object.keys(edits).map(function(key) {
+                var row = savedRow(+key);
+                var who = speakers[row.speaker] || {name: row.speaker};
+                return {start: String(row.start), end: String(row.end), speaker: who.name,
+                        text: edits[key], originalText: row.text, vttFile: row.vtt_file,
+                        vttStart: String(row.vtt_start), vttEnd: String(row.vtt_end),
+                        captionIdx: String(row.caption_idx)};
+            });
+        },
+        commit: function() {
+            Object.keys(edits).forEach(function(key) { savedRow(+key).text = edits[key]; });
+            edits = {};
+        },
+        discard: function() {
+            edits = {};
+            rerender();
+        },
+        speakerNames: function() {
+            return speakerList.map(function(s) { return s.name; });
+        }
+    };
+})();
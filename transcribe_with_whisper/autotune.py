@@ -0,0 +1,213 @@
+"""Find the fastest Whisper settings for this machine and remember them.
+
+``transcribe-with-whisper-autotune reference.wav`` transcribes the first minute of a
+reference recording with every combination of compute type, beam size and CPU
+thread count, measures the real-time factor (processing time / audio duration)
+and compares each transcript with the most accurate configuration (float32,
+largest beam). The fastest combination whose word error rate against that
+baseline stays under ``--max-wer`` is saved as a per-host profile.
+
+The CLI, the web server's jobs and ``Transcriber`` load the profile
+automatically: it supplies the compute type when ``auto`` was requested, the
+beam size, and the thread count when no explicit budget (``--cpu-threads`` /
+``WHISPER_CPU_THREADS``) is set. ``WHISPER_AUTOTUNE=0`` ignores it and
+``WHISPER_PROFILE`` points at a different file.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import socket
+import time
+from pathlib import Path
+
+from transcribe_with_whisper.cpu_budget import available_cores
+
+PROFILE_VERSION = 1
+SAMPLE_RATE = 16000
+DEFAULT_COMPUTE_TYPES = ("int8", "int8_float32", "float32")
+DEFAULT_BEAM_SIZES = (1, 2, 5)
+# Settings a profile may supply, as passed to create_whisper_model / transcribe
+TUNED_KEYS = ("compute_type", "cpu_threads", "beam_size")
+
+
+def profile_path() -> Path:
+  """Where this host's profile lives (named per host, so a shared home directory works)."""
+  override = os.getenv("WHISPER_PROFILE", "").strip()
+  if override:
+    return Path(override).expanduser()
+  return (Path.home() / ".config" / "transcribe-with-whisper" /
+          f"whisper-profile-{socket.gethostname()}.json")
+
+
+def load_profile(model_size: str) -> dict:
+  """Return the tuned settings for model_size on this host ({} when not tuned)."""
+  if os.getenv("WHISPER_AUTOTUNE", "1") == "0":
+    return {}
+  try:
+    data = json.loads(profile_path().read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+    return {}
+  if not isinstance(data, dict) or data.get("version") != PROFILE_VERSION:
+    return {}
+  tuned = (data.get("models") or {}).get(model_size) or {}
+  return {k: tuned[k] for k in TUNED_KEYS if tuned.get(k) is not None}
+
+
+def save_profile(model_size: str, settings: dict, path: Path | None = None) -> Path:
+  path = Path(path) if path is not None else profile_path()
+  try:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != PROFILE_VERSION:
+      raise ValueError
+  except (OSError, ValueError, AttributeError):
+    data = {"version": PROFILE_VERSION, "models": {}}
+  data["host"] = socket.gethostname()
+  data.setdefault("models", {})[model_size] = {**settings, "tuned_at": time.time()}
+  path.parent.mkdir(parents=True, exist_ok=True)
+  tmp = path.with_name(path.name + ".tmp")
+  tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+  os.replace(tmp, path)
+  return path
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+  """Word-level edit distance divided by the reference length."""
+  ref, hyp = reference.lower().split(), hypothesis.lower().split()
+  if not ref:
+    return 0.0 if not hyp else 1.0
+  previous = list(range(len(hyp) + 1))
+  for i, r in enumerate(ref, start=1):
+    current = [i] + [0] * len(hyp)
+    for j, h in enumerate(hyp, start=1):
+      current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+    previous = current
+  return previous[-1] / len(ref)
+
+
+def default_thread_counts() -> list[int]:
+  cores = len(available_cores())
+  return sorted({max(1, cores // 4), max(1, cores // 2), cores})
+
+
+def _run_trial(model, audio, beam_size: int, language: str) -> tuple[str, float]:
+  start = time.perf_counter()
+  segments, _ = model.transcribe(audio, language=language, beam_size=beam_size)
+  text = " ".join(s.text.strip() for s in segments)  # segments is lazy: decoding happens here
+  return text, time.perf_counter() - start
+
+
+def calibrate(audio,
+              model_size: str = "base",
+              device: str = "auto",
+              compute_types=DEFAULT_COMPUTE_TYPES,
+              beam_sizes=DEFAULT_BEAM_SIZES,
+              thread_counts=None,
+              max_wer: float = 0.05,
+              language: str = "en",
+              load_model=None,
+              log=print) -> dict:
+  """Time every combination on 16 kHz mono samples and return the chosen settings.
+
+  The result has the TUNED_KEYS plus ``rtf``, ``wer`` and a ``trials`` list.
+  load_model(model_size, device, compute_type, cpu_threads) defaults to
+  ``create_whisper_model``.
+  """
+  if load_model is None:
+    pipeline = importlib.import_module("transcribe_with_whisper.main")
+
+    def load_model(size, dev, compute_type, cpu_threads):
+      return pipeline.create_whisper_model(size,
+                                           device=dev,
+                                           compute_type=compute_type,
+                                           cpu_threads=cpu_threads)
+
+  duration = len(audio) / SAMPLE_RATE
+  if duration <= 0:
+    raise ValueError("The reference audio is empty")
+  thread_counts = list(thread_counts or default_thread_counts())
+  beam_sizes = sorted(set(beam_sizes), reverse=True)
+  # Most accurate first, so its transcript is the baseline the others are judged by
+  compute_types = sorted(compute_types, key=lambda c: c != "float32")
+
+  trials, baseline = [], None
+  for compute_type in compute_types:
+    for threads in thread_counts:
+      try:
+        model = load_model(model_size, device, compute_type, threads)
+      except Exception as exc:
+        log(f"  {compute_type:>13} threads={threads:<3} unsupported here ({exc})")
+        break
+      # Warm-up: the first call pays for allocations and kernel selection
+      _run_trial(model, audio[:SAMPLE_RATE * 5], 1, language)
+      for beam_size in beam_sizes:
+        text, elapsed = _run_trial(model, audio, beam_size, language)
+        if baseline is None:
+          baseline = text
+        trial = {
+            "compute_type": compute_type,
+            "cpu_threads": threads,
+            "beam_size": beam_size,
+            "rtf": round(elapsed / duration, 4),
+            "wer": round(word_error_rate(baseline, text), 4),
+        }
+        trials.append(trial)
+        log(f"  {compute_type:>13} threads={threads:<3} beam={beam_size:<2} "
+            f"RTF={trial['rtf']:.3f} WER={trial['wer']:.3f}")
+      del model
+
+  accepted = [t for t in trials if t["wer"] <= max_wer]
+  if not accepted:
+    raise RuntimeError("No configuration could be measured")
+  best = min(accepted, key=lambda t: (t["rtf"], t["wer"]))
+  return {**best, "trials": trials}
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(
+      description="Benchmark Whisper settings on a reference recording and save the fastest "
+      "accurate combination as this host's profile")
+  parser.add_argument("reference", help="Audio or video file with typical speech")
+  parser.add_argument("--model", default="base", help="Whisper model size (default: base)")
+  parser.add_argument("--device", default="auto")
+  parser.add_argument("--seconds",
+                      type=float,
+                      default=60.0,
+                      help="How much of the reference to use (default: 60)")
+  parser.add_argument("--compute-types", default=",".join(DEFAULT_COMPUTE_TYPES))
+  parser.add_argument("--beam-sizes", default=",".join(map(str, DEFAULT_BEAM_SIZES)))
+  parser.add_argument("--threads",
+                      help="Comma-separated CPU thread counts (default: a quarter, half and all "
+                      "of the available cores)")
+  parser.add_argument("--max-wer",
+                      type=float,
+                      default=0.05,
+                      help="Largest word error rate against the most accurate setting to accept "
+                      "(default: 0.05)")
+  parser.add_argument("--profile", help="Profile file to write (default: per-host file in "
+                      "~/.config/transcribe-with-whisper)")
+  args = parser.parse_args()
+
+  from faster_whisper import decode_audio
+
+  audio = decode_audio(args.reference, sampling_rate=SAMPLE_RATE)[:int(args.seconds * SAMPLE_RATE)]
+  print(f"Calibrating '{args.model}' on {len(audio) / SAMPLE_RATE:.0f}s of {args.reference}")
+  os.environ["WHISPER_AUTOTUNE"] = "0"  # measure the candidates, not an older profile
+  result = calibrate(audio,
+                     model_size=args.model,
+                     device=args.device,
+                     compute_types=[c.strip() for c in args.compute_types.split(",") if c.strip()],
+                     beam_sizes=[int(b) for b in args.beam_sizes.split(",") if b.strip()],
+                     thread_counts=[int(t) for t in args.threads.split(",")] if args.threads else None,
+                     max_wer=args.max_wer)
+  settings = {k: result[k] for k in TUNED_KEYS + ("rtf", "wer")}
+  path = save_profile(args.model, settings, args.profile)
+  print(f"Best: compute_type={result['compute_type']} cpu_threads={result['cpu_threads']} "
+        f"beam_size={result['beam_size']} (RTF {result['rtf']:.3f}, WER {result['wer']:.3f})")
+  print(f"Saved profile to {path}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,104 @@
+"""Split the machine's cores between concurrently running transcription jobs.
+
+Left alone, every job's CTranslate2, PyTorch and OpenMP thread pools size
+themselves to the whole machine, so two or three parallel jobs oversubscribe
+the CPU and each runs slower than it would alone. With N job slots the usable
+cores (``os.sched_getaffinity``) are divided into N disjoint sets; each CLI run
+is pinned to its set and told to use exactly that many threads.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+
+# Variables read by the OpenMP / BLAS runtimes that torch, numpy and CTranslate2 link
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def available_cores() -> list[int]:
+  """Cores this process may run on (respects cgroup/taskset limits where supported)."""
+  if hasattr(os, "sched_getaffinity"):
+    return sorted(os.sched_getaffinity(0))
+  return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(slots: int, cores: list[int] | None = None) -> list[list[int]]:
+  """Divide cores into ``slots`` contiguous, near-equal sets.
+
+  With more slots than cores, slots share cores round-robin (one core each).
+  """
+  cores = list(cores if cores is not None else available_cores())
+  slots = max(1, slots)
+  if slots >= len(cores):
+    return [[cores[i % len(cores)]] for i in range(slots)]
+  size, extra = divmod(len(cores), slots)
+  sets, start = [], 0
+  for i in range(slots):
+    end = start + size + (1 if i < extra else 0)
+    sets.append(cores[start:end])
+    start = end
+  return sets
+
+
+def parse_cores(spec: str) -> list[int]:
+  """Parse a taskset-style list such as ``"0-3,8,10-11"``."""
+  cores: list[int] = []
+  for part in spec.split(","):
+    part = part.strip()
+    if not part:
+      continue
+    if "-" in part:
+      first, last = part.split("-", 1)
+      cores.extend(range(int(first), int(last) + 1))
+    else:
+      cores.append(int(part))
+  if not cores:
+    raise ValueError(f"No cores in {spec!r}")
+  return sorted(set(cores))
+
+
+def pin_process(pid: int, cores: list[int]) -> bool:
+  """Restrict pid (and the threads it starts afterwards) to cores. Returns False if unsupported."""
+  if not cores or not hasattr(os, "sched_setaffinity"):
+    return False
+  try:
+    os.sched_setaffinity(pid, cores)
+  except OSError as exc:
+    print(f"⚠️ Could not pin process {pid} to cores {cores}: {exc}")
+    return False
+  return True
+
+
+def pinned_command(cmd: list[str], cores: list[int]) -> list[str] | None:
+  """``cmd`` run under ``taskset -c <cores>``; None if there are no cores or no taskset.
+
+  taskset sets the affinity before it execs the CLI, so the thread pools the CLI
+  starts while importing (torch, OpenMP) are already confined. Without it, fall
+  back to pin_process() once the child is running.
+  """
+  taskset = shutil.which("taskset") if cores else None
+  if not taskset:
+    return None
+  return [taskset, "-c", ",".join(str(core) for core in cores), *cmd]
+
+
+def thread_env(threads: int) -> dict[str, str]:
+  return {name: str(max(1, threads)) for name in THREAD_ENV_VARS}
+
+
+def apply_thread_budget(threads: int) -> None:
+  """Size this process's OpenMP and torch thread pools to ``threads``.
+
+  Call early: torch only accepts an inter-op thread count before it first uses it.
+  """
+  threads = max(1, threads)
+  os.environ.update(thread_env(threads))
+  try:
+    import torch  # type: ignore
+  except Exception:
+    return
+  torch.set_num_threads(threads)
+  try:
+    torch.set_num_interop_threads(max(1, threads // 4))
+  except RuntimeError:
+    pass  # already initialised in this process
@@ -0,0 +1,125 @@
+"""Write a transcript DOCX straight from its captions.
+
+A DOCX is a zip of a few small XML parts plus ``word/document.xml``, which
+holds one ``<w:p>`` per paragraph. ``write_docx`` streams those paragraphs into
+the zip entry as they are produced, so memory use does not grow with the
+transcript and no HTML has to be parsed back. It needs only the standard
+library (python-docx is not involved) and produces the same paragraphs as
+``html_to_docx.convert_html_string_to_docx``: ``Speaker: [H:MM:SS.s] text``.
+"""
+from __future__ import annotations
+
+import os
+import re
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from transcribe_with_whisper.timeline import caption_count, display_time
+
+# Flush document.xml to the compressor in blocks of about this many characters
+_FLUSH_CHARS = 1 << 16
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '<Override PartName="/word/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>'
+    '</Types>')
+
+_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>')
+
+_DOCUMENT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>')
+
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# Calibri 11pt with a little space after each paragraph, like python-docx's default template
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<w:styles xmlns:w="{_W}">'
+    '<w:docDefaults><w:rPrDefault><w:rPr>'
+    '<w:rFonts w:ascii="Calibri" w:hAnsi="Calibri" w:eastAsia="Calibri" w:cs="Calibri"/>'
+    '<w:sz w:val="22"/><w:szCs w:val="22"/></w:rPr></w:rPrDefault>'
+    '<w:pPrDefault><w:pPr><w:spacing w:after="200" w:line="276" w:lineRule="auto"/></w:pPr>'
+    '</w:pPrDefault></w:docDefaults>'
+    '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>'
+    '</w:styles>')
+
+_DOCUMENT_START = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                   f'<w:document xmlns:w="{_W}"><w:body>')
+_DOCUMENT_END = ('<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+                 '<w:pgMar w:top="1440" w:right="1440" w:bottom="1440" w:left="1440" '
+                 'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+                 '</w:body></w:document>')
+
+
+def paragraph_xml(text: str) -> str:
+  text = escape(_INVALID_XML.sub("", text))
+  return f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+def write_docx(paragraphs: Iterable[str], out_path: Path) -> int:
+  """Stream ``paragraphs`` into a new DOCX at out_path; returns how many were written.
+
+  The file is written next to out_path and moved into place when complete, so
+  a reader never sees half a document.
+  """
+  out_path = Path(out_path)
+  tmp = out_path.with_name(out_path.name + ".tmp")
+  count = 0
+  try:
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+      zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+      zf.writestr("_rels/.rels", _PACKAGE_RELS)
+      zf.writestr("word/_rels/document.xml.rels", _DOCUMENT_RELS)
+      zf.writestr("word/styles.xml", _STYLES)
+      with zf.open("word/document.xml", "w", force_zip64=True) as doc:
+        pending, size = [_DOCUMENT_START], len(_DOCUMENT_START)
+        for text in paragraphs:
+          p = paragraph_xml(text)
+          pending.append(p)
+          size += len(p)
+          count += 1
+          if size >= _FLUSH_CHARS:
+            doc.write("".join(pending).encode("utf-8"))
+            pending, size = [], 0
+        pending.append(_DOCUMENT_END)
+        doc.write("".join(pending).encode("utf-8"))
+    os.replace(tmp, out_path)
+  except BaseException:
+    tmp.unlink(missing_ok=True)
+    raise
+  return count
+
+
+def timeline_paragraphs(timeline: dict, speaker_inline: bool = True) -> Iterator[str]:
+  """One paragraph per caption of a timeline (see timeline.build_timeline)."""
+  names = [s["name"] for s in timeline["speakers"]]
+  captions, turn_speaker = timeline["captions"], timeline["turns"]["speaker"]
+  for i in range(caption_count(timeline)):
+    text = captions["text"][i].strip()
+    stamp = f"[{display_time(captions['start'][i])}]"
+    if speaker_inline:
+      yield f"{names[turn_speaker[captions['turn'][i]]]}: {stamp} {text}".strip()
+    else:
+      yield f"{stamp} {text}".strip()
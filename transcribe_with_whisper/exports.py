@@ -0,0 +1,166 @@
+"""DOCX, SRT, plain-text and JSON exports of a transcript, built when first asked for.
+
+Only the HTML transcript (and its timeline sidecar) is produced by a
+transcription run. ``ensure_export()`` builds another format from the timeline
+the first time it is requested and records it in the artifact manifest; later
+requests get the cached file until the HTML or timeline changes. The web server
+calls it from ``/export/<basename>.<format>`` and, while no transcription is
+running, ahead of time for transcripts that just finished.
+
+The DOCX keeps its place next to the HTML (``<basename>.docx``); the other
+formats live in the transcript folder (``<basename>/<basename>.srt`` ...).
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from transcribe_with_whisper.docx_writer import timeline_paragraphs, write_docx
+from transcribe_with_whisper.manifest import Manifest, input_digest
+from transcribe_with_whisper.timeline import caption_count, read_timeline, timeline_path
+
+EXPORT_FORMATS = ("docx", "srt", "txt", "json")
+MEDIA_TYPES = {
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "srt": "application/x-subrip; charset=utf-8",
+    "txt": "text/plain; charset=utf-8",
+    "json": "application/json",
+}
+# Bump when an export's content changes for the same transcript
+EXPORT_VERSION = 1
+
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def export_path(output_dir: Path, basename: str, fmt: str) -> Path:
+  if fmt == "docx":
+    return Path(output_dir) / f"{basename}.docx"
+  return Path(output_dir) / basename / f"{basename}.{fmt}"
+
+
+def _sources(output_dir: Path, basename: str) -> tuple[Path, Path]:
+  return Path(output_dir) / f"{basename}.html", timeline_path(Path(output_dir) / basename, basename)
+
+
+def export_inputs(output_dir: Path, basename: str, fmt: str) -> str:
+  return input_digest(_sources(output_dir, basename), format=fmt, version=EXPORT_VERSION)
+
+
+def speaker_inline(html_path: Path) -> bool:
+  """The page's speaker-inline setting, read from its <head> only."""
+  head = []
+  with open(html_path, encoding="utf-8") as f:
+    for line in f:
+      head.append(line)
+      if "</head>" in line or "<body" in line:
+        break
+  return '<meta name="speaker-inline" content="false">' not in "".join(head)
+
+
+def srt_time(seconds: float) -> str:
+  ms = int(round(max(0.0, seconds) * 1000))
+  return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d},{ms % 1000:03d}"
+
+
+def _atomic_text(path: Path, chunks) -> None:
+  tmp = path.with_name(path.name + ".tmp")
+  try:
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+      for chunk in chunks:
+        f.write(chunk)
+    os.replace(tmp, path)
+  except BaseException:
+    tmp.unlink(missing_ok=True)
+    raise
+
+
+def _srt(timeline: dict, inline: bool):
+  names = [s["name"] for s in timeline["speakers"]]
+  captions, turn_speaker = timeline["captions"], timeline["turns"]["speaker"]
+  for i in range(caption_count(timeline)):
+    text = captions["text"][i].strip()
+    if inline:
+      text = f"{names[turn_speaker[captions['turn'][i]]]}: {text}"
+    yield f"{i + 1}\n{srt_time(captions['start'][i])} --> {srt_time(captions['end'][i])}\n{text}\n\n"
+
+
+def _txt(timeline: dict, inline: bool):
+  for paragraph in timeline_paragraphs(timeline, inline):
+    yield paragraph + "\n"
+
+
+def _json(timeline: dict):
+  speakers = timeline["speakers"]
+  captions, turn_speaker = timeline["captions"], timeline["turns"]["speaker"]
+  yield json.dumps({"media": timeline.get("media"), "speakers": speakers}, ensure_ascii=False)[:-1]
+  yield ', "segments": ['
+  for i in range(caption_count(timeline)):
+    speaker = speakers[turn_speaker[captions["turn"][i]]]
+    row = {
+        "start": captions["start"][i],
+        "end": captions["end"][i],
+        "speaker": speaker["id"],
+        "speaker_name": speaker["name"],
+        "text": captions["text"][i].strip(),
+    }
+    yield ("\n  " if i == 0 else ",\n  ") + json.dumps(row, ensure_ascii=False)
+  yield "\n]}\n"
+
+
+def build_export(output_dir: Path, basename: str, fmt: str, timeline: dict | None = None) -> Path:
+  """Write one export unconditionally and return its path."""
+  html_path, sidecar = _sources(output_dir, basename)
+  out = export_path(output_dir, basename, fmt)
+  if timeline is None:
+    timeline = read_timeline(sidecar)
+  if timeline is None:
+    if fmt == "docx" and html_path.exists():
+      # A transcript from before timeline sidecars: convert its HTML
+      from transcribe_with_whisper.html_to_docx import convert_html_file_to_docx
+      convert_html_file_to_docx(html_path, out)
+      return out
+    raise FileNotFoundError(f"{basename} has no timeline; reprocess it to export {fmt.upper()}")
+  inline = speaker_inline(html_path) if html_path.exists() else True
+  out.parent.mkdir(parents=True, exist_ok=True)
+  if fmt == "docx":
+    write_docx(timeline_paragraphs(timeline, inline), out)
+  elif fmt == "srt":
+    _atomic_text(out, _srt(timeline, inline))
+  elif fmt == "txt":
+    _atomic_text(out, _txt(timeline, inline))
+  elif fmt == "json":
+    _atomic_text(out, _json(timeline))
+  else:
+    raise ValueError(f"Unknown export format: {fmt}")
+  return out
+
+
+def ensure_export(output_dir: Path, basename: str, fmt: str, timeline: dict | None = None) -> Path:
+  """The export at its cached path, built first if missing or out of date.
+
+  Concurrent calls for the same file wait for one build instead of racing.
+  """
+  if fmt not in EXPORT_FORMATS:
+    raise ValueError(f"Unknown export format: {fmt}")
+  out = export_path(output_dir, basename, fmt)
+  with _locks_guard:
+    lock = _locks.setdefault(out, threading.Lock())
+  with lock:
+    manifest = Manifest(Path(output_dir) / basename, basename)
+    inputs = export_inputs(output_dir, basename, fmt)
+    if not manifest.is_current(out, inputs):
+      build_export(output_dir, basename, fmt, timeline)
+      manifest.record(out, inputs)
+  return out
+
+
+def missing_exports(output_dir: Path, basename: str) -> list[str]:
+  """Formats that would have to be built (or rebuilt) if requested now."""
+  manifest = Manifest(Path(output_dir) / basename, basename)
+  return [
+      fmt for fmt in EXPORT_FORMATS if not manifest.is_current(
+          export_path(output_dir, basename, fmt), export_inputs(output_dir, basename, fmt))
+  ]
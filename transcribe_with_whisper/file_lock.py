@@ -0,0 +1,103 @@
+"""Cross-process locks for a transcript's working directory.
+
+Every run for ``<basename>`` reads and writes the same files in ``<basename>/``
+(the audio cache, segment WAVs, VTTs, the diarization file). Two runs on the
+same basename must therefore never overlap, whether they come from the web
+server, a worker on another node, or someone running the CLI by hand. The lock
+is an OS-level lock on ``<basename>/.lock``, so it is released automatically if
+the process dies. POSIX record locks don't exclude threads of the same
+process, so a per-directory thread lock is taken first.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+if os.name == "nt":
+  import msvcrt
+else:
+  import fcntl
+
+LOCK_FILENAME = ".lock"
+
+_thread_locks: dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+class LockTimeout(TimeoutError):
+  """Raised when a basename lock can't be acquired within the requested timeout."""
+
+
+def _try_lock(fh) -> bool:
+  try:
+    if os.name == "nt":
+      fh.seek(0)
+      msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+      # lockf (POSIX record locks) also works on NFS-mounted TRANSCRIPTION_DIRs
+      fcntl.lockf(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    return True
+  except OSError:
+    return False
+
+
+def _unlock(fh) -> None:
+  try:
+    if os.name == "nt":
+      fh.seek(0)
+      msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+      fcntl.lockf(fh, fcntl.LOCK_UN)
+  except OSError:
+    pass
+
+
+@contextmanager
+def workdir_lock(workdir: Path | str,
+                 timeout: float | None = None,
+                 on_wait: Callable[[], None] | None = None,
+                 poll_interval: float = 0.5) -> Iterator[Path]:
+  """Hold an exclusive lock on a transcript working directory.
+
+  ``on_wait`` is called once if another process already holds the lock. Raises
+  LockTimeout if ``timeout`` seconds pass without acquiring it.
+  """
+  workdir = Path(workdir)
+  workdir.mkdir(parents=True, exist_ok=True)
+  with _thread_locks_guard:
+    thread_lock = _thread_locks.setdefault(str(workdir.resolve()), threading.Lock())
+
+  deadline = None if timeout is None else time.monotonic() + timeout
+  waited = False
+
+  def _remaining() -> float:
+    return -1 if deadline is None else max(0.0, deadline - time.monotonic())
+
+  if not thread_lock.acquire(blocking=False):
+    waited = True
+    if on_wait is not None:
+      on_wait()
+    if not thread_lock.acquire(timeout=_remaining()):
+      raise LockTimeout(f"Timed out waiting for lock on {workdir}")
+  try:
+    fh = open(workdir / LOCK_FILENAME, "a+")
+    try:
+      if not _try_lock(fh):
+        if on_wait is not None and not waited:
+          on_wait()
+        while not _try_lock(fh):
+          if deadline is not None and time.monotonic() >= deadline:
+            raise LockTimeout(f"Timed out waiting for lock on {workdir}")
+          time.sleep(poll_interval)
+      try:
+        yield workdir
+      finally:
+        _unlock(fh)
+    finally:
+      fh.close()
+  finally:
+    thread_lock.release()
@@ -1,118 +1,155 @@
-"""Shared HTML -> DOCX conversion helpers.
-
-This module provides a single implementation used by the CLI script and the
-web server. It extracts only the content inside <div class="transcript-segment">
-blocks, writes one paragraph per segment and preserves speaker/timestamp text.
-This avoids duplicate implementations and keeps behavior consistent across
-environments (dev, frozen bundle, CI).
-"""
-from __future__ import annotations
-
-import html as htmlmod
-import re
-from pathlib import Path
-
-
-def ensure_deps() -> bool:
-  try:
-    import docx  # noqa: F401
-    return True
-  except Exception:
-    return False
-
-
-def sanitize_html(html: str) -> str:
-  # Remove comments
-  html = re.sub(r"<!--.*?-->", "", html, flags=re.S)
-  # Strip scripts/styles
-  html = re.sub(r"<script[^>]*>.*?</script>", "", html, flags=re.S | re.I)
-  html = re.sub(r"<style[^>]*>.*?</style>", "", html, flags=re.S | re.I)
-  # Unwrap anchors
-  html = re.sub(r"<a[^>]*>(.*?)</a>", r"\1", html, flags=re.S | re.I)
-  # Remove html-only blocks
-  html = re.sub(
-      r"<([a-zA-Z0-9]+)([^>]*\bclass=[\'\"]?[^>]*\bhtml-only\b[^>]*[\'\"]?[^>]*)>.*?</\1>",
-      "",
-      html,
-      flags=re.S | re.I,
-  )
-  # Normalize whitespace
-  html = re.sub(r"[\t\r\n]+", "\n", html)
-  html = re.sub(r"[ \f\v]{2,}", " ", html)
-  return html
-
-
-def _strip_tags(s: str) -> str:
-  t = re.sub(r"<[^>]+>", "", s)
-  t = htmlmod.unescape(t)
-  t = re.sub(r"[\t\r\n]+", " ", t)
-  t = re.sub(r" {2,}", " ", t)
-  return t.strip()
-
-
-def convert_html_string_to_docx(html: str, out_path: Path) -> None:
-  """Convert HTML text to a DOCX at out_path.
-
-    Only content inside <div class="transcript-segment">...</div> is used.
-    Raises RuntimeError if no transcript segments are found.
-    """
-  if not ensure_deps():
-    raise RuntimeError("python-docx is not installed")
-
-  html = sanitize_html(html)
-
-  seg_pattern = re.compile(
-      r"<div[^>]*\bclass=[\'\"]?[^>]*\btranscript-segment\b[^>]*[\'\"]?[^>]*>(.*?)</div>",
-      flags=re.S | re.I,
-  )
-
-  segments = seg_pattern.findall(html)
-  if not segments:
-    raise RuntimeError('no <div class="transcript-segment"> blocks found')
-
-  from docx import Document
-
-  doc = Document()
-
-  for inner in segments:
-    speaker = ""
-    timestamp = ""
-    m = re.search(r'<span[^>]*\bclass=[\'\"]?[^>]*\bspeaker-name\b[^>]*[\'\"]?[^>]*>(.*?)</span>',
-                  inner,
-                  flags=re.S | re.I)
-    if m:
-      speaker = _strip_tags(m.group(1))
-
-    m = re.search(r'<span[^>]*\bclass=[\'\"]?[^>]*\btimestamp\b[^>]*[\'\"]?[^>]*>(.*?)</span>',
-                  inner,
-                  flags=re.S | re.I)
-    if m:
-      timestamp = _strip_tags(m.group(1))
-
-    m = re.search(
-        r'<span[^>]*\bclass=[\'\"]?[^>]*\btranscript-text\b[^>]*[\'\"]?[^>]*>(.*?)</span>',
-        inner,
-        flags=re.S | re.I)
-    if m:
-      text = _strip_tags(m.group(1))
-    else:
-      text = _strip_tags(inner)
-
-    pieces = []
-    if speaker:
-      pieces.append(speaker)
-    if timestamp:
-      pieces.append(timestamp)
-    if text:
-      pieces.append(text)
-
-    paragraph_text = " ".join(pieces).strip()
-    if paragraph_text:
-      doc.add_paragraph(paragraph_text)
-
-  doc.save(str(out_path))
-
-
-def convert_html_file_to_docx(in_path: Path, out_path: Path) -> None:
-  html = in_path.read_text(encoding="utf-8")
-  return convert_html_string_to_docx(html, out_path)
+"""Shared HTML -> DOCX conversion helpers.
+
+This module provides a single implementation used by the CLI script and the
+web server. It extracts only the content inside <div class="transcript-segment">
+blocks, writes one paragraph per segment and preserves speaker/timestamp text.
+This avoids duplicate implementations and keeps behavior consistent across
+environments (dev, frozen bundle, CI). Virtualised transcripts, whose page has
+no caption markup, are converted from their timeline sidecar instead.
+
+The page is read with a single pass of ``html.parser`` (no regexes over the
+whole document), so conversion time grows linearly with the transcript; the
+DOCX itself is streamed by ``docx_writer.write_docx``.
+"""
+from __future__ import annotations
+
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Iterator
+
+# Elements that never have an end tag, so they must not be pushed on the open-element stack
+_VOID = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                   "param", "source", "track", "wbr"))
+_FIELDS = ("speaker-name", "timestamp", "transcript-text")
+_SPACE = re.compile(r"[ \t\r\n\f\v]+")
+_FEED_CHARS = 1 << 16
+
+
+def _clean(parts: list[str]) -> str:
+  return _SPACE.sub(" ", "".join(parts)).strip()
+
+
+class _SegmentParser(HTMLParser):
+  """Collects one paragraph per transcript-segment div as the document is fed.
+
+  Comments, <script>/<style> contents and elements with the html-only class are
+  skipped; links are unwrapped. Within a segment the first speaker-name,
+  timestamp and transcript-text spans give the paragraph (all of the segment's
+  text when there is no transcript-text span).
+  """
+
+  def __init__(self):
+    super().__init__(convert_charrefs=True)
+    self.paragraphs: list[str] = []
+    self._open: list[str] = []
+    self._open_count: dict[str, int] = {}  # so a stray end tag is rejected without scanning the stack
+    self._skip_depth = None  # stack depth of the html-only/script/style element being skipped
+    self._segment_depth = None
+    self._field = None  # (name, stack depth) of the span being collected
+    self._parts: dict[str, list[str]] = {}
+
+  def handle_starttag(self, tag, attrs):
+    if tag in _VOID:
+      return
+    self._open.append(tag)
+    self._open_count[tag] = self._open_count.get(tag, 0) + 1
+    if self._skip_depth is not None:
+      return
+    classes = next((v or "" for k, v in attrs if k == "class"), "").split()
+    if tag in ("script", "style") or "html-only" in classes:
+      self._skip_depth = len(self._open)
+    elif self._segment_depth is None:
+      if tag == "div" and "transcript-segment" in classes:
+        self._segment_depth = len(self._open)
+        self._parts = {"all": []}
+    elif self._field is None and tag == "span":
+      name = next((c for c in _FIELDS if c in classes), None)
+      if name is not None and name not in self._parts:
+        self._field = (name, len(self._open))
+        self._parts[name] = []
+
+  def handle_startendtag(self, tag, attrs):
+    # <br/>, or a self-closed <div/> that contains nothing
+    pass
+
+  def handle_endtag(self, tag):
+    if not self._open_count.get(tag):
+      return  # stray end tag
+    # Elements left open inside this one (a missing </span>, say) close with it
+    while self._open:
+      depth = len(self._open)
+      closed = self._open.pop()
+      self._open_count[closed] -= 1
+      if self._skip_depth == depth:
+        self._skip_depth = None
+      elif self._field is not None and self._field[1] == depth:
+        self._field = None
+      elif self._segment_depth == depth:
+        self._finish_segment()
+      if closed == tag:
+        break
+
+  def handle_data(self, data):
+    if self._skip_depth is not None or self._segment_depth is None:
+      return
+    self._parts["all"].append(data)
+    if self._field is not None:
+      self._parts[self._field[0]].append(data)
+
+  def _finish_segment(self):
+    parts, self._parts = self._parts, {}
+    self._segment_depth = self._field = None
+    text = parts.get("transcript-text", parts["all"])
+    pieces = [_clean(parts.get("speaker-name", [])), _clean(parts.get("timestamp", [])), _clean(text)]
+    paragraph = " ".join(p for p in pieces if p).strip()
+    if paragraph:
+      self.paragraphs.append(paragraph)
+
+
+def iter_transcript_paragraphs(html: str) -> Iterator[str]:
+  """Yield the paragraph text of each transcript segment, in page order, in one pass."""
+  parser = _SegmentParser()
+  for i in range(0, len(html), _FEED_CHARS):
+    parser.feed(html[i:i + _FEED_CHARS])
+    yield from parser.paragraphs
+    parser.paragraphs.clear()
+  parser.close()
+  yield from parser.paragraphs
+
+
+def convert_html_string_to_docx(html: str, out_path: Path) -> None:
+  """Convert HTML text to a DOCX at out_path.
+
+    Only content inside <div class="transcript-segment">...</div> is used.
+    Raises RuntimeError if no transcript segments are found.
+    """
+  from transcribe_with_whisper.docx_writer import write_docx
+
+  paragraphs = iter_transcript_paragraphs(html)
+  first = next(paragraphs, None)
+  if first is None:
+    raise RuntimeError('no <div class="transcript-segment"> blocks found')
+
+  def all_paragraphs():
+    yield first
+    yield from paragraphs
+
+  write_docx(all_paragraphs(), out_path)
+
+
+def convert_html_file_to_docx(in_path: Path, out_path: Path) -> None:
+  html = in_path.read_text(encoding="utf-8")
+  if 'id="transcript" data-basename=' in html:
+    # A virtualised transcript: the captions are in the timeline sidecar, not the page
+    from transcribe_with_whisper.timeline import read_timeline, timeline_path
+
+    timeline = read_timeline(timeline_path(in_path.parent / in_path.stem, in_path.stem))
+    if timeline is None:
+      raise RuntimeError(f"timeline for {in_path.name} not found")
+    from transcribe_with_whisper.docx_writer import timeline_paragraphs, write_docx
+
+    inline = '<meta name="speaker-inline" content="false">' not in html
+    write_docx(timeline_paragraphs(timeline, inline), out_path)
+    return
+  return convert_html_string_to_docx(html, out_path)
@@ -0,0 +1,356 @@
+"""Shared job queues so several machines can work on one TRANSCRIPTION_DIR.
+
+Web nodes enqueue jobs; ``transcribe-with-whisper-worker`` processes on any
+machine that mounts the same TRANSCRIPTION_DIR claim them, run the CLI and write
+the job record (status, progress, message, result) back. Any web node can then
+answer /api/job/{id} from the queue.
+
+Two backends are provided and selected with a URL (the ``JOB_QUEUE`` env var):
+
+- ``sqlite:////path/to/queue.db`` -- a SQLite file, typically on the shared
+  storage itself. Claims use ``BEGIN IMMEDIATE`` so only one worker gets a job.
+- ``redis://host:6379/0`` -- a Redis (or Redis-compatible) server; needs the
+  optional ``redis`` package. Claims run as one Lua script, so a worker that
+  dies mid-claim can't lose the job.
+
+A job whose worker stops reporting is put back in the queue, at most
+``max_attempts`` times in all; after that it fails instead of taking down worker
+after worker.
+"""
+from __future__ import annotations
+
+import abc
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+QUEUED = "queued"
+# Statuses after which a job record no longer changes
+TERMINAL_STATUSES = ("completed", "error", "cancelled")
+# Claims per job before an unresponsive worker makes it fail instead of requeueing
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def _abandoned_state(state: dict, attempts: int) -> dict:
+  return {
+      **state, "status": "error",
+      "error_reason": "worker_lost",
+      "message": f"Worker stopped responding on {attempts} attempt(s); giving up",
+      "end_time": time.time()
+  }
+
+
+class JobQueue(abc.ABC):
+  """Interface shared by the queue backends.
+
+  A job has an id, a status, the ``payload`` needed to run it and a ``state``
+  dict mirroring the server's in-memory job record.
+  """
+
+  @abc.abstractmethod
+  def enqueue(self, payload: dict, job_id: str, state: dict | None = None) -> str:
+    """Add a job to the back of the queue and return its id."""
+
+  @abc.abstractmethod
+  def claim(self, worker_id: str) -> tuple[str, dict] | None:
+    """Take the oldest queued job, or return None if there is nothing to do."""
+
+  @abc.abstractmethod
+  def update(self, job_id: str, state: dict) -> None:
+    """Merge state into the job record. A cancelled job stays cancelled."""
+
+  @abc.abstractmethod
+  def get(self, job_id: str) -> dict | None:
+    """Return the job record (state plus status and worker), or None."""
+
+  @abc.abstractmethod
+  def cancel(self, job_id: str) -> bool:
+    """Mark a queued or running job as cancelled. Returns False if it already finished."""
+
+  @abc.abstractmethod
+  def requeue_stale(self, timeout: float, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    """Put back jobs whose worker hasn't reported for ``timeout`` seconds.
+
+    A job already claimed ``max_attempts`` times is marked as failed instead.
+    Returns the number of jobs requeued.
+    """
+
+
+class SQLiteJobQueue(JobQueue):
+
+  def __init__(self, path: Path | str):
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._local = threading.local()
+    with self._connect() as conn:
+      conn.execute("""
+          CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            state TEXT NOT NULL DEFAULT '{}',
+            worker TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created REAL NOT NULL,
+            updated REAL NOT NULL
+          )""")
+      conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+  def _connect(self) -> sqlite3.Connection:
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      # Autocommit mode; transactions are opened explicitly where they matter
+      conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+      conn.row_factory = sqlite3.Row
+      self._local.conn = conn
+    return conn
+
+  def enqueue(self, payload: dict, job_id: str, state: dict | None = None) -> str:
+    now = time.time()
+    state = {**(state or {}), "status": QUEUED}
+    self._connect().execute(
+        "INSERT INTO jobs (id, status, payload, state, created, updated) VALUES (?, ?, ?, ?, ?, ?)",
+        (job_id, QUEUED, json.dumps(payload), json.dumps(state), now, now))
+    return job_id
+
+  def claim(self, worker_id: str) -> tuple[str, dict] | None:
+    conn = self._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      row = conn.execute("SELECT id, payload FROM jobs WHERE status = ? ORDER BY created LIMIT 1",
+                         (QUEUED, )).fetchone()
+      if row is None:
+        conn.execute("COMMIT")
+        return None
+      conn.execute(
+          "UPDATE jobs SET status = 'starting', worker = ?, attempts = attempts + 1, updated = ? "
+          "WHERE id = ?", (worker_id, time.time(), row["id"]))
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+    return row["id"], json.loads(row["payload"])
+
+  def update(self, job_id: str, state: dict) -> None:
+    conn = self._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      row = conn.execute("SELECT status, state FROM jobs WHERE id = ?", (job_id, )).fetchone()
+      if row is not None:
+        merged = {**json.loads(row["state"]), **state}
+        status = row["status"] if row["status"] == "cancelled" else merged.get(
+            "status", row["status"])
+        merged["status"] = status
+        conn.execute("UPDATE jobs SET status = ?, state = ?, updated = ? WHERE id = ?",
+                     (status, json.dumps(merged), time.time(), job_id))
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+
+  def get(self, job_id: str) -> dict | None:
+    row = self._connect().execute("SELECT status, state, worker FROM jobs WHERE id = ?",
+                                  (job_id, )).fetchone()
+    if row is None:
+      return None
+    return {**json.loads(row["state"]), "status": row["status"], "worker": row["worker"]}
+
+  def cancel(self, job_id: str) -> bool:
+    conn = self._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      row = conn.execute("SELECT status, state FROM jobs WHERE id = ?", (job_id, )).fetchone()
+      if row is None or row["status"] in TERMINAL_STATUSES:
+        conn.execute("COMMIT")
+        return False
+      state = {
+          **json.loads(row["state"]), "status": "cancelled",
+          "error_reason": "cancelled",
+          "message": "Cancelled by user",
+          "end_time": time.time()
+      }
+      conn.execute("UPDATE jobs SET status = 'cancelled', state = ?, updated = ? WHERE id = ?",
+                   (json.dumps(state), time.time(), job_id))
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+    return True
+
+  def requeue_stale(self, timeout: float, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    conn = self._connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+      stale = conn.execute(
+          "SELECT id, state, attempts FROM jobs WHERE status IN ('starting', 'running') "
+          "AND updated < ?", (time.time() - timeout, )).fetchall()
+      requeued = 0
+      for row in stale:
+        if row["attempts"] >= max_attempts:
+          state = _abandoned_state(json.loads(row["state"]), row["attempts"])
+          conn.execute("UPDATE jobs SET status = 'error', state = ?, updated = ? WHERE id = ?",
+                       (json.dumps(state), time.time(), row["id"]))
+        else:
+          conn.execute("UPDATE jobs SET status = ?, worker = NULL WHERE id = ?", (QUEUED, row["id"]))
+          requeued += 1
+      conn.execute("COMMIT")
+    except BaseException:
+      conn.execute("ROLLBACK")
+      raise
+    return requeued
+
+
+# Pop queued ids until one is still queued, then mark it claimed; Redis runs the script atomically.
+# KEYS: queue list, active set. ARGV: job key prefix, worker id, timestamp.
+_CLAIM_SCRIPT = """
+while true do
+  local id = redis.call('RPOP', KEYS[1])
+  if not id then return nil end
+  local key = ARGV[1] .. id
+  if redis.call('HGET', key, 'status') == 'queued' then
+    redis.call('HSET', key, 'status', 'starting', 'worker', ARGV[2], 'updated', ARGV[3])
+    redis.call('HINCRBY', key, 'attempts', 1)
+    redis.call('SADD', KEYS[2], id)
+    return {id, redis.call('HGET', key, 'payload')}
+  end
+end
+"""
+
+
+class RedisJobQueue(JobQueue):
+  """Queue on a Redis server: a list of pending ids plus one hash per job."""
+
+  def __init__(self, url: str, prefix: str = "transcribe-with-whisper"):
+    try:
+      import redis  # type: ignore
+    except ImportError as exc:
+      raise RuntimeError("The Redis job queue needs the redis package: pip install redis") from exc
+    self._redis = redis.Redis.from_url(url, decode_responses=True)
+    self._watch_error = redis.WatchError
+    self.prefix = prefix
+    self._claim = self._redis.register_script(_CLAIM_SCRIPT)
+
+  def _key(self, *parts: str) -> str:
+    return ":".join((self.prefix, ) + parts)
+
+  def enqueue(self, payload: dict, job_id: str, state: dict | None = None) -> str:
+    now = time.time()
+    state = {**(state or {}), "status": QUEUED}
+    pipe = self._redis.pipeline()
+    pipe.hset(self._key("job", job_id),
+              mapping={
+                  "status": QUEUED,
+                  "payload": json.dumps(payload),
+                  "state": json.dumps(state),
+                  "worker": "",
+                  "attempts": 0,
+                  "updated": now,
+              })
+    pipe.lpush(self._key("queue"), job_id)
+    pipe.execute()
+    return job_id
+
+  def claim(self, worker_id: str) -> tuple[str, dict] | None:
+    claimed = self._claim(keys=[self._key("queue"), self._key("active")],
+                          args=[self._key("job", ""), worker_id, time.time()])
+    if not claimed:
+      return None
+    job_id, payload = claimed
+    return job_id, json.loads(payload)
+
+  def _modify(self, job_id: str, change) -> bool:
+    key = self._key("job", job_id)
+    with self._redis.pipeline() as pipe:
+      while True:
+        try:
+          pipe.watch(key)
+          record = pipe.hgetall(key)
+          if not record:
+            pipe.unwatch()
+            return False
+          fields = change(record)
+          if fields is None:
+            pipe.unwatch()
+            return False
+          pipe.multi()
+          pipe.hset(key, mapping={**fields, "updated": time.time()})
+          if fields.get("status") in TERMINAL_STATUSES:
+            pipe.srem(self._key("active"), job_id)
+          elif fields.get("status") == QUEUED:
+            pipe.srem(self._key("active"), job_id)
+            pipe.lpush(self._key("queue"), job_id)
+          pipe.execute()
+          return True
+        except self._watch_error:
+          continue
+
+  def update(self, job_id: str, state: dict) -> None:
+
+    def change(record):
+      merged = {**json.loads(record.get("state") or "{}"), **state}
+      status = record["status"] if record["status"] == "cancelled" else merged.get(
+          "status", record["status"])
+      merged["status"] = status
+      return {"status": status, "state": json.dumps(merged)}
+
+    self._modify(job_id, change)
+
+  def get(self, job_id: str) -> dict | None:
+    record = self._redis.hgetall(self._key("job", job_id))
+    if not record:
+      return None
+    return {
+        **json.loads(record.get("state") or "{}"), "status": record["status"],
+        "worker": record.get("worker") or None
+    }
+
+  def cancel(self, job_id: str) -> bool:
+
+    def change(record):
+      if record["status"] in TERMINAL_STATUSES:
+        return None
+      state = {
+          **json.loads(record.get("state") or "{}"), "status": "cancelled",
+          "error_reason": "cancelled",
+          "message": "Cancelled by user",
+          "end_time": time.time()
+      }
+      return {"status": "cancelled", "state": json.dumps(state)}
+
+    return self._modify(job_id, change)
+
+  def requeue_stale(self, timeout: float, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+    count = 0
+    cutoff = time.time() - timeout
+    for job_id in self._redis.smembers(self._key("active")):
+      last = {}
+
+      def change(record):
+        # Recorded so the caller knows what the (possibly retried) transaction applied
+        last.clear()
+        if record.get("status") in ("starting", "running") and float(record.get("updated", 0)) < cutoff:
+          attempts = int(record.get("attempts") or 0)
+          if attempts >= max_attempts:
+            state = _abandoned_state(json.loads(record.get("state") or "{}"), attempts)
+            last.update(status="error", state=json.dumps(state))
+          else:
+            last.update(status=QUEUED, worker="")
+        return dict(last) or None
+
+      if self._modify(job_id, change) and last["status"] == QUEUED:
+        count += 1
+    return count
+
+
+def queue_from_url(url: str) -> JobQueue:
+  """Build a queue from a ``sqlite:///`` URL, a bare ``*.db`` path or ``redis://...``."""
+  if url.startswith(("redis://", "rediss://", "unix://")):
+    return RedisJobQueue(url)
+  if url.startswith("sqlite:///"):
+    # As in SQLAlchemy: sqlite:///relative.db, sqlite:////absolute/path.db
+    return SQLiteJobQueue(url[len("sqlite:///"):])
+  if url.endswith((".db", ".sqlite", ".sqlite3")):
+    return SQLiteJobQueue(url)
+  raise ValueError(f"Unsupported job queue URL: {url!r} (use sqlite:///path.db or redis://host)")
@@ -0,0 +1,130 @@
+"""Per-job progress journal so interrupted runs resume where they stopped.
+
+Each transcript folder ``<basename>/`` carries ``<basename>-journal.json``
+recording which media file (size + mtime) the work belongs to, the options it
+was started with, the stages that are finished and every transcribed segment.
+The journal is rewritten atomically after each step, so after a crash, a server
+restart or a deliberate pause the next run skips everything already done.
+
+A run can be asked to pause by creating ``<basename>/.pause``. The CLI checks for
+it at stage and segment boundaries, records ``state: paused`` and exits with
+``PAUSED_EXIT_CODE`` so a scheduler can run something more urgent first.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+JOURNAL_VERSION = 1
+PAUSE_FILENAME = ".pause"
+# EX_TEMPFAIL: "try again later"
+PAUSED_EXIT_CODE = 75
+# Journal states a restarted server should pick up again
+UNFINISHED_STATES = ("running", "paused")
+
+
+class JobPaused(Exception):
+  """Raised at a checkpoint when a pause was requested for this transcript."""
+
+
+def journal_path(workdir: Path, basename: str) -> Path:
+  return Path(workdir) / f"{basename}-journal.json"
+
+
+def request_pause(workdir: Path) -> None:
+  """Ask the run working in workdir to stop at its next checkpoint."""
+  Path(workdir).mkdir(parents=True, exist_ok=True)
+  (Path(workdir) / PAUSE_FILENAME).touch()
+
+
+def read_journal(path: Path) -> dict | None:
+  try:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+    return None
+  return data if isinstance(data, dict) and data.get("version") == JOURNAL_VERSION else None
+
+
+def _stamp(path: Path) -> list[int] | None:
+  try:
+    st = Path(path).stat()
+  except OSError:
+    return None
+  return [st.st_size, st.st_mtime_ns]
+
+
+class Journal:
+
+  def __init__(self, workdir: Path, basename: str):
+    self.workdir = Path(workdir)
+    self.basename = basename
+    self.path = journal_path(self.workdir, basename)
+    self.data: dict = {}
+    # Options of the run that wrote the journal before begin() replaced them
+    self.previous_options: dict = {}
+
+  def begin(self, input_path: Path, options: dict) -> bool:
+    """Load the journal for this input and mark the run as started.
+
+    Returns False when an existing journal belongs to a different version of the
+    input file, in which case its recorded work must be discarded by the caller.
+    """
+    stamp = _stamp(input_path)
+    previous = read_journal(self.path)
+    matches = previous is None or previous.get("input", {}).get("stamp") == stamp
+    if previous is not None and matches:
+      self.data = previous
+      self.previous_options = previous.get("options") or {}
+    else:
+      self.data = {"version": JOURNAL_VERSION, "stages": [], "segments_done": []}
+    self.data["input"] = {"name": Path(input_path).name, "stamp": stamp}
+    self.data["options"] = options
+    self.data["state"] = "running"
+    self.data["started"] = time.time()
+    self.clear_pause()
+    self.save()
+    return matches
+
+  def save(self) -> None:
+    self.data["updated"] = time.time()
+    tmp = self.path.with_name(self.path.name + ".tmp")
+    tmp.write_text(json.dumps(self.data, indent=1), encoding="utf-8")
+    os.replace(tmp, self.path)
+
+  def stage_done(self, stage: str) -> bool:
+    return stage in self.data.get("stages", [])
+
+  def mark_stage(self, stage: str) -> None:
+    if stage not in self.data.setdefault("stages", []):
+      self.data["stages"].append(stage)
+    self.save()
+
+  def mark_segment(self, index: int, total: int) -> None:
+    done = self.data.setdefault("segments_done", [])
+    if index not in done:
+      done.append(index)
+    self.data["segments_total"] = total
+    self.save()
+
+  def set_state(self, state: str, **extra) -> None:
+    self.data["state"] = state
+    self.data.update(extra)
+    self.save()
+
+  def pause_requested(self) -> bool:
+    return (self.workdir / PAUSE_FILENAME).exists()
+
+  def clear_pause(self) -> None:
+    try:
+      (self.workdir / PAUSE_FILENAME).unlink()
+    except OSError:
+      pass
+
+  def checkpoint(self, where: str) -> None:
+    """Pause here if asked to: record the state and raise JobPaused."""
+    if self.pause_requested():
+      self.clear_pause()
+      self.set_state("paused", paused_at=where)
+      raise JobPaused(where)
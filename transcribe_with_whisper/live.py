@@ -0,0 +1,411 @@
+"""Live transcription of audio streamed in while a meeting is still going on.
+
+A ``LiveSession`` receives small chunks of audio (raw 16-bit or float PCM, or an
+Opus stream in WebM/Ogg that ffmpeg decodes as it arrives) and works on the
+audio that has not been captioned yet:
+
+* every ``step`` seconds of new audio, Silero VAD finds the speech in it;
+* while someone is still talking the speech so far is decoded greedily and
+  returned as a ``partial`` caption, which the next partial or final replaces;
+* once the speech is followed by ``silence`` seconds of quiet (or has run for
+  ``max_utterance`` seconds) it is decoded properly, given a speaker and
+  returned as a ``final`` caption, and its audio is dropped from the buffer.
+
+Speakers are assigned online: each utterance's voice embedding is compared with
+the running centroid of every speaker heard so far and joins the closest one
+above a similarity threshold, or starts a new speaker. With a Hugging Face token
+the pyannote speaker embedding model is used; otherwise (or if it can't be
+loaded) a cepstral fingerprint of the utterance, which tells clearly different
+voices apart but is no match for the batch diarization.
+
+``finish()`` writes the session in the usual layout: ``<basename>.wav`` and
+``<basename>.html`` next to a ``<basename>/`` folder with one VTT per speaker
+turn, the diarization and the speaker config.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import wave
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from transcribe_with_whisper.media_probe import find_ffmpeg_tool
+from transcribe_with_whisper.transcriber import (SAMPLE_RATE, Transcriber, TranscriptionResult,
+                                                 Turn, load_audio, pipeline, write_artifacts)
+
+# Audio formats a client may announce in its start message
+PCM_FORMATS = ("pcm_s16le", "pcm_f32le")
+ENCODED_FORMATS = ("webm", "ogg")
+LIVE_FORMATS = PCM_FORMATS + ENCODED_FORMATS
+
+# Utterances shorter than this don't carry enough voice to start a new speaker
+MIN_EMBED_SECONDS = 1.0
+
+
+class PcmDecoder:
+  """Turn raw little-endian PCM chunks into 16 kHz float samples."""
+
+  def __init__(self, fmt: str = "pcm_s16le", sample_rate: int = SAMPLE_RATE):
+    self.dtype = np.dtype("<i2") if fmt == "pcm_s16le" else np.dtype("<f4")
+    self.sample_rate = sample_rate
+    self._rest = b""
+
+  def feed(self, chunk: bytes) -> np.ndarray:
+    # A chunk boundary may split a sample; keep the odd bytes for the next chunk
+    data = self._rest + bytes(chunk)
+    usable = len(data) - len(data) % self.dtype.itemsize
+    self._rest = data[usable:]
+    return load_audio(np.frombuffer(data[:usable], dtype=self.dtype), self.sample_rate)
+
+  def finish(self) -> np.ndarray:
+    return np.zeros(0, dtype=np.float32)
+
+  def abort(self) -> None:
+    pass
+
+
+class FfmpegStreamDecoder:
+  """Decode a streamed container (Opus in WebM/Ogg) with ffmpeg as the bytes arrive.
+
+  Like ``StreamingDecoder`` but ffmpeg writes raw samples to a pipe, which a
+  reader thread collects, instead of a WAV file.
+  """
+
+  def __init__(self, fmt: str = "webm"):
+    ffmpeg = find_ffmpeg_tool("ffmpeg")
+    if not ffmpeg:
+      raise RuntimeError("ffmpeg is required to decode Opus audio")
+    self._proc = subprocess.Popen(
+        [ffmpeg, "-hide_banner", "-loglevel", "error", "-f", fmt, "-i", "pipe:0", "-vn", "-ac",
+         "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    self._pcm = PcmDecoder("pcm_s16le")
+    self._out = bytearray()
+    self._lock = threading.Lock()
+    self._reader = threading.Thread(target=self._read, daemon=True)
+    self._reader.start()
+
+  def _read(self) -> None:
+    while True:
+      data = self._proc.stdout.read1(65536)
+      if not data:
+        return
+      with self._lock:
+        self._out.extend(data)
+
+  def _drain(self) -> np.ndarray:
+    with self._lock:
+      data, self._out = bytes(self._out), bytearray()
+    return self._pcm.feed(data)
+
+  def feed(self, chunk: bytes) -> np.ndarray:
+    """Send chunk to ffmpeg and return whatever it has decoded so far."""
+    try:
+      self._proc.stdin.write(chunk)
+      self._proc.stdin.flush()
+    except (BrokenPipeError, ValueError):
+      raise RuntimeError("ffmpeg stopped decoding the stream") from None
+    return self._drain()
+
+  def finish(self) -> np.ndarray:
+    try:
+      self._proc.stdin.close()
+    except OSError:
+      pass
+    self._reader.join(timeout=10)
+    self._proc.wait(timeout=10)
+    return self._drain()
+
+  def abort(self) -> None:
+    if self._proc.poll() is None:
+      self._proc.kill()
+      self._proc.wait()
+
+
+def make_decoder(fmt: str, sample_rate: int = SAMPLE_RATE):
+  if fmt in PCM_FORMATS:
+    return PcmDecoder(fmt, sample_rate)
+  if fmt in ENCODED_FORMATS:
+    return FfmpegStreamDecoder(fmt)
+  raise ValueError(f"Unsupported audio format {fmt!r} (choose from {', '.join(LIVE_FORMATS)})")
+
+
+def silero_speech(samples: np.ndarray) -> list[tuple[int, int]]:
+  """Speech regions in samples as (start, end) sample offsets."""
+  from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+  options = VadOptions(min_silence_duration_ms=300, speech_pad_ms=100)
+  return [(s["start"], s["end"]) for s in get_speech_timestamps(samples, options)]
+
+
+class SpectralEmbedder:
+  """Mean and spread of the mel cepstrum: a cheap voice fingerprint that needs no model."""
+
+  threshold = 0.8
+
+  def __init__(self, coefficients: int = 20):
+    from faster_whisper.feature_extractor import FeatureExtractor
+
+    n = 80  # Whisper's mel bins
+    self._features = FeatureExtractor(feature_size=n)
+    k = np.arange(1, coefficients + 1)[:, None]  # c0 is loudness, not voice
+    self._dct = np.cos(np.pi / n * (np.arange(n)[None, :] + 0.5) * k).astype(np.float32)
+
+  def __call__(self, samples: np.ndarray) -> np.ndarray:
+    cepstrum = self._dct @ self._features(samples)
+    return np.concatenate([cepstrum.mean(axis=1), cepstrum.std(axis=1)])
+
+
+class PyannoteEmbedder:
+  """The speaker embedding model the pyannote diarization pipeline uses."""
+
+  threshold = 0.5
+
+  def __init__(self, auth_token: str):
+    from pyannote.audio import Inference, Model
+
+    name = "pyannote/wespeaker-voxceleb-resnet34-LM"
+    if pipeline._PYANNOTE_MAJOR >= 4:
+      model = Model.from_pretrained(name, token=auth_token)
+    else:
+      model = Model.from_pretrained(name, use_auth_token=auth_token)
+    self._inference = Inference(model, window="whole")
+
+  def __call__(self, samples: np.ndarray) -> np.ndarray:
+    import torch
+
+    waveform = torch.from_numpy(np.ascontiguousarray(samples)).unsqueeze(0)
+    return np.asarray(self._inference({"waveform": waveform, "sample_rate": SAMPLE_RATE}))
+
+
+@lru_cache(maxsize=2)
+def default_embedder(auth_token: str | None = None):
+  """Pyannote embeddings when a token is available and they load, else SpectralEmbedder."""
+  if auth_token and os.getenv("LIVE_SPEAKER_EMBEDDINGS", "auto") != "spectral":
+    try:
+      with pipeline._model_load_lock:
+        return PyannoteEmbedder(auth_token)
+    except Exception as exc:
+      print(f"⚠️ Speaker embedding model unavailable ({exc}); using spectral fingerprints")
+  return SpectralEmbedder()
+
+
+class OnlineSpeakers:
+  """Assign utterances to speakers by cosine similarity to running centroids."""
+
+  def __init__(self, embed, threshold: float | None = None, max_speakers: int | None = None):
+    self.embed = embed
+    self.threshold = threshold if threshold is not None else getattr(embed, "threshold", 0.7)
+    self.max_speakers = max_speakers
+    self.centroids: list[np.ndarray] = []
+    self.last: int | None = None
+
+  @staticmethod
+  def label(index: int) -> str:
+    return f"SPEAKER_{index:02d}"
+
+  def assign(self, samples: np.ndarray, update: bool = True) -> str:
+    """Label for samples; with update=False (partials) nothing is learned."""
+    if len(samples) < MIN_EMBED_SECONDS * SAMPLE_RATE and self.last is not None:
+      return self.label(self.last)
+    vector = np.asarray(self.embed(samples), dtype=np.float32).ravel()
+    vector = vector / (np.linalg.norm(vector) or 1.0)
+    best, similarity = None, -1.0
+    for i, centroid in enumerate(self.centroids):
+      score = float(vector @ centroid / (np.linalg.norm(centroid) or 1.0))
+      if score > similarity:
+        best, similarity = i, score
+    full = self.max_speakers is not None and len(self.centroids) >= self.max_speakers
+    if best is None or (similarity < self.threshold and not full):
+      if not update:
+        return self.label(len(self.centroids))
+      self.centroids.append(vector)
+      best = len(self.centroids) - 1
+    elif update:
+      self.centroids[best] = self.centroids[best] + vector
+    if update:
+      self.last = best
+    return self.label(best)
+
+
+class LiveSession:
+  """Caption one live stream; see the module docstring for the protocol."""
+
+  def __init__(self,
+               transcriber: Transcriber,
+               output_dir: str | os.PathLike,
+               basename: str,
+               fmt: str = "pcm_s16le",
+               sample_rate: int = SAMPLE_RATE,
+               max_speakers: int | None = None,
+               embedder=None,
+               vad=None,
+               step: float = 1.0,
+               silence: float = 0.6,
+               max_utterance: float = 12.0,
+               partial_interval: float = 1.5):
+    self.transcriber = transcriber
+    self.output_dir = Path(output_dir)
+    self.basename = basename
+    self.decoder = make_decoder(fmt, sample_rate)
+    self.speakers = OnlineSpeakers(embedder or default_embedder(transcriber.auth_token or
+                                                                os.getenv("HUGGING_FACE_AUTH_TOKEN")),
+                                   max_speakers=max_speakers)
+    self._vad = vad or silero_speech
+    self.step = int(step * SAMPLE_RATE)
+    self.silence = int(silence * SAMPLE_RATE)
+    self.max_utterance = int(max_utterance * SAMPLE_RATE)
+    self.partial_interval = int(partial_interval * SAMPLE_RATE)
+
+    self.turns: list[Turn] = []
+    self.received = 0  # samples so far
+    self._buffer = np.zeros(0, dtype=np.float32)  # audio not captioned yet
+    self._buffer_start = 0  # session offset of _buffer[0], in samples
+    self._processed = 0
+    self._last_partial = -self.partial_interval
+
+    # The session audio goes straight to disk: it becomes the transcript's media file
+    self.output_dir.mkdir(parents=True, exist_ok=True)
+    self.media_path = self.output_dir / f"{basename}.wav"
+    self._media_tmp = self.media_path.with_name(self.media_path.name + ".part")
+    self._media = wave.open(str(self._media_tmp), "wb")
+    self._media.setnchannels(1)
+    self._media.setsampwidth(2)
+    self._media.setframerate(SAMPLE_RATE)
+
+  @property
+  def seconds(self) -> float:
+    return self.received / SAMPLE_RATE
+
+  def feed(self, chunk: bytes) -> list[dict]:
+    """Add a chunk of audio and return the captions it produced."""
+    return self._add(self.decoder.feed(chunk))
+
+  def _add(self, samples: np.ndarray, final: bool = False) -> list[dict]:
+    if len(samples):
+      self._media.writeframes((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+      self._buffer = np.concatenate([self._buffer, samples])
+      self.received += len(samples)
+    if not final and self.received - self._processed < self.step:
+      return []
+    self._processed = self.received
+    return self._process(final)
+
+  def _process(self, final: bool) -> list[dict]:
+    events = []
+    while len(self._buffer):
+      speech = self._vad(self._buffer)
+      if not speech:
+        # Keep a little of the quiet in case it is the start of a word
+        self._drop(len(self._buffer) - self.silence)
+        break
+      first, last = speech[0][0], speech[-1][1]
+      # The utterance ends at the first pause long enough, which may be followed by more speech
+      end = next((e for (_, e), (s, _) in zip(speech, speech[1:]) if s - e >= self.silence), None)
+      if end is None and (final or len(self._buffer) - last >= self.silence):
+        end = last
+      if end is None and len(self._buffer) - first >= self.max_utterance:
+        # Cut a long monologue at its last pause that fits, or hard at the limit
+        pauses = [e for _, e in speech if first < e <= first + self.max_utterance]
+        end = max(pauses) if pauses else first + self.max_utterance
+      if end is None:
+        if len(self._buffer) - first >= self.step and self._since_partial() >= self.partial_interval:
+          self._last_partial = self.received
+          events.append(self._partial(first))
+        break
+      events.append(self._final(first, end))
+      self._drop(end)
+    return events
+
+  def _since_partial(self) -> int:
+    return self.received - self._last_partial
+
+  def _drop(self, count: int) -> None:
+    if count > 0:
+      self._buffer = self._buffer[count:]
+      self._buffer_start += count
+
+  def _decode(self, clip: np.ndarray, draft: bool):
+    if draft:
+      options = {"beam_size": 1, "without_timestamps": True}
+    else:
+      options = {"word_timestamps": self.transcriber.word_timestamps,
+                 **pipeline.decode_options(self.transcriber.model_size)}
+    segments, _ = self.transcriber.whisper_model.transcribe(clip,
+                                                            language=self.transcriber.language,
+                                                            condition_on_previous_text=False,
+                                                            vad_filter=False,
+                                                            **options)
+    return list(segments)
+
+  def _caption(self, kind: str, turn: Turn, text: str) -> dict:
+    return {
+        "type": kind,
+        "start": round(turn.start, 3),
+        "end": round(turn.end, 3),
+        "speaker": turn.speaker,
+        "speaker_name": f"Speaker {int(turn.speaker.rsplit('_', 1)[-1]) + 1}",
+        "text": text,
+    }
+
+  def _partial(self, first: int) -> dict:
+    clip = self._buffer[first:]
+    start = (self._buffer_start + first) / SAMPLE_RATE
+    turn = Turn(speaker=self.speakers.assign(clip, update=False),
+                start=start,
+                end=start + len(clip) / SAMPLE_RATE)
+    text = " ".join(s.text.strip() for s in self._decode(clip, draft=True)).strip()
+    return self._caption("partial", turn, text)
+
+  def _final(self, first: int, end: int) -> dict:
+    clip = self._buffer[first:end]
+    start = (self._buffer_start + first) / SAMPLE_RATE
+    turn = Turn(speaker=self.speakers.assign(clip),
+                start=start,
+                end=(self._buffer_start + end) / SAMPLE_RATE)
+    Transcriber._add_segments(turn, self._decode(clip, draft=False))
+    if turn.segments:
+      self.turns.append(turn)
+    return self._caption("final", turn, turn.text)
+
+  def finish(self) -> tuple[list[dict], Path | None]:
+    """Caption what is left, write the artifacts and return (captions, html path).
+
+    Nothing but the audio is written when no speech was captioned.
+    """
+    try:
+      events = self._add(self.decoder.finish(), final=True)
+    finally:
+      self._close_media()
+    if not self.turns:
+      return events, None
+    # One VTT per speaker turn, as the batch pipeline's diarization groups produce
+    turns: list[Turn] = []
+    for turn in self.turns:
+      if turns and turns[-1].speaker == turn.speaker:
+        turns[-1].end = turn.end
+        turns[-1].segments.extend(turn.segments)
+      else:
+        turns.append(turn)
+    for turn in turns:
+      turn.speaker_name = self._caption("final", turn, "")["speaker_name"]
+    result = TranscriptionResult(turns=turns, duration=self.seconds,
+                                 language=self.transcriber.language)
+    return events, write_artifacts(result, self.output_dir, self.basename, self.media_path.name)
+
+  def abort(self) -> None:
+    self.decoder.abort()
+    self._close_media()
+
+  def _close_media(self) -> None:
+    if self._media is not None:
+      self._media.close()
+      self._media = None
+      os.replace(self._media_tmp, self.media_path)
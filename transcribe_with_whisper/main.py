@@ -1,18 +1,33 @@
 import argparse
-import base64
 import html as html_module
 import importlib
+import json
 import os
 import platform
 import re
 import shlex
 import subprocess
 import sys
+import threading
+import time
 import warnings
+from collections import deque
 from functools import lru_cache
 from pathlib import Path
 
 from transcribe_with_whisper import ensure_preflight
+from transcribe_with_whisper.assets import (asset_url, favicon_tag, json_script_tag, script_tag,
+                                            style_tag)
+from transcribe_with_whisper.autotune import load_profile
+from transcribe_with_whisper.cpu_budget import apply_thread_budget
+from transcribe_with_whisper.exports import ensure_export
+from transcribe_with_whisper.file_lock import workdir_lock
+from transcribe_with_whisper.journal import PAUSED_EXIT_CODE, Journal, JobPaused
+from transcribe_with_whisper.manifest import Manifest, input_digest
+from transcribe_with_whisper.partial_transcript import PartialTranscript, partial_path
+from transcribe_with_whisper.presets import PRESETS, get_preset
+from transcribe_with_whisper.timeline import (build_timeline, caption_count, read_timeline,
+                                              timeline_path, write_timeline)
 
 ensure_preflight()
 
@@ -72,24 +87,6 @@ def _find_bundled_ffmpeg() -> str | None:
   return None
 
 
-@lru_cache(maxsize=1)
-def _get_embedded_favicon_data_uri() -> str | None:
-  """Return the data URI for the bundled square logo favicon."""
-  logo_path = Path(
-      __file__).resolve().parent.parent / "branding" / "icon-square.png"
-  if not logo_path.exists():
-    return None
-
-  try:
-    svg_bytes = logo_path.read_bytes()
-  except OSError as exc:
-    print(f"⚠️ Unable to read favicon asset: {exc}")
-    return None
-
-  encoded = base64.b64encode(svg_bytes).decode("ascii")
-  return f"data:image/png;base64,{encoded}"
-
-
 def is_apple_silicon() -> bool:
   """Return True when running on an Apple Silicon Mac."""
   return platform.system() == "Darwin" and platform.machine().lower() in {"arm64", "aarch64"}
@@ -143,11 +140,26 @@ def create_whisper_model(
     device: str | None = None,
     compute_type: str | None = None,
     coreml_units: str | None = None,
+    cpu_threads: int | None = None,
+    num_workers: int | None = None,
 ):
-  """Instantiate WhisperModel with sensible defaults and optional CoreML acceleration."""
+  """Instantiate WhisperModel with sensible defaults and optional CoreML acceleration.
+
+  cpu_threads / num_workers default to WHISPER_CPU_THREADS / WHISPER_NUM_WORKERS
+  (0 and 1 when unset: CTranslate2 picks the thread count, one decode at a time).
+  An autotune profile for this host fills in compute_type "auto" and an unset
+  thread count.
+  """
+  tuned = load_profile(model_size)
   requested_device = (device or "auto").lower()
   requested_compute_type = compute_type or "auto"
   requested_coreml_units = coreml_units.lower() if coreml_units else None
+  if requested_compute_type == "auto" and not requested_coreml_units and tuned.get("compute_type"):
+    requested_compute_type = tuned["compute_type"]
+  if cpu_threads is None:
+    cpu_threads = int(os.getenv("WHISPER_CPU_THREADS") or tuned.get("cpu_threads", 0))
+  if num_workers is None:
+    num_workers = int(os.getenv("WHISPER_NUM_WORKERS", "1") or 1)
 
   if requested_coreml_units and not _has_coreml_extension():
     print("⚠️ CoreML compute units were requested but faster-whisper[coreml] isn't installed. "
@@ -155,6 +167,7 @@ def create_whisper_model(
     requested_coreml_units = None
 
   model_kwargs: dict[str, str] = {}
+  thread_kwargs = {"cpu_threads": cpu_threads, "num_workers": num_workers}
   attempted_coreml = False
 
   if requested_coreml_units:
@@ -180,6 +193,7 @@ def create_whisper_model(
         model_size,
         device=requested_device,
         compute_type=requested_compute_type,
+        **thread_kwargs,
         **model_kwargs,
     )
   except Exception as exc:
@@ -190,7 +204,8 @@ def create_whisper_model(
       resolved_coreml_units = None
       model = WhisperModel(model_size,
                            device=(device or "auto"),
-                           compute_type=(compute_type or "auto"))
+                           compute_type=(compute_type or "auto"),
+                           **thread_kwargs)
     else:
       raise
 
@@ -201,6 +216,8 @@ def create_whisper_model(
   )
   if resolved_coreml_units:
     print(f"CoreML compute units: {resolved_coreml_units}")
+  if cpu_threads:
+    print(f"CPU threads: {cpu_threads}")
 
   return model
 
@@ -240,17 +257,17 @@ def format_time(seconds):
 
 
 def convert_to_wav(inputfile, outputfile):
-  import os
   abs_input = os.path.abspath(inputfile)
   abs_output = os.path.abspath(outputfile)
-  exe_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.getcwd()
-  log_path = os.path.join(exe_dir, "convert_to_wav.log")
+  # The log sits next to the output (the job's working directory) unless frozen
+  log_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.path.dirname(
+      abs_output)
+  log_path = os.path.join(log_dir, "convert_to_wav.log")
 
   def log(msg):
     with open(log_path, "a", encoding="utf-8") as fh:
       fh.write(msg + "\n")
 
-  log(f"[convert_to_wav] cwd: {os.getcwd()}")
   log(f"[convert_to_wav] inputfile: {inputfile}, abs: {abs_input}, exists: {os.path.isfile(inputfile)}"
       )
   log(f"[convert_to_wav] outputfile: {outputfile}, abs: {abs_output}, will create: {not os.path.isfile(outputfile)}"
@@ -262,7 +279,10 @@ def convert_to_wav(inputfile, outputfile):
     ffmpeg_cmd = _find_bundled_ffmpeg() or "ffmpeg"
     log(f"[convert_to_wav] using ffmpeg: {ffmpeg_cmd}")
     try:
-      result = subprocess.run([ffmpeg_cmd, "-i", input_arg, output_arg])
+      # 16 kHz mono matches what both pyannote and Whisper consume, and what the web
+      # server produces when it decodes an upload while it is still arriving.
+      result = subprocess.run(
+          [ffmpeg_cmd, "-i", input_arg, "-ac", "1", "-ar", "16000", output_arg])
       log(f"[convert_to_wav] ffmpeg exited with code {result.returncode}")
       if result.returncode != 0:
         log(f"[convert_to_wav] ffmpeg stderr: {result.stderr}")
@@ -281,15 +301,16 @@ def create_spaced_audio(inputWav, outputWav, spacer_ms=2000):
   audio.export(outputWav, format="wav")
 
 
-def get_diarization(inputWav,
-                    diarizationFile,
-                    num_speakers=None,
-                    min_speakers=None,
-                    max_speakers=None):
-  auth_token = os.getenv("HUGGING_FACE_AUTH_TOKEN")
-  if not auth_token:
-    raise ValueError("HUGGING_FACE_AUTH_TOKEN environment variable is required")
+# Models are loaded once per process and shared by every job running in it.
+# The diarization pipeline keeps per-call state, so calls into it are serialised.
+_diarization_lock = threading.Lock()
+_model_load_lock = threading.Lock()
+_batcher_lock = threading.Lock()
+
 
+@lru_cache(maxsize=2)
+def load_diarization_pipeline(auth_token: str):
+  """Load (once per token) the pyannote pipeline matching the installed pyannote.audio."""
   # Use appropriate API based on pyannote.audio version
   if _PYANNOTE_MAJOR >= 4:
     # pyannote.audio 4.0.0+ API
@@ -301,8 +322,36 @@ def get_diarization(inputWav,
                                         use_auth_token=auth_token)
 
   _maybe_move_pipeline_to_mps(pipeline)
+  return pipeline
+
+
+@lru_cache(maxsize=4)
+def _cached_whisper_model(model_size, device, compute_type, coreml_units):
+  return create_whisper_model(model_size,
+                              device=device,
+                              compute_type=compute_type,
+                              coreml_units=coreml_units)
+
+
+def get_whisper_model(model_size="base", device="auto", compute_type="auto", coreml_units=None):
+  """Return a process-wide WhisperModel for these settings, loading it on first use."""
+  with _model_load_lock:
+    return _cached_whisper_model(model_size, device, compute_type, coreml_units)
+
+
+def get_diarization(inputWav,
+                    diarizationFile,
+                    num_speakers=None,
+                    min_speakers=None,
+                    max_speakers=None):
+  auth_token = os.getenv("HUGGING_FACE_AUTH_TOKEN")
+  if not auth_token:
+    raise ValueError("HUGGING_FACE_AUTH_TOKEN environment variable is required")
 
   if not os.path.isfile(diarizationFile):
+    with _model_load_lock:
+      pipeline = load_diarization_pipeline(auth_token)
+
     # Add progress hook to report diarization progress
     def progress_hook(step_name=None, step_artifact=None, file=None, total=None, completed=None):
       """Progress callback for diarization pipeline"""
@@ -332,14 +381,18 @@ def get_diarization(inputWav,
     if _HAS_TORCHAUDIO:
       # Load audio into memory for faster processing
       waveform, sample_rate = torchaudio.load(inputWav)
-      dz = pipeline({"waveform": waveform, "sample_rate": sample_rate}, **pipeline_params)
+      audio_input = {"waveform": waveform, "sample_rate": sample_rate}
     else:
       # Fallback to file path if torchaudio is not available
-      dz = pipeline({"uri": "blabla", "audio": inputWav}, **pipeline_params)
+      audio_input = {"uri": Path(inputWav).stem, "audio": inputWav}
+    with _diarization_lock:
+      dz = pipeline(audio_input, **pipeline_params)
     # In pyannote.audio 4.0, pipeline returns an object with .speaker_diarization attribute
     diarization = dz.speaker_diarization if hasattr(dz, 'speaker_diarization') else dz
-    with open(diarizationFile, "w") as f:
+    tmp_file = f"{diarizationFile}.tmp"
+    with open(tmp_file, "w") as f:
       f.write(str(diarization))
+    os.replace(tmp_file, diarizationFile)
   with open(diarizationFile) as f:
     return f.read().splitlines()
 
@@ -362,40 +415,210 @@ def group_segments(dzs):
   return groups
 
 
-def export_segments_audio(groups, inputWav, spacermilli=2000):
+def export_segments_audio(groups, inputWav, spacermilli=2000, workdir=None, skip_transcribed=False):
+  """Write one WAV per speaker group (``0.wav``, ``1.wav``, ...) into workdir.
+
+  workdir defaults to the directory containing inputWav. With skip_transcribed,
+  groups that already have a VTT (e.g. when resuming) aren't exported again.
+  """
+  workdir = Path(workdir) if workdir is not None else Path(inputWav).parent
   audio = AudioSegment.from_wav(inputWav)
   segment_files = []
   for idx, g in enumerate(groups):
     start = millisec(re.findall(r"[0-9]+:[0-9]+:[0-9]+\.[0-9]+", g[0])[0])
     end = millisec(re.findall(r"[0-9]+:[0-9]+:[0-9]+\.[0-9]+", g[-1])[1])
-    audio[start:end].export(f"{idx}.wav", format="wav")
-    segment_files.append(f"{idx}.wav")
+    segment_file = str(workdir / f"{idx}.wav")
+    if not (skip_transcribed and (workdir / f"{idx}.vtt").exists()):
+      audio[start:end].export(segment_file, format="wav")
+    segment_files.append(segment_file)
   return segment_files
 
 
+def _write_vtt(vtt_file, segments):
+  tmp_file = f"{vtt_file}.tmp"
+  with open(tmp_file, "w", encoding="utf-8") as out:
+    out.write("WEBVTT\n\n")
+    for s in segments:
+      out.write(f"{format_time(s.start)} --> {format_time(s.end)}\n{s.text.strip()}\n\n")
+  os.replace(tmp_file, vtt_file)
+
+
+# Progressive mode: captions from the quick first pass, and how often the HTML is
+# rewritten while the second pass replaces them
+DRAFT_VTT_SUFFIX = ".draft.vtt"
+PROGRESSIVE_PUBLISH_SECONDS = float(os.getenv("PROGRESSIVE_PUBLISH_SECONDS", "15"))
+# Transcripts with at least this many captions get the virtualised viewer
+VIRTUAL_VIEWER_MIN_CAPTIONS = int(os.getenv("VIRTUAL_VIEWER_MIN_CAPTIONS", "2000"))
+
+
+def asr_batching_enabled() -> bool:
+  """Batched decoding through the shared AsrBatcher (ASR_BATCHING=1)."""
+  return os.getenv("ASR_BATCHING", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+@lru_cache(maxsize=4)
+def _cached_asr_batcher(model_size, device, compute_type, coreml_units, language, beam_size,
+                        vad_filter, batch_size):
+  from transcribe_with_whisper.asr_batcher import AsrBatcher
+
+  model = get_whisper_model(model_size, device, compute_type, coreml_units)
+  return AsrBatcher(model,
+                    batch_size=batch_size or int(os.getenv("ASR_BATCH_SIZE", "8")),
+                    max_latency=float(os.getenv("ASR_BATCH_LATENCY_MS", "50")) / 1000,
+                    language=language,
+                    **decode_options(model_size, beam_size, vad_filter))
+
+
+def decode_options(model_size, beam_size=None, vad_filter=None):
+  """Keyword arguments for model.transcribe: explicit settings (e.g. from a preset) first,
+  then this host's autotune profile."""
+  options = {}
+  beam_size = beam_size or load_profile(model_size).get("beam_size")
+  if beam_size:
+    options["beam_size"] = beam_size
+  if vad_filter is not None:
+    options["vad_filter"] = vad_filter
+  return options
+
+
+def get_asr_batcher(model_size="base",
+                    device="auto",
+                    compute_type="auto",
+                    coreml_units=None,
+                    language="en",
+                    beam_size=None,
+                    vad_filter=None,
+                    batch_size=None):
+  """Return the process-wide batching service for this model; every job in the process shares it."""
+  with _batcher_lock:
+    return _cached_asr_batcher(model_size, device, compute_type, coreml_units, language,
+                               beam_size, vad_filter, batch_size)
+
+
 def transcribe_segments(segment_files,
                         model_size="base",
                         device="auto",
                         compute_type="auto",
                         coreml_units=None,
                         speaker_header=False,
-                        speaker_inline=True):
-  model = create_whisper_model(model_size,
-                               device=device,
-                               compute_type=compute_type,
-                               coreml_units=coreml_units)
+                        speaker_inline=True,
+                        batched=None,
+                        journal=None,
+                        beam_size=None,
+                        vad_filter=None,
+                        batch_size=None,
+                        vtt_suffix=".vtt",
+                        verbs=("Transcribing", "Completed"),
+                        on_segment=None):
+  """Transcribe each segment WAV into a VTT next to it and return the VTT paths.
+
+  on_segment(index, vtt_file) is called as each VTT is written; verbs label the
+  progress lines ("Transcribing segment i/n" / "Completed segment i/n").
+  """
+  vtt_files = [str(Path(f).with_suffix(vtt_suffix)) for f in segment_files]
+  if all(os.path.isfile(v) for v in vtt_files):
+    return vtt_files
   total_segments = len(segment_files)
-  for idx, f in enumerate(segment_files, start=1):
-    vtt_file = f"{Path(f).stem}.vtt"
+  if batched if batched is not None else asr_batching_enabled():
+    batcher = get_asr_batcher(model_size,
+                              device,
+                              compute_type,
+                              coreml_units,
+                              beam_size=beam_size,
+                              vad_filter=vad_filter,
+                              batch_size=batch_size)
+    _transcribe_segments_batched(segment_files, vtt_files, batcher, journal, verbs, on_segment)
+    return vtt_files
+
+  model = get_whisper_model(model_size, device, compute_type, coreml_units)
+  options = decode_options(model_size, beam_size, vad_filter)
+  for idx, (f, vtt_file) in enumerate(zip(segment_files, vtt_files), start=1):
     if not os.path.isfile(vtt_file):
-      print(f"Transcribing segment {idx}/{total_segments}: {f}", flush=True)
-      segments, _ = model.transcribe(f, language="en")
-      with open(vtt_file, "w", encoding="utf-8") as out:
-        out.write("WEBVTT\n\n")
-        for s in segments:
-          out.write(f"{format_time(s.start)} --> {format_time(s.end)}\n{s.text.strip()}\n\n")
-      print(f"Completed segment {idx}/{total_segments}", flush=True)
-  return [f"{Path(f).stem}.vtt" for f in segment_files]
+      if journal is not None:
+        journal.checkpoint(f"segment {idx}/{total_segments}")
+      print(f"{verbs[0]} segment {idx}/{total_segments}: {Path(f).name}", flush=True)
+      segments, _ = model.transcribe(f, language="en", **options)
+      _write_vtt(vtt_file, segments)
+      if journal is not None:
+        journal.mark_segment(idx - 1, total_segments)
+      print(f"{verbs[1]} segment {idx}/{total_segments}", flush=True)
+      if on_segment is not None:
+        on_segment(idx - 1, vtt_file)
+  return vtt_files
+
+
+def _transcribe_segments_batched(segment_files,
+                                 vtt_files,
+                                 batcher,
+                                 journal=None,
+                                 verbs=("Transcribing", "Completed"),
+                                 on_segment=None):
+  """Submit every missing segment at once; the batcher mixes them with other jobs' segments."""
+  from faster_whisper import decode_audio
+
+  total_segments = len(segment_files)
+  todo = [(idx, f, vtt_file)
+          for idx, (f, vtt_file) in enumerate(zip(segment_files, vtt_files), start=1)
+          if not os.path.isfile(vtt_file)]
+  # Keep a few batches' worth in flight so long files don't hold all their features in memory
+  max_in_flight = max(4, 2 * batcher.batch_size)
+  in_flight = deque()
+
+  def drain(keep):
+    while len(in_flight) > keep:
+      idx, f, vtt_file, future = in_flight.popleft()
+      segments = future.result()
+      print(f"{verbs[0]} segment {idx}/{total_segments}: {Path(f).name}", flush=True)
+      _write_vtt(vtt_file, segments)
+      if journal is not None:
+        journal.mark_segment(idx - 1, total_segments)
+      print(f"{verbs[1]} segment {idx}/{total_segments}", flush=True)
+      if on_segment is not None:
+        on_segment(idx - 1, vtt_file)
+
+  for idx, f, vtt_file in todo:
+    if journal is not None and journal.pause_requested():
+      break  # finish what the batcher already has, then pause below
+    in_flight.append((idx, f, vtt_file, batcher.submit(decode_audio(f))))
+    drain(max_in_flight - 1)
+  drain(0)
+  remaining = sum(1 for v in vtt_files if not os.path.isfile(v))
+  if journal is not None and remaining:
+    journal.checkpoint(f"segment {total_segments - remaining + 1}/{total_segments}")
+
+
+def group_captions(group, vtt_file, spacermilli=2000):
+  """Read a segment's VTT and place its captions on the original media's timeline.
+
+  Returns dicts with absolute ``start``/``end`` seconds, the VTT-relative
+  ``vtt_start``/``vtt_end`` and the caption ``text``.
+  """
+  # Use the actual start time of the diarization segment, not offset by spacermilli
+  shift = millisec(re.findall(r"[0-9]+:[0-9]+:[0-9]+\.[0-9]+", group[0])[0])
+  spacer_offset_sec = spacermilli / 1000.0
+  captions = []
+  for c in webvtt.read(vtt_file):
+    # VTT timestamps are relative to the audio segment, need to add diarization segment start time
+    vtt_start_sec = int(millisec(c.start)) / 1000
+    vtt_end_sec = int(millisec(c.end)) / 1000
+
+    # Add the diarization segment start time to get absolute video time
+    raw_start = vtt_start_sec + (shift / 1000) - spacer_offset_sec
+    raw_end = vtt_end_sec + (shift / 1000) - spacer_offset_sec
+
+    absolute_start_sec = max(0.0, raw_start)
+    # Normalize tiny offsets that stem from the spacer padding
+    if absolute_start_sec < 0.5 and vtt_start_sec == 0:
+      absolute_start_sec = 0.0
+
+    captions.append({
+        "start": absolute_start_sec,
+        "end": max(absolute_start_sec, raw_end),
+        "vtt_start": vtt_start_sec,
+        "vtt_end": vtt_end_sec,
+        "text": c.text,
+    })
+  return captions
 
 
 def generate_html(
@@ -410,12 +633,22 @@ def generate_html(
     spacermilli=2000,
     called_by_mercuryweb=False,
     mercury_command: str | None = None,
+    standalone=True,
 ):
+  """Write the HTML transcript.
+
+  standalone=True inlines the stylesheet, scripts and icon (and, for a
+  virtualised transcript, the timeline) so the page works as a single file;
+  otherwise it links the shared, content-hashed /assets the web server provides.
+
+  Returns the transcript's timeline (see timeline.build_timeline), from which
+  the other formats are written without parsing the HTML back.
+  """
   # video_title is inputfile with no extension
   video_title = os.path.splitext(inputfile)[0]
   html = []
-  favicon_href = _get_embedded_favicon_data_uri()
-  favicon_tag = f"\n    <link rel=\"icon\" type=\"image/svg+xml\" href=\"{favicon_href}\">" if favicon_href else ""
+  icon = favicon_tag(standalone)
+  icon_tag = f"\n    {icon}" if icon else ""
   generator_source = "mercuryweb" if called_by_mercuryweb else "transcribe-with-whisper"
   generator_meta_tag = f"\n    <meta name=\"generator\" content=\"{generator_source} {get_package_version()}\">"
   command_meta_tag = ""
@@ -435,184 +668,7 @@ def generate_html(
     escaped_command = html_module.escape(mercury_command, quote=True)
     command_meta_tag = f"\n    <meta name=\"mercuryscribe-command\" content=\"{escaped_command}\">"
 
-  preS = f"""<!DOCTYPE html>\n<html lang=\"en\">\n  <head>\n    <meta charset=\"UTF-8\">\n    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n    <meta http-equiv=\"X-UA-Compatible\" content=\"ie=edge\">\n    <title>{inputfile}</title>{favicon_tag}{generator_meta_tag}{command_meta_tag}{section_meta_tag}{inline_meta_tag}{speaker_meta_tags}\n    <style>
-        body {{
-            font-family: sans-serif;
-            font-size: 18px;
-            color: #111;
-            padding: 0 0 1em 0;
-	        background-color: #efe7dd;
-        }}
-        table {{
-             border-spacing: 10px;
-        }}
-        th {{ text-align: left;}}
-        .lt {{
-          color: inherit;
-          text-decoration: inherit;
-        }}
-        .l {{
-          color: #050;
-        }}
-        .s {{
-            display: inline-block;
-        }}
-        .c {{
-            display: inline-block;
-        }}
-        .e {{
-            border-radius: 20px;
-            width: fit-content;
-            height: fit-content;
-            padding: 5px 30px 5px 30px;
-            font-size: 18px;
-            display: flex;
-            flex-direction: column;
-            margin-bottom: 10px;
-        }}
-
-        .t {{
-            display: inline-block;
-        }}
-        #video-header {{
-            position: fixed;
-            top: 0;
-            left: 0;
-            right: 0;
-            width: 100%;
-            background: #efe7dd;
-            z-index: 1000;
-            padding: 12px 24px;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-            display: flex;
-            flex-direction: column;
-            gap: 12px;
-        }}
-        #video-header .page-title {{
-            text-align: center;
-            margin: 0;
-            font-size: 1.5rem;
-        }}
-        .header-main {{
-            display: flex;
-            align-items: flex-start;
-            justify-content: flex-start;
-            gap: 16px;
-        }}
-        .media-wrapper {{
-            flex: 0 1 auto;
-            display: flex;
-            justify-content: flex-start;
-        }}
-        #player {{
-            max-height: min(28vh, 320px);
-            width: clamp(280px, 40vw, 540px);
-            height: auto;
-            border: none;
-        }}
-        #content {{
-            margin-top: max(calc(28vh + 120px), 360px);
-        }}
-        .timestamp {{
-            color: #666;
-            font-size: 14px;
-            font-weight: bold;
-        }}
-        .speaker-name {{
-            font-weight: bold;
-            margin-right: 8px;
-        }}
-        
-        /* Edit mode styles */
-        .edit-controls {{
-            display: flex;
-            flex-direction: column;
-            gap: 6px;
-            justify-content: flex-start;
-            align-items: stretch;
-            margin: 0;
-        }}
-        .edit-btn {{
-            background: #007bff;
-            color: white;
-            border: none;
-            padding: 8px 16px;
-            border-radius: 4px;
-            cursor: pointer;
-            margin: 0;
-            font-size: 14px;
-            width: 100%;
-            text-align: left;
-        }}
-        .edit-btn:hover {{
-            background: #0056b3;
-        }}
-        .edit-btn.active {{
-            background: #28a745;
-        }}
-        .edit-btn:disabled {{
-            background: #6c757d;
-            cursor: not-allowed;
-        }}
-        .save-status {{
-            display: inline-block;
-            margin-left: 10px;
-            padding: 4px 8px;
-            border-radius: 4px;
-            font-size: 12px;
-        }}
-        .save-success {{
-            background: #d4edda;
-            color: #155724;
-        }}
-        .save-error {{
-            background: #f8d7da;
-            color: #721c24;
-        }}
-        
-        /* Editable transcript styles */
-        .transcript-segment {{
-            position: relative;
-        }}
-        .transcript-segment.editable {{
-            border: 1px dashed #007bff;
-            border-radius: 4px;
-            margin: 2px 0;
-        }}
-        .transcript-segment.editable:hover {{
-            background-color: #f8f9fa;
-        }}
-        .transcript-segment.editing {{
-            background-color: #fff3cd;
-            border: 2px solid #ffc107;
-        }}
-        .transcript-text {{
-            cursor: text;
-        }}
-        .transcript-segment.editable .transcript-text {{
-            min-height: 1.2em;
-            padding: 2px 4px;
-            border-radius: 2px;
-        }}
-        .transcript-text[contenteditable="true"] {{
-            outline: none;
-            background: #fffbf0;
-            border: 1px solid #ffc107;
-            border-radius: 2px;
-        }}
-        
-        /* Hide server-dependent buttons when viewing as local file */
-        .local-file-mode #edit-mode-btn,
-        .local-file-mode #edit-speakers-btn,
-        .local-file-mode #reprocess-btn,
-        .local-file-mode #back-to-list-btn {{
-            display: none !important;
-        }}
-
-        /* When editing, hide all buttons except Save Changes */
-    .editing .edit-controls button {{ display: none !important; }}
-    .editing .edit-controls #save-btn {{ display: inline-block !important; }}
-    </style>
+  preS = f"""<!DOCTYPE html>\n<html lang=\"en\">\n  <head>\n    <meta charset=\"UTF-8\">\n    <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n    <meta http-equiv=\"X-UA-Compatible\" content=\"ie=edge\">\n    <title>{inputfile}</title>{icon_tag}{generator_meta_tag}{command_meta_tag}{section_meta_tag}{inline_meta_tag}{speaker_meta_tags}\n    {style_tag(standalone)}
 </head>
   <body>
    """ + f"""
@@ -641,11 +697,23 @@ def generate_html(
   html.append(preS)
   def_boxclr, def_spkrclr = "white", "orange"
 
-  for idx, g in enumerate(groups):
-    # Use the actual start time of the diarization segment, not offset by spacermilli
-    shift = millisec(re.findall(r"[0-9]+:[0-9]+:[0-9]+\.[0-9]+", g[0])[0])
-    spacer_offset_sec = spacermilli / 1000.0
-    speaker = g[0].split()[-1]
+  turns = [(g[0].split()[-1], Path(vtt_files[idx]).name,
+            group_captions(g, vtt_files[idx], spacermilli)) for idx, g in enumerate(groups)]
+  timeline = build_timeline(inputfile, speakers, turns)
+  basename = Path(outputHtml).stem
+  sidecar = timeline_path(Path(vtt_files[0]).parent, basename) if vtt_files else None
+  if sidecar is not None:
+    write_timeline(sidecar, timeline)
+  # Long transcripts are rendered from the sidecar, a window at a time, by the viewer script
+  virtual = sidecar is not None and caption_count(timeline) >= VIRTUAL_VIEWER_MIN_CAPTIONS
+  if virtual:
+    sidecar_url = Path(os.path.relpath(sidecar.resolve(),
+                                       Path(outputHtml).resolve().parent)).as_posix()
+    html.append(f'    <div id="transcript" data-basename="{html_module.escape(basename, quote=True)}" '
+                f'data-timeline="{html_module.escape(sidecar_url, quote=True)}"></div>')
+
+  cue_starts = []
+  for speaker, vtt_filename, captions in ([] if virtual else turns):
     spkr_name, boxclr, spkrclr = speakers.get(speaker, (speaker, def_boxclr, def_spkrclr))
     escaped_speaker_id = html_module.escape(speaker, quote=True)
     escaped_speaker_name = html_module.escape(spkr_name, quote=True)
@@ -653,24 +721,9 @@ def generate_html(
                 f'data-speaker-name="{escaped_speaker_name}" style="background-color:{boxclr}">')
     if speaker_section:
       html.append(f'      <span style="color:{spkrclr}">{spkr_name}</span><br>')
-    captions = [[int(millisec(c.start)), int(millisec(c.end)), c.text]
-                for c in webvtt.read(vtt_files[idx])]
-    vtt_filename = Path(vtt_files[idx]).name
     for ci, c in enumerate(captions):
-      # VTT timestamps are relative to the audio segment, need to add diarization segment start time
-      vtt_start_sec = c[0] / 1000  # VTT timestamp in seconds
-      vtt_end_sec = c[1] / 1000
-
-      # Add the diarization segment start time to get absolute video time
-      raw_start = vtt_start_sec + (shift / 1000) - spacer_offset_sec
-      raw_end = vtt_end_sec + (shift / 1000) - spacer_offset_sec
-
-      absolute_start_sec = max(0.0, raw_start)
-      # Normalize tiny offsets that stem from the spacer padding
-      if absolute_start_sec < 0.5 and vtt_start_sec == 0:
-        absolute_start_sec = 0.0
-
-      absolute_end_sec = max(absolute_start_sec, raw_end)
+      vtt_start_sec, vtt_end_sec = c["vtt_start"], c["vtt_end"]
+      absolute_start_sec, absolute_end_sec = c["start"], c["end"]
 
       startStr = f"{int(absolute_start_sec//3600):02d}:{int((absolute_start_sec%3600)//60):02d}:{absolute_start_sec%60:05.2f}"
       endStr = f"{int(absolute_end_sec//3600):02d}:{int((absolute_end_sec%3600)//60):02d}:{absolute_end_sec%60:05.2f}"
@@ -686,393 +739,45 @@ def generate_html(
         html.append(f'        <span class="speaker-name">{spkr_name}: </span>')
       html.append(f'        <span class="timestamp">[{timestamp}] </span>')
       html.append(
-          f'        <span class="transcript-text"><a href="#{startStr}" class="lt" onclick="jumptoTime({int(absolute_start_sec)})">{c[2]}</a></span>'
+          f'        <span class="transcript-text"><a href="#{startStr}" class="lt" onclick="jumptoTime({int(absolute_start_sec)})">{c["text"]}</a></span>'
       )
       html.append('      </div>')
+      # Highlighting binary-searches these, so keep them non-decreasing in page order
+      cue_starts.append(max(absolute_start_sec, cue_starts[-1] if cue_starts else 0.0))
     html.append("    </div>")
   html.append(
       "  </div> <!-- end of class e and speaker segments -->\n    </div> <!-- end of content -->")
-
-  # Add JavaScript at the end of the body for proper DOM loading
-  javascript_code = """
-    <script>
-      console.log('Loading video highlight script...');
-      
-      // Detect if viewing as local file and hide server-dependent buttons
-      if (window.location.protocol === 'file:') {
-          console.log('Detected local file mode - hiding server-dependent buttons');
-          document.body.classList.add('local-file-mode');
-      }
-      
-      function jumptoTime(time){
-          var v = document.getElementsByTagName('video')[0];
-          // Jump directly to the exact time (no offset)
-          console.log("jumping to time:", time);
-          if (v) {
-              v.currentTime = time;
-          }
-      }
-
-      // Track current segment highlighting
-      var currentHighlighted = null;
-
-      function highlightCurrentSegment() {
-          var v = document.getElementsByTagName('video')[0];
-          if (!v) {
-              console.log('Video element not found');
-              return;
-          }
-          
-          var currentTime = v.currentTime;
-          // Use the current time directly (no offset)
-          console.log('Current video time:', currentTime);
-          
-          // Find all clickable transcript segments
-          var segments = document.querySelectorAll('a.lt[onclick]');
-          console.log('Found segments:', segments.length);
-          
-          var targetSegment = null;
-          
-          // Find the segment that should be highlighted based on adjusted video time
-          for (var i = 0; i < segments.length; i++) {
-              var onclick = segments[i].getAttribute('onclick');
-              if (!onclick) continue;
-              
-              var match = onclick.match(/jumptoTime\\((\\d+)\\)/);
-              if (!match) continue;
-              
-              var segmentTime = parseInt(match[1]);
-              
-              // Check if this is the current or most recent segment
-              if (segmentTime <= currentTime) {
-                  targetSegment = segments[i];
-              } else {
-                  break; // segments are in chronological order
-              }
-          }
-          
-          // Only update highlighting if we're switching to a different segment
-          if (targetSegment !== currentHighlighted) {
-              // Remove previous highlighting
-              if (currentHighlighted) {
-                  currentHighlighted.style.backgroundColor = '';
-                  currentHighlighted.style.fontWeight = '';
-                  console.log('Removed previous highlight');
-              }
-              
-              // Highlight new segment
-              if (targetSegment) {
-                  targetSegment.style.backgroundColor = '#ffeb3b';
-                  targetSegment.style.fontWeight = 'bold';
-                  currentHighlighted = targetSegment;
-                  console.log('Highlighted new segment:', targetSegment.textContent.substring(0, 50) + '...');
-                  
-                  // Scroll to keep current segment visible
-                  targetSegment.scrollIntoView({
-                      behavior: 'smooth',
-                      block: 'center'
-                  });
-              }
-          }
-      }
-
-      // Initialize when DOM is ready
-      function initializeVideoTracking() {
-          console.log('Initializing video tracking...');
-          var v = document.getElementsByTagName('video')[0];
-          if (v) {
-              console.log('Video found, adding event listeners');
-              // Update highlighting as video plays
-              v.addEventListener('timeupdate', highlightCurrentSegment);
-              
-              // Also update when user seeks
-              v.addEventListener('seeked', highlightCurrentSegment);
-              
-              // Initial highlight check
-              setTimeout(highlightCurrentSegment, 100);
-          } else {
-              console.log('Video not found, retrying in 500ms');
-              setTimeout(initializeVideoTracking, 500);
-          }
-      }
-      
-      // Edit mode functionality
-      let editMode = false;
-      let originalContent = {};
-      
-      function toggleEditMode() {
-          editMode = !editMode;
-          const editButton = document.querySelector('#edit-mode-btn');
-          const saveButton = document.querySelector('#save-btn');
-          const cancelButton = document.querySelector('#cancel-btn');
-          const body = document.body;
-          const segments = document.querySelectorAll('.transcript-segment');
-          
-          if (editMode) {
-              // Enter edit mode
-              body.classList.add('editing');
-              editButton.textContent = '📝 Editing...';
-              // Let CSS control button visibility in edit mode
-              saveButton.style.display = 'inline-block';
-              // Intentionally keep cancel hidden; only Save should show while editing
-              
-              // Store original content and make segments editable
-              segments.forEach(segment => {
-                  // Store only the transcript text content, not timestamp/speaker
-                  const transcriptTextSpan = segment.querySelector('.transcript-text');
-                  originalContent[segment.dataset.start] = transcriptTextSpan ? transcriptTextSpan.textContent : '';
-                  
-                  // Make only the transcript-text span editable, not the whole segment
-                  const textSpan = segment.querySelector('.transcript-text');
-                  if (textSpan) {
-                      textSpan.contentEditable = true;
-                  }
-                  segment.classList.add('editable');
-              });
-          } else {
-              // Exit edit mode
-              body.classList.remove('editing');
-              editButton.textContent = '📝 Edit Mode';
-              saveButton.style.display = 'none';
-              // Keep cancel hidden
-              
-              // Make segments non-editable
-              segments.forEach(segment => {
-                  const textSpan = segment.querySelector('.transcript-text');
-                  if (textSpan) {
-                      textSpan.contentEditable = false;
-                  }
-                  segment.classList.remove('editable');
-              });
-              
-              originalContent = {};
-          }
-      }
-      
-      function saveChanges() {
-          const segments = document.querySelectorAll('.transcript-segment');
-          const changes = [];
-          
-          segments.forEach(segment => {
-              const start = segment.dataset.start;
-              const end = segment.dataset.end;
-              const speaker = segment.dataset.speaker || '';
-              const vttFile = segment.dataset.vttFile || '';
-              const vttStart = segment.dataset.vttStart || '';
-              const vttEnd = segment.dataset.vttEnd || '';
-              const captionIdx = segment.dataset.captionIdx || '';
-              
-              // Extract only the text from the transcript-text span, not the timestamp and speaker
-              const transcriptTextSpan = segment.querySelector('.transcript-text');
-              const newText = transcriptTextSpan ? transcriptTextSpan.textContent.trim() : '';
-              const originalText = originalContent[start] || '';
-              
-              if (newText !== originalText) {
-                  changes.push({
-                      // absolute timings are still included for UI uses, but server will rely on VTT-local hints
-                      start: start,
-                      end: end,
-                      speaker: speaker,
-                      text: newText,
-                      originalText: originalText,
-                      vttFile: vttFile,
-                      vttStart: vttStart,
-                      vttEnd: vttEnd,
-                      captionIdx: captionIdx
-                  });
-              }
-          });
-          
-          if (changes.length === 0) {
-              alert('No changes detected.');
-              toggleEditMode();
-              return;
-          }
-          
-          // Send changes to server
-          const videoFile = window.location.pathname.split('/').pop().replace('.html', '');
-          
-          fetch(`/save_transcript_edits/${videoFile}`, {
-              method: 'POST',
-              headers: {
-                  'Content-Type': 'application/json'
-              },
-              body: JSON.stringify({ changes: changes })
-          })
-          .then(response => response.json())
-          .then(data => {
-              if (data.success) {
-                  alert('Changes saved to VTT files! To see your changes in the HTML, click "Reprocess".');
-                  toggleEditMode(); // Exit edit mode
-              } else {
-                  alert('Error saving changes: ' + (data.error || 'Unknown error'));
-              }
-          })
-          .catch(error => {
-              console.error('Error saving changes:', error);
-              alert('Error saving changes: ' + error.message);
-          });
-      }
-      
-      function cancelEdits() {
-          if (confirm('Are you sure you want to cancel all edits?')) {
-              const segments = document.querySelectorAll('.transcript-segment');
-              
-              // Restore original content
-              segments.forEach(segment => {
-                  const start = segment.dataset.start;
-                  if (originalContent[start]) {
-                      const textSpan = segment.querySelector('.transcript-text');
-                      if (textSpan) {
-                          textSpan.textContent = originalContent[start];
-                      }
-                  }
-              });
-              
-              toggleEditMode();
-          }
-      }
-      
-      function reprocessFile() {
-          if (confirm('This will reprocess the current video file. This may take several minutes. Continue?')) {
-              // Extract filename from current URL or use a data attribute
-              const videoElement = document.querySelector('video source');
-              if (videoElement) {
-                  const videoSrc = videoElement.src;
-                  const filename = videoSrc.substring(videoSrc.lastIndexOf('/') + 1);
-                  
-                  // Create a form and submit it like the working version on the main page
-                  const form = document.createElement('form');
-                  form.method = 'post';
-                  form.action = '/rerun';
-                  
-                  const input = document.createElement('input');
-                  input.type = 'hidden';
-                  input.name = 'filename';
-                  input.value = filename;
-                  
-                  form.appendChild(input);
-                  document.body.appendChild(form);
-                  form.submit();
-              } else {
-                  alert('Could not determine video filename');
-              }
-          }
-      }
-      
-      function goBackToList() {
-          window.location.href = '/list';
-      }
-      
-      function editSpeakers() {
-          // Extract current speakers from the page
-          const speakerBlocks = document.querySelectorAll('.e[data-speaker-id]');
-          const speakers = [];
-          const seenSpeakerIds = new Set();
-          
-          speakerBlocks.forEach(block => {
-              const speakerId = block.dataset.speakerId;
-              if (!speakerId || seenSpeakerIds.has(speakerId)) {
-                  return;
-              }
-              seenSpeakerIds.add(speakerId);
-              const speakerName = (block.dataset.speakerName || speakerId).trim();
-              if (speakerName) {
-                  speakers.push(speakerName);
-              }
-          });
-          
-          if (speakers.length === 0) {
-              alert('No speakers found in transcript');
-              return;
-          }
-          
-          // Create a simple dialog for editing speaker names
-          let dialogContent = 'Edit Speaker Names:\\n\\n';
-          const newNames = [];
-          
-          for (let i = 0; i < speakers.length; i++) {
-              const currentName = speakers[i];
-              const newName = prompt(dialogContent + `Speaker ${i+1} (currently "${currentName}"):`);
-              
-              if (newName === null) {
-                  // User cancelled
-                  return;
-              }
-              
-              newNames.push(newName.trim() || currentName);
-              dialogContent += `Speaker ${i+1}: "${newNames[i]}"\\n`;
-          }
-          
-          // Show confirmation
-          const confirmed = confirm(
-              'Update speakers with these names?\\n\\n' + 
-              speakers.map((old, i) => `"${old}" → "${newNames[i]}"`).join('\\n') +
-              '\\n\\nThis will reprocess the file with updated speaker names.'
-          );
-          
-          if (confirmed) {
-              updateSpeakersAndReprocess(speakers, newNames);
-          }
-      }
-      
-      function updateSpeakersAndReprocess(oldNames, newNames) {
-          const videoElement = document.querySelector('video source');
-          if (!videoElement) {
-              alert('Could not determine video filename');
-              return;
-          }
-          
-          const videoSrc = videoElement.src;
-          const filename = videoSrc.substring(videoSrc.lastIndexOf('/') + 1);
-          const basename = filename.replace(/\\.[^/.]+$/, ""); // Remove extension
-          
-          // Create speaker mapping
-          const speakerMapping = {};
-          for (let i = 0; i < oldNames.length; i++) {
-              speakerMapping[oldNames[i]] = newNames[i];
-          }
-          
-          // Send update request
-          fetch('/update-speakers', {
-              method: 'POST',
-              headers: {
-                  'Content-Type': 'application/json',
-              },
-              body: JSON.stringify({
-                  filename: basename,
-                  speakers: speakerMapping
-              })
-          })
-          .then(response => response.json())
-          .then(data => {
-              if (data.success) {
-                  alert('Speaker names updated! Reprocessing file...');
-                  // Now reprocess with updated speakers
-                  reprocessFile();
-              } else {
-                  alert('Error updating speakers: ' + (data.message || 'Unknown error'));
-              }
-          })
-          .catch(error => {
-              console.error('Error:', error);
-              alert('Error updating speakers: ' + error.message);
-          });
-      }
-      
-      // Start initialization when DOM loads
-      if (document.readyState === 'loading') {
-          document.addEventListener('DOMContentLoaded', initializeVideoTracking);
-      } else {
-          initializeVideoTracking();
-      }
-    </script>
-  </body>
-</html>"""
-
-  html.append(javascript_code)
+  if not virtual:
+    html.append("    " + json_script_tag("cue-starts", json.dumps(cue_starts)))
+
+  if virtual and standalone:
+    # A single-file page can't count on fetching the sidecar (file:// blocks it)
+    html.append("    " + json_script_tag("timeline-data", json.dumps(timeline, separators=(",", ":"))))
+  # Scripts at the end of the body, once the transcript is in the DOM
+  if virtual:
+    html.append("    " + script_tag("viewer.js", standalone))
+  html.append("    " + script_tag("transcript.js", standalone))
+  html.append("  </body>\n</html>")
   with open(outputHtml, "w", encoding="utf-8") as f:
     f.write("\n".join(html))
+  return timeline
+
+
+def discard_previous_work(workdir, basename, input_path):
+  """Remove results derived from an earlier version of the input file (speaker names are kept)."""
+  workdir = Path(workdir)
+  stale = [workdir / f"{basename}-diarization.txt", workdir / f"{basename}-spaced.wav"]
+  stale += [p for p in workdir.glob("*.vtt") if p.stem.isdigit()]
+  stale += workdir.glob(f"*{DRAFT_VTT_SUFFIX}")
+  stale += [p for p in workdir.glob("*.wav") if p.stem.isdigit()]
+  cache = workdir / f"{basename}.cache.wav"
+  try:
+    # The web server may already have decoded the new upload into the cache
+    if cache.stat().st_mtime < Path(input_path).stat().st_mtime:
+      stale.append(cache)
+  except OSError:
+    pass
+  cleanup(stale)
 
 
 def cleanup(files):
@@ -1081,14 +786,16 @@ def cleanup(files):
       os.remove(f)
 
 
-def get_speaker_config_path(basename):
+def get_speaker_config_path(basename, workdir=None):
   """Get the path to the speaker configuration file"""
+  if workdir is not None:
+    return str(Path(workdir) / f"{basename}-speakers.json")
   return f"{basename}-speakers.json"
 
 
-def load_speaker_config(basename):
+def load_speaker_config(basename, workdir=None):
   """Load speaker configuration from JSON file"""
-  config_path = get_speaker_config_path(basename)
+  config_path = get_speaker_config_path(basename, workdir)
   if os.path.exists(config_path):
     try:
       import json
@@ -1110,9 +817,9 @@ def load_speaker_config(basename):
   return None
 
 
-def save_speaker_config(basename, speakers):
+def save_speaker_config(basename, speakers, workdir=None):
   """Save speaker configuration to JSON file"""
-  config_path = get_speaker_config_path(basename)
+  config_path = get_speaker_config_path(basename, workdir)
   config = {}
   for speaker_id, (name, bgcolor, textcolor) in speakers.items():
     config[speaker_id] = {'name': name, 'bgcolor': bgcolor, 'textcolor': textcolor}
@@ -1126,6 +833,12 @@ def save_speaker_config(basename, speakers):
     print(f"Warning: Could not save speaker config {config_path}: {e}")
 
 
+# (background, text) colours assigned to speakers in order of appearance
+DEFAULT_SPEAKER_COLORS = [('lightgray', 'darkorange'), ('#e1ffc7', 'darkgreen'),
+                          ('#ffe1e1', 'darkblue'), ('#e1e1ff', 'darkred'),
+                          ('#fff1e1', 'darkpurple'), ('#f1e1ff', 'darkcyan')]
+
+
 def discover_speakers_from_groups(groups):
   """Analyze diarization groups to discover which speakers are actually present"""
   speakers_found = set()
@@ -1149,114 +862,250 @@ def transcribe_video(
     coreml_units=None,
     called_by_mercuryweb=False,
     mercury_command: str | None = None,
+    output_dir=None,
+    preset=None,
+    progressive=False,
+    standalone=None,
 ):
-  basename = Path(inputfile).stem
-  workdir = basename
-  Path(workdir).mkdir(exist_ok=True)
-  os.chdir(workdir)
-
-  # Prepare audio
-  inputWavCache = f"{basename}.cache.wav"
-  # If the caller provided an absolute path, don't prefix with "../" (that corrupts absolute paths
-  # when the code changes into the workdir). Use the absolute or original path accordingly.
-  if os.path.isabs(str(inputfile)):
-    input_arg = str(inputfile)
-  else:
-    input_arg = f"../{inputfile}"
-  convert_to_wav(input_arg, inputWavCache)
-  outputWav = f"{basename}-spaced.wav"
-  create_spaced_audio(inputWavCache, outputWav)
-
-  diarizationFile = f"{basename}-diarization.txt"
-  dzs = get_diarization(outputWav, diarizationFile, num_speakers, min_speakers, max_speakers)
-  groups = group_segments(dzs)
-
-  segment_files = export_segments_audio(groups, outputWav)
-  vtt_files = transcribe_segments(
-      segment_files,
-      model_size=whisper_model,
-      device=whisper_device,
-      compute_type=whisper_compute_type,
-      coreml_units=coreml_units,
-  )
+  """Run the full pipeline for one media file and return the path of the HTML transcript.
 
-  # Discover which speakers are actually present
-  actual_speakers = discover_speakers_from_groups(groups)
-  print(f"Detected speakers: {actual_speakers}")
-
-  # Try to load existing speaker config first
-  speakers = load_speaker_config(basename)
-
-  if speakers is None:
-    # No config exists, create default mapping
-    speakers = {}
-    default_colors = [('lightgray', 'darkorange'), ('#e1ffc7', 'darkgreen'),
-                      ('#ffe1e1', 'darkblue'), ('#e1e1ff', 'darkred'), ('#fff1e1', 'darkpurple'),
-                      ('#f1e1ff', 'darkcyan')]
-
-    if speaker_names:
-      # Use provided speaker names
-      for i, name in enumerate(speaker_names):
-        if i < len(actual_speakers):
-          speaker_id = actual_speakers[i]
-          bgcolor, textcolor = default_colors[i % len(default_colors)]
-          speakers[speaker_id] = (name, bgcolor, textcolor)
-    else:
-      # Create default names for detected speakers
-      for i, speaker_id in enumerate(actual_speakers):
-        bgcolor, textcolor = default_colors[i % len(default_colors)]
-        speakers[speaker_id] = (f"Speaker {i+1}", bgcolor, textcolor)
-
-    # Save the initial config
-    save_speaker_config(basename, speakers)
-    print(f"Created speaker config file: {get_speaker_config_path(basename)}")
-    print("You can edit speaker names and rerun to update the transcript.")
-
-  # Ensure all detected speakers have entries (in case new speakers appeared)
-  updated = False
-  for speaker_id in actual_speakers:
-    if speaker_id not in speakers:
-      # New speaker detected, add with default settings
-      i = len(speakers)
-      bgcolor, textcolor = default_colors[i % len(default_colors)]
-      speakers[speaker_id] = (f"Speaker {i+1}", bgcolor, textcolor)
-      updated = True
-
-  if updated:
-    save_speaker_config(basename, speakers)
-    print("Updated speaker config with newly detected speakers")
-
-  generate_html(
-      f"../{basename}.html",
-      groups,
-      vtt_files,
-      inputfile,
-      speakers,
-      speaker_section=speaker_section,
-      speaker_inline=speaker_inline,
-      called_by_mercuryweb=called_by_mercuryweb,
-      mercury_command=mercury_command,
-  )
-  # Try to create a DOCX using the shared html_to_docx helper so the CLI and
-  # the web server use the same conversion code path.
-  try:
-    from transcribe_with_whisper.html_to_docx import ensure_deps, convert_html_file_to_docx
-  except Exception as import_exc:
-    print("⚠️ DOCX generation unavailable: required Python packages are missing. Install with: pip install python-docx")
-    print(f"(import error for html_to_docx: {import_exc})")
-  else:
+  Intermediate files live in ``<output_dir>/<basename>/`` and the HTML/DOCX are
+  written to ``output_dir`` (the current directory when not given). Every path is
+  explicit, so several calls can run on threads in the same process and share the
+  cached Whisper and diarization models.
+
+  preset (a name from presets.PRESETS) replaces whisper_model and
+  whisper_compute_type and sets the beam size, VAD and batch size.
+
+  With progressive=True a draft transcript from the "draft" preset's small model
+  is written to the HTML first ("Draft transcript ready: ..." on stdout), then
+  the requested model re-transcribes every segment and the HTML is rewritten
+  every PROGRESSIVE_PUBLISH_SECONDS with the refined captions swapped in.
+
+  standalone (see generate_html) defaults to True except for web server runs,
+  whose pages link the server's shared /assets.
+  """
+  if standalone is None:
+    standalone = not called_by_mercuryweb
+  preset = get_preset(preset) if isinstance(preset, str) or preset is None else preset
+  decode = {}
+  if preset is not None:
+    whisper_model = preset.model_size
+    whisper_compute_type = preset.compute_type
+    decode = {
+        "beam_size": preset.beam_size,
+        "vad_filter": preset.vad_filter,
+        "batch_size": preset.batch_size,
+    }
+  input_path = Path(inputfile).resolve()
+  basename = input_path.stem
+  output_dir = Path(output_dir).resolve() if output_dir is not None else Path.cwd()
+  workdir = output_dir / basename
+  html_out = output_dir / f"{basename}.html"
+
+  # Only one run per basename may touch <basename>/ at a time (web jobs, workers, manual CLI)
+  with workdir_lock(workdir,
+                    on_wait=lambda: print(f"Waiting for another job on {basename} to finish...",
+                                          flush=True)):
+    journal = Journal(workdir, basename)
+    options = {
+        "speaker_names": list(speaker_names or []),
+        "num_speakers": num_speakers,
+        "min_speakers": min_speakers,
+        "max_speakers": max_speakers,
+        "preset": preset.name if preset else None,
+        "progressive": progressive,
+    }
+    if not journal.begin(input_path, options):
+      print(f"{input_path.name} changed since the last run; discarding its earlier results")
+      discard_previous_work(workdir, basename, input_path)
+    elif journal.previous_options and journal.previous_options.get("preset") != options["preset"]:
+      # Captions from another preset don't match the requested quality
+      cleanup([p for p in workdir.glob("*.vtt") if p.stem.isdigit()])
+      journal.data["segments_done"] = []
     try:
-      if ensure_deps():
-        html_out = Path(f"../{basename}.html")
-        docx_out = html_out.with_suffix('.docx')
-        convert_html_file_to_docx(html_out, docx_out)
-        print(f"✅ Generated DOCX (shared): {docx_out.name}")
+      # Prepare audio (a paused run keeps its spaced audio, so resuming skips this)
+      inputWavCache = workdir / f"{basename}.cache.wav"
+      outputWav = workdir / f"{basename}-spaced.wav"
+      if not (journal.stage_done("audio") and outputWav.exists()):
+        convert_to_wav(str(input_path), str(inputWavCache))
+        create_spaced_audio(str(inputWavCache), str(outputWav))
+        journal.mark_stage("audio")
+      journal.checkpoint("audio preparation")
+
+      diarizationFile = workdir / f"{basename}-diarization.txt"
+      dzs = get_diarization(str(outputWav), str(diarizationFile), num_speakers, min_speakers,
+                            max_speakers)
+      journal.mark_stage("diarization")
+      journal.checkpoint("diarization")
+      groups = group_segments(dzs)
+
+      segment_files = export_segments_audio(groups,
+                                            str(outputWav),
+                                            workdir=workdir,
+                                            skip_transcribed=True)
+
+      # Discover which speakers are actually present
+      actual_speakers = discover_speakers_from_groups(groups)
+      print(f"Detected speakers: {actual_speakers}")
+
+      # Try to load existing speaker config first
+      speakers = load_speaker_config(basename, workdir)
+      default_colors = DEFAULT_SPEAKER_COLORS
+
+      if speakers is None:
+        # No config exists, create default mapping
+        speakers = {}
+
+        if speaker_names:
+          # Use provided speaker names
+          for i, name in enumerate(speaker_names):
+            if i < len(actual_speakers):
+              speaker_id = actual_speakers[i]
+              bgcolor, textcolor = default_colors[i % len(default_colors)]
+              speakers[speaker_id] = (name, bgcolor, textcolor)
+        else:
+          # Create default names for detected speakers
+          for i, speaker_id in enumerate(actual_speakers):
+            bgcolor, textcolor = default_colors[i % len(default_colors)]
+            speakers[speaker_id] = (f"Speaker {i+1}", bgcolor, textcolor)
+
+        # Save the initial config
+        save_speaker_config(basename, speakers, workdir)
+        print(f"Created speaker config file: {get_speaker_config_path(basename, workdir)}")
+        print("You can edit speaker names and rerun to update the transcript.")
+
+      # Ensure all detected speakers have entries (in case new speakers appeared)
+      updated = False
+      for speaker_id in actual_speakers:
+        if speaker_id not in speakers:
+          # New speaker detected, add with default settings
+          i = len(speakers)
+          bgcolor, textcolor = default_colors[i % len(default_colors)]
+          speakers[speaker_id] = (f"Speaker {i+1}", bgcolor, textcolor)
+          updated = True
+
+      if updated:
+        save_speaker_config(basename, speakers, workdir)
+        print("Updated speaker config with newly detected speakers")
+
+      def publish(vtts):
+        return generate_html(
+            str(html_out),
+            groups,
+            vtts,
+            inputfile,
+            speakers,
+            speaker_section=speaker_section,
+            speaker_inline=speaker_inline,
+            called_by_mercuryweb=called_by_mercuryweb,
+            mercury_command=mercury_command,
+            standalone=standalone,
+        )
+
+      def speaker_captions(index, vtt_file):
+        speaker = groups[index][0].split()[-1]
+        name = speakers.get(speaker, (speaker, ))[0]
+        return [{
+            "start": round(c["start"], 3),
+            "end": round(c["end"], 3),
+            "speaker": speaker,
+            "speaker_name": name,
+            "text": c["text"],
+        } for c in group_captions(groups[index], vtt_file)]
+
+      # Captions are published as each segment finishes, for the progress page
+      partial = PartialTranscript(partial_path(workdir, basename), speaker_captions)
+      refined = [str(Path(f).with_suffix(".vtt")) for f in segment_files]
+      partial.reset(refined)
+      refine_publish = None
+      draft = get_preset("draft")
+      if progressive and whisper_model != draft.model_size and not all(
+          os.path.isfile(v) for v in refined):
+        draft_vtts = transcribe_segments(
+            segment_files,
+            model_size=draft.model_size,
+            device=whisper_device,
+            compute_type=draft.compute_type,
+            coreml_units=coreml_units,
+            beam_size=draft.beam_size,
+            vad_filter=draft.vad_filter,
+            batch_size=draft.batch_size,
+            vtt_suffix=DRAFT_VTT_SUFFIX,
+            verbs=("Drafting", "Drafted"),
+        )
+        current = [r if os.path.isfile(r) else d for r, d in zip(refined, draft_vtts)]
+        publish(current)
+        print(f"Draft transcript ready: {html_out}", flush=True)
+        journal.checkpoint("draft")
+        last_publish = [time.monotonic()]
+
+        def refine_publish(index, vtt_file):
+          current[index] = vtt_file
+          if time.monotonic() - last_publish[0] >= PROGRESSIVE_PUBLISH_SECONDS:
+            publish(current)
+            last_publish[0] = time.monotonic()
+            done = sum(1 for v in current if not v.endswith(DRAFT_VTT_SUFFIX))
+            print(f"Refined transcript updated: {done}/{len(current)} segments", flush=True)
+
+      def on_segment(index, vtt_file):
+        partial.add(index, vtt_file)
+        if refine_publish is not None:
+          refine_publish(index, vtt_file)
+
+      vtt_files = transcribe_segments(
+          segment_files,
+          model_size=whisper_model,
+          device=whisper_device,
+          compute_type=whisper_compute_type,
+          coreml_units=coreml_units,
+          journal=journal,
+          on_segment=on_segment,
+          **decode,
+      )
+      # Skip the HTML and DOCX when nothing they are built from changed (a rerun)
+      manifest = Manifest(workdir, basename)
+      html_inputs = input_digest(
+          vtt_files,
+          groups=groups,
+          speakers=speakers,
+          media=inputfile,
+          speaker_section=speaker_section,
+          speaker_inline=speaker_inline,
+          called_by_mercuryweb=called_by_mercuryweb,
+          standalone=standalone,
+          version=get_package_version(),
+          assets=[asset_url(name) for name in ("transcript.css", "transcript.js", "viewer.js")],
+          virtual_min=VIRTUAL_VIEWER_MIN_CAPTIONS,
+      )
+      timeline = None
+      if manifest.is_current(html_out, html_inputs):
+        timeline = read_timeline(timeline_path(workdir, basename))
+      if timeline is None:
+        timeline = publish(vtt_files)
+        manifest.record(html_out, html_inputs)
       else:
-        print("⚠️ DOCX generation unavailable: python-docx not installed. Install with: pip install python-docx")
-    except Exception as py_exc:
-      print(f"⚠️ DOCX conversion failed: {py_exc}")
-  cleanup([inputWavCache, outputWav] + segment_files)
-  print(f"Script completed successfully! Output: ../{basename}.html")
+        print(f"HTML transcript is up to date: {html_out.name}")
+
+      # The web server builds DOCX and other exports on demand; a CLI run writes
+      # the DOCX straight from the captions in memory
+      if not called_by_mercuryweb:
+        try:
+          docx_out = ensure_export(output_dir, basename, "docx", timeline=timeline)
+          print(f"✅ DOCX ready: {docx_out.name}")
+        except Exception as docx_exc:
+          print(f"⚠️ DOCX generation failed: {docx_exc}")
+      cleanup([inputWavCache, outputWav, partial.path] + segment_files +
+              [Path(f).with_suffix(DRAFT_VTT_SUFFIX) for f in segment_files])
+    except JobPaused as exc:
+      print(f"Paused at {exc} to make room for a higher-priority job", flush=True)
+      return None
+    except BaseException:
+      journal.set_state("failed")
+      raise
+    journal.set_state("completed", html=str(html_out))
+  print(f"Script completed successfully! Output: {html_out}")
+  return html_out
 
 
 def main():
@@ -1317,6 +1166,24 @@ Examples:
       action=argparse.BooleanOptionalAction,
       default=False,
       help='Indicate whether the invocation originated from the Mercury web interface.')
+  parser.add_argument('--preset',
+                      choices=list(PRESETS),
+                      help='Speed/quality trade-off: ' + ', '.join(
+                          f'{p.name} ({p.model_size} model, beam {p.beam_size})'
+                          for p in PRESETS.values()))
+  parser.add_argument('--progressive',
+                      action='store_true',
+                      help='Write a quick draft transcript first, then refine it in place with '
+                      'the full model')
+  parser.add_argument('--standalone',
+                      action='store_true',
+                      help='Inline the stylesheet and scripts even when called by the web '
+                      'interface, so the HTML works as a single file')
+  parser.add_argument('--cpu-threads',
+                      type=int,
+                      metavar='N',
+                      help='Threads for Whisper, PyTorch and OpenMP (default: library defaults); '
+                      'used by the web server to give each concurrent job its own cores')
   args = parser.parse_args()
   command_line = " ".join(shlex.quote(arg) for arg in sys.argv)
 
@@ -1343,7 +1210,14 @@ Examples:
       print("Error: --min-speakers cannot be greater than --max-speakers")
       sys.exit(1)
 
-  transcribe_video(
+  if args.cpu_threads is not None:
+    if args.cpu_threads < 1:
+      print("Error: --cpu-threads must be at least 1")
+      sys.exit(1)
+    os.environ["WHISPER_CPU_THREADS"] = str(args.cpu_threads)
+    apply_thread_budget(args.cpu_threads)
+
+  html_out = transcribe_video(
       args.video_file,
       args.speaker_names if args.speaker_names else None,
       args.num_speakers,
@@ -1353,7 +1227,13 @@ Examples:
       speaker_inline=args.speaker_inline,
       called_by_mercuryweb=args.called_by_mercuryweb,
       mercury_command=command_line,
+      preset=args.preset,
+      progressive=args.progressive,
+      standalone=True if args.standalone else None,
   )
+  if html_out is None:
+    # Paused for a higher-priority job; the journal lets the next run resume
+    sys.exit(PAUSED_EXIT_CODE)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""Record what each transcript artifact was built from, so unchanged ones aren't rebuilt.
+
+``<basename>/<basename>-manifest.json`` has one entry per output file (keyed by
+its name, e.g. ``talk.html`` or ``talk.docx``)::
+
+    {"version": 1, "artifacts": {"talk.docx": {"inputs": "<digest>",
+                                               "sha256": "<hash of talk.docx>",
+                                               "stamp": [size, mtime_ns], "built": 1730000000.0}}}
+
+``inputs`` is an ``input_digest()`` over the files and settings the artifact
+depends on. A generator computes the digest, asks ``is_current()`` and skips its
+work when nothing changed; otherwise it builds and calls ``record()``. An
+artifact that was deleted, or rewritten by something that didn't record it, is
+never current. Digests of derived formats include the file they are made from
+(the DOCX lists the HTML), so the web server can check the CLI's DOCX against
+the HTML on disk without knowing how either was made.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+MANIFEST_VERSION = 1
+
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def manifest_path(workdir: Path, basename: str) -> Path:
+  return Path(workdir) / f"{basename}-manifest.json"
+
+
+def _stamp(path: Path) -> list[int] | None:
+  try:
+    st = Path(path).stat()
+  except OSError:
+    return None
+  return [st.st_size, st.st_mtime_ns]
+
+
+@lru_cache(maxsize=256)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+  digest = hashlib.sha256()
+  with open(path, "rb") as f:
+    for block in iter(lambda: f.read(1 << 20), b""):
+      digest.update(block)
+  return digest.hexdigest()
+
+
+def file_hash(path: Path) -> str | None:
+  """SHA-256 of a file (cached until it changes); None if it doesn't exist."""
+  stamp = _stamp(path)
+  return _hash_file(str(path), *stamp) if stamp else None
+
+
+def input_digest(files: Iterable[Path] = (), **settings) -> str:
+  """One hash over the content of ``files`` (by name) and JSON-serialisable settings."""
+  parts = {Path(f).name: file_hash(f) for f in files}
+  payload = json.dumps({"files": parts, "settings": settings}, sort_keys=True, default=str)
+  return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Manifest:
+
+  def __init__(self, workdir: Path, basename: str):
+    self.path = manifest_path(workdir, basename)
+    # record()/forget() are read-modify-write: serialise them per manifest file
+    with _locks_guard:
+      self._lock = _locks.setdefault(self.path.resolve(), threading.Lock())
+
+  def _read(self) -> dict:
+    try:
+      data = json.loads(self.path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+      data = None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+      data = {"version": MANIFEST_VERSION, "artifacts": {}}
+    return data
+
+  def _write(self, data: dict) -> None:
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+      tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+      os.replace(tmp, self.path)
+    except BaseException:
+      tmp.unlink(missing_ok=True)
+      raise
+
+  def entry(self, artifact: Path) -> dict | None:
+    return self._read()["artifacts"].get(Path(artifact).name)
+
+  def is_current(self, artifact: Path, inputs: str) -> bool:
+    """True when artifact exists, is the file last recorded and was built from ``inputs``."""
+    entry = self.entry(artifact)
+    if entry is None or entry.get("inputs") != inputs:
+      return False
+    stamp = _stamp(artifact)
+    if stamp is None:
+      return False
+    # Same size and mtime: the recorded file; otherwise compare content (a copy or touch)
+    return stamp == entry.get("stamp") or file_hash(artifact) == entry.get("sha256")
+
+  def record(self, artifact: Path, inputs: str) -> None:
+    entry = {
+        "inputs": inputs,
+        "sha256": file_hash(artifact),
+        "stamp": _stamp(artifact),
+        "built": time.time(),
+    }
+    with self._lock:
+      data = self._read()
+      data["artifacts"][Path(artifact).name] = entry
+      self._write(data)
+
+  def forget(self, artifact: Path) -> None:
+    with self._lock:
+      data = self._read()
+      if data["artifacts"].pop(Path(artifact).name, None) is not None:
+        self._write(data)
@@ -0,0 +1,161 @@
+"""Header-only media probing with a small on-disk metadata cache.
+
+Decoding a whole recording just to learn its duration is expensive (a 2 hour
+video is gigabytes of PCM). This module reads duration, codecs, channels and
+sample rate from container headers via ffprobe, falling back to the WAV header
+for plain .wav files when ffprobe isn't available.
+
+Results are cached in a JSON file keyed by path and validated against the file's
+mtime and size, so the server can render /list and progress pages without
+touching the media again.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import wave
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=None)
+def find_ffmpeg_tool(name: str) -> str | None:
+  """Return an ffmpeg-suite executable, preferring a copy bundled next to a frozen app."""
+  if getattr(sys, 'frozen', False):
+    exe_dir = Path(sys.executable).resolve().parent
+    for candidate in (exe_dir / f"{name}.exe", exe_dir / name, exe_dir / "_internal" / f"{name}.exe",
+                      exe_dir / "_internal" / name):
+      if candidate.is_file():
+        return str(candidate)
+  return shutil.which(name)
+
+
+def find_ffprobe() -> str | None:
+  return find_ffmpeg_tool("ffprobe")
+
+
+def _probe_with_ffprobe(path: Path) -> dict | None:
+  ffprobe = find_ffprobe()
+  if not ffprobe:
+    return None
+  try:
+    result = subprocess.run(
+        [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams",
+         str(path)],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+  except (OSError, subprocess.SubprocessError):
+    return None
+  if result.returncode != 0 or not result.stdout.strip():
+    return None
+
+  try:
+    info = json.loads(result.stdout)
+  except json.JSONDecodeError:
+    return None
+
+  fmt = info.get("format") or {}
+  streams = info.get("streams") or []
+  audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+  video = next((s for s in streams if s.get("codec_type") == "video"), {})
+
+  duration = fmt.get("duration") or audio.get("duration") or video.get("duration")
+  meta = {
+      "duration": float(duration) if duration not in (None, "N/A") else None,
+      "format": fmt.get("format_name"),
+      "audio_codec": audio.get("codec_name"),
+      "video_codec": video.get("codec_name"),
+      "channels": audio.get("channels"),
+      "sample_rate": int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+  }
+  return meta
+
+
+def _probe_wav_header(path: Path) -> dict | None:
+  try:
+    with wave.open(str(path), "rb") as wf:
+      rate = wf.getframerate()
+      return {
+          "duration": wf.getnframes() / float(rate) if rate else None,
+          "format": "wav",
+          "audio_codec": "pcm_s%dle" % (wf.getsampwidth() * 8),
+          "video_codec": None,
+          "channels": wf.getnchannels(),
+          "sample_rate": rate,
+      }
+  except (wave.Error, EOFError, OSError):
+    return None
+
+
+def probe_media(path: Path | str) -> dict | None:
+  """Return header metadata for a media file, or None if it can't be probed."""
+  path = Path(path)
+  meta = _probe_with_ffprobe(path)
+  if meta is None and path.suffix.lower() == ".wav":
+    meta = _probe_wav_header(path)
+  return meta
+
+
+class MediaMetadataCache:
+  """JSON-backed cache of probe_media() results.
+
+  Entries are stored per path together with the file's mtime and size; a changed
+  file is re-probed on the next lookup. Safe to share between request threads.
+  """
+
+  def __init__(self, cache_file: Path):
+    self.cache_file = Path(cache_file)
+    self._lock = threading.Lock()
+    self._entries: dict[str, dict] | None = None
+
+  def _load(self) -> dict[str, dict]:
+    if self._entries is None:
+      try:
+        self._entries = json.loads(self.cache_file.read_text(encoding="utf-8"))
+      except (OSError, ValueError):
+        self._entries = {}
+    return self._entries
+
+  def _save(self) -> None:
+    tmp = self.cache_file.with_name(self.cache_file.name + ".tmp")
+    try:
+      tmp.write_text(json.dumps(self._entries, indent=1, sort_keys=True), encoding="utf-8")
+      os.replace(tmp, self.cache_file)
+    except OSError as exc:
+      print(f"⚠️ Could not write media metadata cache {self.cache_file}: {exc}")
+
+  @staticmethod
+  def _stamp(path: Path) -> list[int] | None:
+    try:
+      st = path.stat()
+    except OSError:
+      return None
+    return [st.st_mtime_ns, st.st_size]
+
+  def get(self, path: Path | str) -> dict | None:
+    """Return cached metadata for path, probing the file if the cache is stale."""
+    path = Path(path).resolve()
+    stamp = self._stamp(path)
+    if stamp is None:
+      return None
+    key = str(path)
+    with self._lock:
+      entry = self._load().get(key)
+      if entry and entry.get("stamp") == stamp:
+        return entry.get("meta")
+
+    meta = probe_media(path)
+    with self._lock:
+      self._load()[key] = {"stamp": stamp, "meta": meta}
+      self._save()
+    return meta
+
+  def duration(self, path: Path | str) -> float | None:
+    meta = self.get(path)
+    return meta.get("duration") if meta else None
@@ -0,0 +1,66 @@
+"""Captions published while a transcription is still running.
+
+The CLI appends every finished speaker segment's captions to
+``<basename>/<basename>-partial.jsonl``, one JSON object per caption with
+absolute times and the speaker's display name. Lines are only ever appended and
+a reader ignores a last line without its newline (it is picked up complete on
+the next poll). The web server serves new lines from a byte offset, and the
+progress page merges them into time order, so a long recording can be read from
+the start while later segments are still being transcribed. The file is removed
+once the HTML transcript exists.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+
+def partial_path(workdir: Path, basename: str) -> Path:
+  return Path(workdir) / f"{basename}-partial.jsonl"
+
+
+class PartialTranscript:
+  """Append-only writer; ``captions(index, vtt_file)`` supplies a segment's caption dicts."""
+
+  def __init__(self, path: Path, captions):
+    self.path = Path(path)
+    self._captions = captions
+
+  def reset(self, vtt_files) -> None:
+    """Start the file over with the segments whose VTTs already exist (e.g. when resuming)."""
+    lines = [
+        self._line(idx, caption) for idx, vtt in enumerate(vtt_files) if os.path.isfile(vtt)
+        for caption in self._captions(idx, vtt)
+    ]
+    tmp = self.path.with_name(self.path.name + ".tmp")
+    tmp.write_text("".join(lines), encoding="utf-8")
+    os.replace(tmp, self.path)
+
+  def add(self, index: int, vtt_file) -> None:
+    data = "".join(self._line(index, caption) for caption in self._captions(index, vtt_file))
+    if data:
+      with open(self.path, "a", encoding="utf-8") as fh:
+        fh.write(data)
+
+  @staticmethod
+  def _line(index: int, caption: dict) -> str:
+    return json.dumps({"segment": index, **caption}, ensure_ascii=False) + "\n"
+
+
+def read_partial(path: Path, offset: int = 0) -> tuple[list[dict], int]:
+  """Return the captions after byte ``offset`` and the offset to continue from."""
+  try:
+    with open(path, "rb") as fh:
+      fh.seek(offset)
+      data = fh.read()
+  except OSError:
+    return [], offset
+  end = data.rfind(b"\n") + 1  # ignore a line that is still being written
+  captions = []
+  for raw in data[:end].splitlines():
+    try:
+      captions.append(json.loads(raw))
+    except ValueError:
+      continue
+  return captions, offset + end
@@ -0,0 +1,46 @@
+"""Named speed/quality presets for a transcription job.
+
+A preset picks the Whisper model and decoding settings in one word, so a user
+can trade accuracy for turnaround per file (``--preset draft`` on the CLI, the
+"Quality" menu on the upload form). Without a preset the CLI keeps its usual
+settings (the ``base`` model, tuned by any autotune profile).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Preset:
+  name: str
+  label: str
+  model_size: str
+  beam_size: int
+  # Skip silence inside each speaker segment with Silero VAD before decoding
+  vad_filter: bool
+  compute_type: str
+  # Windows per decode when ASR_BATCHING is on
+  batch_size: int
+
+
+PRESETS = {
+    p.name: p
+    for p in (
+        Preset("draft", "Draft (fastest)", "tiny", beam_size=1, vad_filter=True,
+               compute_type="int8", batch_size=16),
+        Preset("balanced", "Balanced", "base", beam_size=5, vad_filter=True,
+               compute_type="auto", batch_size=8),
+        Preset("accurate", "Accurate (slowest)", "large-v3", beam_size=5, vad_filter=False,
+               compute_type="auto", batch_size=4),
+    )
+}
+
+
+def get_preset(name: str | None) -> Preset | None:
+  """Look up a preset by name; None/"" means no preset. Raises ValueError for unknown names."""
+  if not name:
+    return None
+  try:
+    return PRESETS[name.strip().lower()]
+  except KeyError:
+    raise ValueError(f"Unknown preset {name!r} (choose from {', '.join(PRESETS)})") from None
@@ -1,11 +1,14 @@
+import asyncio
+import hashlib
 import json
 import os
-import shutil
+import signal
 import subprocess
 import sys
 import tempfile
 import threading
 import time
+import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
@@ -16,18 +19,30 @@ os.environ["WEB_SERVER_MODE"] = "1"
 import re
 
 import webvtt
-from fastapi import FastAPI, File, Form, Request, UploadFile
-from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse
+from fastapi import FastAPI, File, Form, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import (FileResponse, HTMLResponse, JSONResponse, PlainTextResponse,
+                               RedirectResponse, Response)
 from fastapi.staticfiles import StaticFiles
 from huggingface_hub import HfApi, hf_hub_download
 from huggingface_hub.utils import GatedRepoError
 
-# Add support for getting audio file duration
-try:
-  from pydub import AudioSegment
-  _HAS_PYDUB = True
-except ImportError:
-  _HAS_PYDUB = False
+from transcribe_with_whisper.assets import IMMUTABLE_CACHE, inline_assets, json_script_tag, resolve_asset
+from transcribe_with_whisper.cpu_budget import (available_cores, partition_cores, pin_process,
+                                                pinned_command, thread_env)
+from transcribe_with_whisper.exports import (EXPORT_FORMATS, MEDIA_TYPES, ensure_export,
+                                             missing_exports)
+from transcribe_with_whisper.file_lock import LockTimeout, workdir_lock
+from transcribe_with_whisper.job_queue import TERMINAL_STATUSES, JobQueue, queue_from_url
+from transcribe_with_whisper.journal import (PAUSE_FILENAME, PAUSED_EXIT_CODE, UNFINISHED_STATES,
+                                             journal_path, read_journal, request_pause)
+from transcribe_with_whisper.media_probe import MediaMetadataCache
+from transcribe_with_whisper.partial_transcript import partial_path, read_partial
+from transcribe_with_whisper.presets import PRESETS, get_preset
+from transcribe_with_whisper.stream_decode import StreamingDecoder, audio_cache_path
+from transcribe_with_whisper.timeline import (caption_count, caption_rows, read_timeline, time_range,
+                                              timeline_index, timeline_path)
+from transcribe_with_whisper.transcript_edits import save_caption_edits
 
 
 # Token storage functions
@@ -149,6 +164,11 @@ async def lifespan(app: FastAPI):
   else:
     print("Skipping HF token startup check due to SKIP_HF_STARTUP_CHECK=1.")
 
+  if os.getenv("RESUME_JOBS_ON_STARTUP", "1") != "0" and _job_queue() is None:
+    resumed = _resume_journaled_jobs()
+    if resumed:
+      print(f"↩️  Resuming {len(resumed)} interrupted transcription(s)")
+
   yield
 
   # Shutdown (nothing to clean up for now)
@@ -164,6 +184,43 @@ else:
 # Simple in-memory job tracking
 jobs: Dict[str, dict] = {}
 job_counter = 0
+ACTIVE_STATUSES = ("queued", "starting", "running")
+
+# Optional shared queue (JOB_QUEUE=sqlite:////shared/queue.db or redis://host:6379/0).
+# When set, jobs are run by transcribe-with-whisper-worker processes (on this or other
+# machines sharing TRANSCRIPTION_DIR) and job records are read back from the queue.
+_job_queues: Dict[str, JobQueue] = {}
+_job_queues_lock = threading.Lock()
+
+
+def _job_queue() -> Optional[JobQueue]:
+  url = os.getenv("JOB_QUEUE", "").strip()
+  if not url:
+    return None
+  with _job_queues_lock:
+    if url not in _job_queues:
+      _job_queues[url] = queue_from_url(url)
+    return _job_queues[url]
+
+
+def _refresh_job(job_id: str) -> Optional[dict]:
+  """Return the job record, pulling the latest state of queued jobs from the shared queue.
+
+  Jobs submitted through another web node are found here as well.
+  """
+  job = jobs.get(job_id)
+  queue = _job_queue()
+  if queue is None or (job is not None and not job.get("remote")):
+    return job
+  remote = queue.get(job_id)
+  if remote is None:
+    return job
+  record = jobs.setdefault(job_id, {})
+  record.update(remote)
+  record["remote"] = True
+  if record.get("status") in TERMINAL_STATUSES:
+    _release_inflight(job_id)
+  return record
 
 INDEX_HTML = """
 <!doctype html>
@@ -182,6 +239,7 @@ INDEX_HTML = """
       .row input[type=text] { flex: 1; padding: 0.6rem; border: 1px solid #ddd; border-radius: 6px; }
       .row input[type=number] { width: 80px; padding: 0.6rem; border: 1px solid #ddd; border-radius: 6px; }
       .row label { min-width: 120px; }
+      .row select { padding: 0.6rem; border: 1px solid #ddd; border-radius: 6px; }
       button { background: #0d6efd; color: white; border: 0; padding: 0.6rem 1rem; border-radius: 6px; cursor: pointer; }
       button:disabled { opacity: .6; cursor: progress; }
       .tip { color: #555; font-size: .95rem; }
@@ -199,6 +257,16 @@ INDEX_HTML = """
       <form action=\"/upload\" method=\"post\" enctype=\"multipart/form-data\" onsubmit=\"document.getElementById('submit').disabled = true; document.getElementById('submit').innerText='Processing…';\">
         <input type=\"file\" name=\"file\" accept=\"video/*,audio/*\" required>
 
+        <div class=\"row\">
+          <label for=\"preset\">Quality:</label>
+          <select id=\"preset\" name=\"preset\">
+            <option value=\"\">Default</option>
+            {_preset_options}
+          </select>
+        </div>
+        <div class=\"help-text\">Draft returns a rough transcript fastest; Accurate uses the largest model and takes longest.</div>
+        <label><input type=\"checkbox\" name=\"progressive\" value=\"1\"> Show a quick draft first, then refine it</label>
+
         <details>
           <summary>🎙️ Speaker Configuration (Optional - improves accuracy)</summary>
           <div style=\"padding: 0.5rem 0;\">
@@ -221,11 +289,72 @@ INDEX_HTML = """
         </details>
 
         <button id=\"submit\" type=\"submit\">Transcribe</button>
+        <div id=\"upload-status\" class=\"help-text\"></div>
       </form>
     </div>
+    <script>
+      // Large files go through the resumable chunked upload API so a dropped
+      // connection only costs the chunk in flight, not the whole upload.
+      const RESUMABLE_THRESHOLD = 32 * 1024 * 1024;
+      const form = document.querySelector('form[action="/upload"]');
+
+      async function sendChunks(uploadId, file, chunkSize, status) {
+        let offset = 0;
+        let retries = 0;
+        while (offset < file.size) {
+          const chunk = file.slice(offset, offset + chunkSize);
+          try {
+            const resp = await fetch(`/api/uploads/${uploadId}?offset=${offset}`, { method: 'PUT', body: chunk });
+            const data = await resp.json();
+            if (typeof data.offset === 'number') offset = data.offset;
+            if (!resp.ok && resp.status !== 409) throw new Error(data.error || resp.statusText);
+            retries = 0;
+          } catch (err) {
+            if (++retries > 5) throw err;
+            await new Promise(r => setTimeout(r, 1000 * retries));
+            const resp = await fetch(`/api/uploads/${uploadId}`);
+            if (resp.ok) offset = (await resp.json()).offset;
+          }
+          status.innerText = `Uploading… ${Math.floor(offset / file.size * 100)}%`;
+        }
+      }
+
+      form.addEventListener('submit', async (event) => {
+        const file = form.querySelector('input[type=file]').files[0];
+        if (!file || file.size < RESUMABLE_THRESHOLD) return;
+        event.preventDefault();
+        const status = document.getElementById('upload-status');
+        try {
+          const init = await fetch('/api/uploads', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ filename: file.name, size: file.size })
+          }).then(r => r.json());
+          if (!init.success) throw new Error(init.error);
+          await sendChunks(init.upload_id, file, init.chunk_size, status);
+          const fields = Object.fromEntries(['num_speakers', 'min_speakers', 'max_speakers', 'preset']
+            .map(name => [name, form.elements[name].value]));
+          fields.progressive = form.elements['progressive'].checked;
+          const done = await fetch(`/api/uploads/${init.upload_id}/complete`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(fields)
+          }).then(r => r.json());
+          if (!done.success) throw new Error(done.error);
+          window.location.href = done.progress_url;
+        } catch (err) {
+          status.innerText = 'Upload failed: ' + err.message;
+          const button = document.getElementById('submit');
+          button.disabled = false;
+          button.innerText = 'Transcribe';
+        }
+      });
+    </script>
   </body>
   </html>
-"""
+""".replace(
+    "{_preset_options}", "\n            ".join(f'<option value="{p.name}">{p.label}</option>'
+                                             for p in PRESETS.values()))
 
 SETUP_HTML = """
 <!doctype html>
@@ -537,18 +666,150 @@ async def test_token(request: Request):
 
 @app.get("/api/job/{job_id}")
 async def get_job_status(job_id: str):
-  if job_id not in jobs:
+  job = await run_in_threadpool(_refresh_job, job_id)
+  if job is None:
     return {"error": "Job not found"}, 404
-  return jobs[job_id]
+  return {**job, "eta_seconds": _estimate_eta(job)}
+
+
+@app.get("/api/job/{job_id}/partial")
+async def get_job_partial(job_id: str, offset: int = 0):
+  """Captions finished so far, from byte ``offset`` of the job's partial transcript."""
+  job = await run_in_threadpool(_refresh_job, job_id)
+  if job is None:
+    return JSONResponse({"error": "Job not found"}, status_code=404)
+  basename = job.get("basename") or Path(job.get("filename", "")).stem
+  path = partial_path(TRANSCRIPTION_DIR / basename, basename)
+  captions, next_offset = await run_in_threadpool(read_partial, path, max(0, offset))
+  return {"captions": captions, "offset": next_offset, "status": job.get("status")}
+
+
+@app.get("/api/timeline/{basename}")
+async def get_timeline(basename: str,
+                       offset: Optional[int] = None,
+                       limit: int = 200,
+                       start: Optional[float] = None,
+                       end: Optional[float] = None):
+  """A transcript's timeline for the virtualised viewer.
+
+  Without a range: speakers, caption count and sorted start times. With
+  ``offset``/``limit`` (caption indices) or ``start``/``end`` (seconds): those captions.
+  """
+  try:
+    if _safe_upload_name(basename) != basename:
+      raise ValueError("Invalid transcript name")
+  except ValueError as e:
+    return JSONResponse({"error": str(e)}, status_code=400)
+  data = await run_in_threadpool(read_timeline, timeline_path(TRANSCRIPTION_DIR / basename, basename))
+  if data is None:
+    return JSONResponse({"error": "Timeline not found"}, status_code=404)
+  if offset is None and start is None and end is None:
+    return timeline_index(data)
+  if offset is not None:
+    lo, hi = max(0, offset), max(0, offset) + max(0, min(limit, 5000))
+  else:
+    lo, hi = time_range(data, start or 0.0, end if end is not None else float("inf"))
+  return {"offset": lo, "count": caption_count(data), "captions": caption_rows(data, lo, hi)}
+
+
+@app.get("/assets/{name}")
+async def get_asset(name: str):
+  """Shared stylesheet/scripts/icon linked by transcripts under a content-hashed name."""
+  found = resolve_asset(name)
+  if found is None:
+    return PlainTextResponse("Not found", status_code=404)
+  content, media_type, current = found
+  return Response(content,
+                  media_type=media_type,
+                  headers={"Cache-Control": IMMUTABLE_CACHE if current else "no-cache"})
+
+
+def _standalone_html(html_path: Path) -> str:
+  html = inline_assets(html_path.read_text(encoding="utf-8"))
+  sidecar = timeline_path(html_path.parent / html_path.stem, html_path.stem)
+  data = read_timeline(sidecar) if 'id="transcript" data-basename=' in html else None
+  if data is not None and 'id="timeline-data"' not in html:
+    embedded = "    " + json_script_tag("timeline-data", json.dumps(data, separators=(",", ":")))
+    # Before the viewer script, which reads it on load
+    head, sep, tail = html.partition("    <script>")
+    html = head + embedded + "\n" + sep + tail if sep else html
+  return html
+
+
+@app.get("/standalone/{name}")
+async def download_standalone(name: str):
+  """A transcript with its assets (and timeline) inlined, to share as a single file."""
+  try:
+    if _safe_upload_name(name) != name or not name.lower().endswith(".html"):
+      raise ValueError("Invalid transcript name")
+  except ValueError as e:
+    return PlainTextResponse(str(e), status_code=400)
+  html_path = TRANSCRIPTION_DIR / name
+  if not html_path.is_file():
+    return PlainTextResponse("Not found", status_code=404)
+  html = await run_in_threadpool(_standalone_html, html_path)
+  return HTMLResponse(html, headers={"Content-Disposition": f'attachment; filename="{name}"'})
+
+
+@app.get("/export/{name}")
+async def download_export(name: str):
+  """``/export/<basename>.docx`` (or .srt, .txt, .json), built on first request and cached."""
+  basename, _, fmt = name.rpartition(".")
+  try:
+    if _safe_upload_name(name) != name or not basename:
+      raise ValueError("Invalid transcript name")
+  except ValueError as e:
+    return PlainTextResponse(str(e), status_code=400)
+  if fmt not in EXPORT_FORMATS:
+    return PlainTextResponse(f"Unknown export format: {fmt}", status_code=400)
+  if not (TRANSCRIPTION_DIR / f"{basename}.html").is_file():
+    return PlainTextResponse("Not found", status_code=404)
+  try:
+    path = await run_in_threadpool(ensure_export, TRANSCRIPTION_DIR, basename, fmt)
+  except FileNotFoundError as e:
+    return PlainTextResponse(str(e), status_code=404)
+  return FileResponse(path, media_type=MEDIA_TYPES[fmt], filename=name)
+
+
+@app.post("/api/job/{job_id}/cancel")
+async def cancel_job(job_id: str):
+  """Stop a queued or running job, kill its process tree and remove scratch audio."""
+  job = await run_in_threadpool(_refresh_job, job_id)
+  if job is None:
+    return JSONResponse({"success": False, "error": "Job not found"}, status_code=404)
+  if job.get("status") not in ACTIVE_STATUSES:
+    return JSONResponse({"success": False, "error": f"Job is already {job.get('status')}"},
+                        status_code=409)
+
+  if job.get("remote"):
+    # The worker running it sees the cancelled status, stops the CLI and cleans up
+    await run_in_threadpool(_job_queue().cancel, job_id)
+    job = await run_in_threadpool(_refresh_job, job_id)
+    return {"success": True, "message": job.get("message", "Cancelled by user")}
+
+  job["status"] = "cancelled"
+  job["error_reason"] = "cancelled"
+  job["message"] = "Cancelled by user"
+  job["end_time"] = time.time()
+  _discard_staged_audio(job.pop("staged_audio", None))
+  _release_inflight(job_id)
+  _schedule()
+  proc = _job_processes.get(job_id)
+  if proc is not None:
+    await run_in_threadpool(_terminate_process_tree, proc)
+    # A job that never started has no scratch audio of its own to remove
+    basename = job.get("basename") or Path(job.get("filename", "")).stem
+    if basename:
+      await run_in_threadpool(_cleanup_job_intermediates, basename)
+  return {"success": True, "message": job["message"]}
 
 
 @app.get("/progress/{job_id}", response_class=HTMLResponse)
 async def progress_page(job_id: str):
-  if job_id not in jobs:
+  job = await run_in_threadpool(_refresh_job, job_id)
+  if job is None:
     return PlainTextResponse("Job not found", status_code=404)
 
-  job = jobs[job_id]
-
   # Format start time
   start_time = job.get('start_time', time.time())
   start_time_str = datetime.fromtimestamp(start_time).strftime("%I:%M:%S %p")
@@ -582,6 +843,9 @@ async def progress_page(job_id: str):
       .info {{ color: #666; font-size: 0.9rem; margin: 0.5rem 0; }}
       .stats {{ background: #f8f9fa; padding: 0.75rem; border-radius: 6px; margin: 1rem 0; }}
       .stats-row {{ display: flex; justify-content: space-between; margin: 0.25rem 0; }}
+      #partial {{ max-height: 24rem; overflow-y: auto; border-top: 1px solid #eee; margin-top: 1rem; }}
+      #partial p {{ margin: 0.4rem 0; }}
+      #partial .when {{ color: #888; font-size: 0.85rem; }}
     </style>
     <script>
       function formatTime(timestamp) {{
@@ -617,9 +881,20 @@ async def progress_page(job_id: str):
 
             // Update elapsed time
             updateElapsedTime();
+            if (typeof data.eta_seconds === 'number') {{
+              document.getElementById('eta').innerText = formatElapsedShort(data.eta_seconds);
+            }}
+
+            if (data.draft_result && data.status !== 'completed') {{
+              const draft = document.getElementById('draft-link');
+              draft.style.display = 'block';
+              draft.querySelector('a').href = data.draft_result;
+            }}
 
             if (data.status === 'completed' && data.result) {{
+              document.getElementById('draft-link').style.display = 'none';
               document.querySelector('.spinner').style.display = 'none';
+              document.getElementById('cancel-job-btn').style.display = 'none';
 
               // Calculate and display completion stats
               const endTime = data.end_time || Math.floor(Date.now() / 1000);
@@ -632,10 +907,12 @@ async def progress_page(job_id: str):
                 '<div class=\"stats-row\"><strong>Total time:</strong> <span>' + formatElapsedShort(elapsed) + '</span></div>' +
                 '</div>' +
                 '<p><a href=\"/list\">View all files</a> | <a href=\"/\">Upload another file</a></p>';
-            }} else if (data.status === 'error') {{
+            }} else if (data.status === 'error' || data.status === 'cancelled') {{
               document.querySelector('.spinner').style.display = 'none';
+              document.getElementById('cancel-job-btn').style.display = 'none';
+              const label = data.status === 'cancelled' ? '⏹️ Cancelled' : '❌ Error: ' + data.message;
               document.getElementById('status-container').innerHTML =
-                '<div class=\"error\">❌ Error: ' + data.message + '</div>' +
+                '<div class=\"error\">' + label + '</div>' +
                 '<p><a href=\"/\">Try again</a></p>';
             }} else {{
               setTimeout(updateProgress, 2000);
@@ -643,7 +920,49 @@ async def progress_page(job_id: str):
           }})
           .catch(() => setTimeout(updateProgress, 5000));
       }}
-      window.onload = function() {{ updateProgress(); }};
+      // Captions arrive segment by segment, not necessarily in time order
+      let partialOffset = 0;
+      const partialStarts = [];
+      function formatClock(seconds) {{
+        const h = Math.floor(seconds / 3600), m = Math.floor(seconds % 3600 / 60), s = Math.floor(seconds % 60);
+        return (h ? h + ':' + String(m).padStart(2, '0') : m) + ':' + String(s).padStart(2, '0');
+      }}
+      function addPartialCaption(caption) {{
+        let lo = 0, hi = partialStarts.length;
+        while (lo < hi) {{
+          const mid = (lo + hi) >> 1;
+          if (partialStarts[mid] <= caption.start) lo = mid + 1; else hi = mid;
+        }}
+        const line = document.createElement('p');
+        const when = document.createElement('span');
+        when.className = 'when';
+        when.textContent = '[' + formatClock(caption.start) + '] ';
+        const who = document.createElement('strong');
+        who.textContent = caption.speaker_name + ': ';
+        line.append(when, who, document.createTextNode(caption.text));
+        const list = document.getElementById('partial-list');
+        list.insertBefore(line, list.children[lo] || null);
+        partialStarts.splice(lo, 0, caption.start);
+      }}
+      function pollPartial() {{
+        fetch('/api/job/{job_id}/partial?offset=' + partialOffset)
+          .then(response => response.json())
+          .then(data => {{
+            partialOffset = data.offset;
+            if (data.captions.length) document.getElementById('partial').style.display = 'block';
+            data.captions.forEach(addPartialCaption);
+            if (['queued', 'starting', 'running'].includes(data.status)) setTimeout(pollPartial, 3000);
+          }})
+          .catch(() => setTimeout(pollPartial, 5000));
+      }}
+      function cancelJob() {{
+        if (!confirm('Stop this transcription? Work in progress will be discarded.')) return;
+        document.getElementById('cancel-job-btn').disabled = true;
+        fetch('/api/job/{job_id}/cancel', {{ method: 'POST' }})
+          .then(response => response.json())
+          .then(data => {{ if (!data.success) alert(data.error || 'Could not cancel job'); }});
+      }}
+      window.onload = function() {{ updateProgress(); pollPartial(); }};
     </script>
   </head>
   <body>
@@ -656,6 +975,7 @@ async def progress_page(job_id: str):
         <div class=\"stats-row\"><strong>Started:</strong> <span>{start_time_str}</span></div>
         <div class=\"stats-row\"><strong>Audio length:</strong> <span>{duration_str}</span></div>
         <div class=\"stats-row\"><strong>Elapsed time:</strong> <span id=\"elapsed-time\">0s</span></div>
+        <div class=\"stats-row\"><strong>Estimated time left:</strong> <span id=\"eta\">calculating…</span></div>
       </div>
       <div class=\"progress-bar\">
         <div id=\"progress-fill\" class=\"progress-fill\" style=\"width: {job['progress']}%\"></div>
@@ -665,7 +985,13 @@ async def progress_page(job_id: str):
         <span id=\"progress-text\">{job['progress']}%</span> -
         <span id=\"status-message\">{job['message']}</span>
       </div>
+      <div id=\"draft-link\" class=\"info\" style=\"display: none;\">📝 A draft transcript is ready: <a href=\"#\" target=\"_blank\">read it now</a>. Reload it later to see the refined captions.</div>
+      <button id=\"cancel-job-btn\" onclick=\"cancelJob()\">⏹️ Cancel</button>
       <div id=\"status-container\"></div>
+      <div id=\"partial\" style=\"display: none;\">
+        <h3>Transcript so far</h3>
+        <div id=\"partial-list\"></div>
+      </div>
     </div>
   </body>
 </html>
@@ -676,7 +1002,10 @@ def _build_cli_cmd(filename: str,
                    speakers: Optional[List[str]] = None,
                    num_speakers: Optional[int] = None,
                    min_speakers: Optional[int] = None,
-                   max_speakers: Optional[int] = None) -> List[str]:
+                   max_speakers: Optional[int] = None,
+                   cpu_threads: Optional[int] = None,
+                   preset: Optional[str] = None,
+                   progressive: bool = False) -> List[str]:
   """Use the python -m entry to invoke CLI installed from this same package."""
   # When running unpacked/dev, invoke via the Python interpreter module form.
   # When running as a frozen bundle, sys.executable is the bundled exe: use the bundle's --run-cli entry instead.
@@ -700,6 +1029,13 @@ def _build_cli_cmd(filename: str,
     if max_speakers is not None:
       cmd.extend(["--max-speakers", str(max_speakers)])
 
+  if cpu_threads:
+    cmd.extend(["--cpu-threads", str(cpu_threads)])
+  if preset:
+    cmd.extend(["--preset", preset])
+  if progressive:
+    cmd.append("--progressive")
+
   # Add filename (always after flags)
   cmd.append(filename)
 
@@ -928,27 +1264,24 @@ def _list_dir_entries(path: Path) -> Iterable[Path]:
   return sorted([p for p in path.iterdir() if p.is_file()], key=lambda p: p.name.lower())
 
 
+_MEDIA_CACHE: Optional[MediaMetadataCache] = None
+
+
+def _media_cache() -> MediaMetadataCache:
+  """Return the metadata cache stored alongside other server config in TRANSCRIPTION_DIR."""
+  global _MEDIA_CACHE
+  cache_file = _get_config_dir() / "media-metadata.json"
+  if _MEDIA_CACHE is None or _MEDIA_CACHE.cache_file != cache_file:
+    _MEDIA_CACHE = MediaMetadataCache(cache_file)
+  return _MEDIA_CACHE
+
+
 def _get_audio_duration(file_path: Path) -> Optional[float]:
-  """Get duration of audio/video file in seconds"""
+  """Get duration of audio/video file in seconds from container headers (cached)."""
   try:
-    if _HAS_PYDUB:
-      # Try pydub first (more reliable for various formats)
-      audio = AudioSegment.from_file(str(file_path))
-      return len(audio) / 1000.0  # Convert ms to seconds
-    else:
-      # Fallback to ffprobe if pydub not available
-      result = subprocess.run([
-          'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of',
-          'default=noprint_wrappers=1:nokey=1',
-          str(file_path)
-      ],
-                              capture_output=True,
-                              text=True)
-      if result.returncode == 0 and result.stdout.strip():
-        return float(result.stdout.strip())
+    return _media_cache().duration(file_path)
   except Exception:
-    pass
-  return None
+    return None
 
 
 def _format_duration(seconds: float) -> str:
@@ -969,6 +1302,31 @@ def _format_elapsed_time(start_time: float) -> str:
     return f"{minutes}m {seconds}s"
 
 
+def _estimate_eta(job: dict) -> Optional[float]:
+  """Estimate seconds remaining for a running job.
+
+  Uses the media duration (from the probe cache) and the processing rate observed on
+  completed jobs; falls back to extrapolating from the progress percentage.
+  """
+  if job.get("status") not in ("starting", "running"):
+    return None
+  elapsed = time.time() - job.get("start_time", time.time())
+  duration = job.get("file_duration")
+  if isinstance(duration, (int, float)) and duration > 0:
+    done = [
+        j for j in jobs.values() if j.get("status") == "completed"
+        and isinstance(j.get("file_duration"), (int, float)) and j["file_duration"] > 0
+        and j.get("end_time")
+    ]
+    if done:
+      rate = sum(j["end_time"] - j["start_time"] for j in done) / sum(j["file_duration"] for j in done)
+      return max(0.0, duration * rate - elapsed)
+  progress = job.get("progress") or 0
+  if progress >= 10:
+    return max(0.0, elapsed * (100 - progress) / progress)
+  return None
+
+
 def _update_progress_from_output(job_id: str, line: str):
   """Parse CLI output line and update job progress"""
   global jobs
@@ -982,8 +1340,12 @@ def _update_progress_from_output(job_id: str, line: str):
 
   # Progress estimation based on recognizable output patterns
   try:
+    # Another run (web, worker or CLI) holds the lock on this basename's folder
+    if "Waiting for another job on" in line:
+      jobs[job_id]["message"] = "Waiting for another transcription of this file to finish..."
+
     # Phase 1: Initial setup and preflight (5-10%)
-    if "Running preflight checks" in line:
+    elif "Running preflight checks" in line:
       jobs[job_id]["progress"] = 5
       jobs[job_id]["message"] = "Running preflight checks..."
     elif "ffmpeg found:" in line:
@@ -1074,6 +1436,21 @@ def _update_progress_from_output(job_id: str, line: str):
       else:
         jobs[job_id]["message"] = "Speaker diarization complete..."
 
+    # Progressive mode: a quick draft pass (50-65%), then refinement (65-80%)
+    elif "Drafting segment" in line and "/" in line:
+      match = re.search(r"Drafting segment (\d+)/(\d+)", line)
+      if match:
+        current_num, total_num = int(match.group(1)), int(match.group(2))
+        jobs[job_id]["progress"] = min(int(50 + current_num / total_num * 15), 65)
+        jobs[job_id]["message"] = f"Drafting segment {current_num}/{total_num}..."
+    elif "Draft transcript ready:" in line:
+      html_name = Path(line.split("Draft transcript ready:", 1)[1].strip()).name
+      jobs[job_id]["draft_result"] = f"/files/{html_name}"
+      jobs[job_id]["progress"] = 65
+      jobs[job_id]["message"] = "Draft ready; refining with the full model..."
+    elif "Refined transcript updated:" in line:
+      jobs[job_id]["refined_segments"] = line.split("Refined transcript updated:", 1)[1].split()[0]
+
     # Phase 5: Segment transcription (50-80%)
     # Now we get real progress from "Transcribing segment X/Y" messages
     elif "Transcribing segment" in line and "/" in line:
@@ -1087,6 +1464,9 @@ def _update_progress_from_output(job_id: str, line: str):
         # Map segment progress to 50-80% range
         segment_progress = (current_num / total_num) * 100
         mapped_progress = 50 + (segment_progress * 0.30)  # 30% of total progress
+        if jobs[job_id].get("draft_result"):
+          # The draft pass already covered 50-65%
+          mapped_progress = 65 + (segment_progress * 0.15)
         jobs[job_id]["progress"] = min(int(mapped_progress), 80)
         jobs[job_id]["message"] = f"Transcribing segment {current_num}/{total_num}..."
       except (ValueError, IndexError):
@@ -1106,6 +1486,8 @@ def _update_progress_from_output(job_id: str, line: str):
         # Map segment progress to 50-80% range
         segment_progress = (current_num / total_num) * 100
         mapped_progress = 50 + (segment_progress * 0.30)
+        if jobs[job_id].get("draft_result"):
+          mapped_progress = 65 + (segment_progress * 0.15)
         jobs[job_id]["progress"] = min(int(mapped_progress), 80)
       except (ValueError, IndexError):
         pass
@@ -1145,22 +1527,169 @@ def _update_progress_from_output(job_id: str, line: str):
     pass
 
 
+# Per-stage watchdog: the longest a job may stay in a stage without printing any output
+# before it is considered hung. Override with STAGE_TIMEOUT_<STAGE>=seconds (0 disables).
+STAGE_TIMEOUTS = {
+    "startup": 600,
+    "convert": 900,
+    "load_models": 1800,
+    "diarization": 3600,
+    "transcription": 3600,
+    "output": 900,
+}
+
+# How long a cancelled or timed-out job waits for its basename lock before leaving the
+# scratch files to whichever run holds it
+CLEANUP_LOCK_TIMEOUT = 2.0
+
+# job_id -> running CLI process (kept out of `jobs` so job records stay JSON-serializable)
+_job_processes: Dict[str, subprocess.Popen] = {}
+
+
+def _stage_for_progress(progress: float) -> str:
+  """Map the progress percentage reported by _update_progress_from_output to a stage."""
+  if progress < 10:
+    return "startup"
+  if progress < 20:
+    return "convert"
+  if progress < 25:
+    return "load_models"
+  if progress < 50:
+    return "diarization"
+  if progress < 80:
+    return "transcription"
+  return "output"
+
+
+def _stage_timeout(stage: str) -> Optional[float]:
+  value = os.getenv(f"STAGE_TIMEOUT_{stage.upper()}")
+  try:
+    timeout = float(value) if value is not None else float(STAGE_TIMEOUTS.get(stage, 0))
+  except ValueError:
+    timeout = float(STAGE_TIMEOUTS.get(stage, 0))
+  return timeout if timeout > 0 else None
+
+
+def _record_job_activity(job_id: str) -> None:
+  """Note that the job produced output and track stage transitions for the watchdog."""
+  job = jobs.get(job_id)
+  if job is None:
+    return
+  now = time.time()
+  job["last_activity"] = now
+  if job.get("message", "").startswith("Waiting for another transcription"):
+    # Queued behind the basename lock; the other run has its own watchdog
+    job["stage"] = "lock_wait"
+    return
+  stage = _stage_for_progress(job.get("progress") or 0)
+  if job.get("stage") != stage:
+    job["stage"] = stage
+    job["stage_started"] = now
+
+
+def _popen_process_group_kwargs() -> dict:
+  """Start the CLI in its own process group so the whole tree (ffmpeg included) can be stopped."""
+  if os.name == "nt":
+    return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+  return {"start_new_session": True}
+
+
+def _terminate_process_tree(proc: subprocess.Popen, grace: float = 5.0) -> None:
+  """Terminate a CLI process and everything it spawned."""
+  if proc.poll() is not None:
+    return
+  try:
+    if os.name == "nt":
+      subprocess.run(["taskkill", "/PID", str(proc.pid), "/T", "/F"], capture_output=True)
+    else:
+      os.killpg(proc.pid, signal.SIGTERM)
+      try:
+        proc.wait(timeout=grace)
+      except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+  except (ProcessLookupError, PermissionError, OSError):
+    proc.kill()
+  try:
+    proc.wait(timeout=grace)
+  except subprocess.TimeoutExpired:
+    pass
+
+
+def _cleanup_job_intermediates(basename: str) -> None:
+  """Remove scratch audio left behind by an interrupted run (VTTs and diarization are kept).
+
+  Skipped when another run on the same basename holds its working-directory lock:
+  the files are that run's.
+  """
+  workdir = TRANSCRIPTION_DIR / basename
+  if not workdir.is_dir():
+    return
+  try:
+    with workdir_lock(workdir, timeout=CLEANUP_LOCK_TIMEOUT):
+      for pattern in ("*.wav", "*.part", "*.tmp", PAUSE_FILENAME):
+        for path in workdir.glob(pattern):
+          try:
+            path.unlink()
+          except OSError as exc:
+            print(f"⚠️ Could not remove {path}: {exc}")
+  except LockTimeout:
+    print(f"Another run on {basename} is active; leaving its intermediate files in place")
+
+
+def _wait_with_watchdog(job_id: str, proc: subprocess.Popen) -> Optional[str]:
+  """Wait for the CLI, enforcing per-stage timeouts. Returns a failure reason or None."""
+  while True:
+    try:
+      proc.wait(timeout=2)
+      return None
+    except subprocess.TimeoutExpired:
+      pass
+    job = jobs.get(job_id, {})
+    if job.get("status") == "cancelled":
+      _terminate_process_tree(proc)
+      return "cancelled"
+    stage = job.get("stage", "startup")
+    if stage == "lock_wait":
+      continue
+    timeout = _stage_timeout(stage)
+    idle = time.time() - job.get("last_activity", time.time())
+    if timeout is not None and idle > timeout:
+      _terminate_process_tree(proc)
+      return f"Stage '{stage}' timed out after {int(idle)}s without progress"
+
+
 def _run_transcription_job(job_id: str,
                            filename: str,
                            speakers: Optional[List[str]],
                            num_speakers: Optional[int] = None,
                            min_speakers: Optional[int] = None,
-                           max_speakers: Optional[int] = None):
+                           max_speakers: Optional[int] = None,
+                           preset: Optional[str] = None,
+                           progressive: bool = False):
   global jobs
   try:
+    if jobs[job_id].get("status") == "cancelled":
+      return
+
     # Store basename for VTT progress tracking
     basename = Path(filename).stem
     jobs[job_id]["basename"] = basename
+    _install_audio_cache(basename, jobs[job_id].pop("staged_audio", None))
     jobs[job_id]["status"] = "running"
     jobs[job_id]["message"] = "Starting transcription..."
     jobs[job_id]["progress"] = 5
-
-    cmd = _build_cli_cmd(filename, speakers or None, num_speakers, min_speakers, max_speakers)
+    _record_job_activity(job_id)
+
+    # Jobs started by the local scheduler (or a pinned worker) get their own cores
+    cores = jobs[job_id].get("cpu_cores")
+    cmd = _build_cli_cmd(filename,
+                         speakers or None,
+                         num_speakers,
+                         min_speakers,
+                         max_speakers,
+                         cpu_threads=len(cores) if cores else None,
+                         preset=preset,
+                         progressive=progressive)
 
     # Debug logging
     exe_dir = os.path.dirname(sys.executable) if getattr(sys, 'frozen', False) else os.getcwd()
@@ -1168,15 +1697,13 @@ def _run_transcription_job(job_id: str,
     with open(log_path, "a", encoding="utf-8") as fh:
       fh.write(f"[_run_transcription_job] job_id: {job_id}, filename: {filename}, cmd: {cmd}\n")
 
-    # Use Popen for real-time output monitoring
-    import subprocess
-    import threading
-
     # Prepare environment with token
     env = os.environ.copy()
     token = _prime_token_env()
     if token:
       env["HUGGING_FACE_AUTH_TOKEN"] = token
+    if cores:
+      env.update(thread_env(len(cores)))
 
     # Ensure bundled ffmpeg is in PATH for subprocess
     if getattr(sys, 'frozen', False):
@@ -1185,14 +1712,23 @@ def _run_transcription_job(job_id: str,
       current_path = env.get("PATH", "")
       env["PATH"] = f"{exe_dir}{os.pathsep}{internal_dir}{os.pathsep}{current_path}"
 
-    proc = subprocess.Popen(cmd,
+    # Pin through taskset where available so the CLI starts on its cores; no
+    # preexec_fn, which isn't safe to run in a fork of this threaded server
+    pinned = pinned_command(cmd, cores) if cores else None
+
+    # Use Popen for real-time output monitoring
+    proc = subprocess.Popen(pinned or cmd,
                             cwd=str(TRANSCRIPTION_DIR),
                             stdout=subprocess.PIPE,
                             stderr=subprocess.STDOUT,
                             text=True,
                             bufsize=1,
                             universal_newlines=True,
-                            env=env)
+                            env=env,
+                            **_popen_process_group_kwargs())
+    if cores and pinned is None:
+      pin_process(proc.pid, cores)
+    _job_processes[job_id] = proc
 
     # Monitor output in real-time
     output_lines = []
@@ -1203,18 +1739,44 @@ def _run_transcription_job(job_id: str,
         if line:
           output_lines.append(line.strip())
           _update_progress_from_output(job_id, line.strip())
+          _record_job_activity(job_id)
 
     monitor_thread = threading.Thread(target=monitor_output)
     monitor_thread.daemon = True
     monitor_thread.start()
 
-    # Wait for process to complete
-    proc.wait()
+    # Wait for process to complete (or for the watchdog / a cancel request to stop it)
+    try:
+      failure = _wait_with_watchdog(job_id, proc)
+    finally:
+      _job_processes.pop(job_id, None)
     monitor_thread.join(timeout=1)  # Give thread a moment to finish
 
+    if failure == "cancelled":
+      return
+    if failure:
+      _cleanup_job_intermediates(basename)
+      jobs[job_id]["status"] = "error"
+      jobs[job_id]["message"] = failure
+      jobs[job_id]["error_reason"] = "timeout"
+      jobs[job_id]["end_time"] = time.time()
+      jobs[job_id]["error"] = "OUTPUT:\n" + "\n".join(output_lines)
+      return
+
+    if proc.returncode == PAUSED_EXIT_CODE and jobs[job_id].get("status") != "cancelled":
+      # Stopped at a checkpoint for a shorter job; the scheduler resumes it later
+      jobs[job_id].pop("pausing", None)
+      jobs[job_id]["status"] = "queued"
+      jobs[job_id]["message"] = "Paused; will resume after shorter jobs"
+      jobs[job_id]["pauses"] = jobs[job_id].get("pauses", 0) + 1
+      return
+
     if proc.returncode != 0:
+      if jobs[job_id].get("status") == "cancelled":
+        return
       jobs[job_id]["status"] = "error"
       jobs[job_id]["message"] = f"CLI failed with code {proc.returncode}"
+      jobs[job_id]["error_reason"] = "cli_failed"
       jobs[job_id]["error"] = "OUTPUT:\n" + "\n".join(output_lines)
       return
 
@@ -1233,33 +1795,6 @@ def _run_transcription_job(job_id: str,
         jobs[job_id]["message"] = "No HTML output found"
         return
 
-    jobs[job_id]["message"] = "Generating DOCX file..."
-    jobs[job_id]["progress"] = 90
-
-    try:
-      docx_out = html_out.with_suffix('.docx')
-      try:
-        from transcribe_with_whisper.html_to_docx import \
-          convert_html_file_to_docx
-      except Exception as import_exc:
-        jobs[job_id]["status"] = "error"
-        jobs[job_id]["message"] = ("DOCX generation failed: required Python packages are missing. "
-                                   "Install with: pip install python-docx")
-        jobs[job_id]["error"] = f"Import error for html_to_docx: {import_exc}"
-        print(f"⚠️ DOCX generation unavailable: {import_exc}")
-        return
-
-      try:
-        convert_html_file_to_docx(html_out, docx_out)
-        print(f"✅ Generated DOCX (shared): {docx_out.name}")
-      except Exception as py_exc:
-        jobs[job_id]["status"] = "error"
-        jobs[job_id]["message"] = "DOCX generation failed during conversion"
-        jobs[job_id]["error"] = f"Conversion error: {py_exc}"
-        print(f"⚠️ DOCX conversion failed: {py_exc}")
-    except Exception as e:
-      print(f"⚠️ DOCX generation failed: {e}")
-
     jobs[job_id]["status"] = "completed"
     jobs[job_id]["progress"] = 100
     jobs[job_id]["end_time"] = time.time()
@@ -1275,9 +1810,419 @@ def _run_transcription_job(job_id: str,
 
     print(f"✅ Transcription completed at {end_time_str}")
     print(f"⏱️  Total elapsed time: {elapsed_str}")
+    # DOCX/SRT/TXT/JSON are built when first downloaded, or ahead of time once idle
+    _request_prewarm(html_out.stem)
   except Exception as e:
     jobs[job_id]["status"] = "error"
     jobs[job_id]["message"] = f"Failed to run transcription: {e}"
+  finally:
+    if jobs[job_id].get("status") not in ACTIVE_STATUSES:
+      _release_inflight(job_id)
+      _job_args.pop(job_id, None)
+    _schedule()
+
+
+# Uploads are copied in chunks so a multi-GB file never sits in memory and the
+# event loop only ever waits on one chunk at a time.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MEDIA_EXTENSIONS = {".mp4", ".m4a", ".wav", ".mp3", ".mkv", ".mov"}
+
+
+def _uploads_dir() -> Path:
+  """Directory for in-flight uploads (same filesystem as TRANSCRIPTION_DIR for atomic renames)."""
+  uploads = TRANSCRIPTION_DIR / ".uploads"
+  uploads.mkdir(parents=True, exist_ok=True)
+  return uploads
+
+
+def _safe_upload_name(filename: Optional[str]) -> str:
+  """Strip any client-supplied directory components from an upload filename."""
+  name = Path((filename or "").replace("\\", "/")).name.strip()
+  if not name or name in {".", ".."}:
+    raise ValueError("Invalid filename")
+  return name
+
+
+def _parse_speaker_constraints(
+    num_speakers: Optional[str], min_speakers: Optional[str],
+    max_speakers: Optional[str]) -> tuple[Optional[int], Optional[int], Optional[int]]:
+  """Parse speaker constraint form values (empty strings mean 'auto')."""
+
+  def _to_int(value: Optional[str]) -> Optional[int]:
+    if value is None:
+      return None
+    value = str(value).strip()
+    return int(value) if value else None
+
+  return _to_int(num_speakers), _to_int(min_speakers), _to_int(max_speakers)
+
+
+def _parse_flag(value) -> bool:
+  """Checkbox / JSON boolean: "1", "true", "on" or true."""
+  if isinstance(value, bool):
+    return value
+  return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _parse_preset(value: Optional[str]) -> Optional[str]:
+  """Validate a preset name from a form or JSON body ("" means the default settings)."""
+  preset = get_preset(value)
+  return preset.name if preset else None
+
+
+def _write_chunk(out, digest, chunk: bytes, decoder: Optional[StreamingDecoder] = None) -> None:
+  digest.update(chunk)
+  out.write(chunk)
+  if decoder is not None:
+    decoder.feed(chunk)
+
+
+def _start_stream_decoder(token: str) -> Optional[StreamingDecoder]:
+  """Start decoding an incoming upload into an audio cache staged in the upload area.
+
+  Set STREAM_DECODE_UPLOADS=0 to disable. The staged file only moves into
+  ``<basename>/`` when its job starts (see _install_audio_cache), so a run already
+  working on that basename never sees its cache change underneath it.
+  """
+  if os.getenv("STREAM_DECODE_UPLOADS", "1") == "0":
+    return None
+  decoder = StreamingDecoder(_uploads_dir() / f"{token}.cache.wav")
+  return None if decoder.failed else decoder
+
+
+async def _finish_stream_decoder(decoder: Optional[StreamingDecoder],
+                                 expected_bytes: Optional[int] = None) -> Optional[str]:
+  """Path of the staged audio cache if the upload decoded completely, else None."""
+  if decoder is None:
+    return None
+  ready = await run_in_threadpool(decoder.finish, expected_bytes)
+  if not ready:
+    return None
+  print(f"✅ Decoded audio cache during upload: {decoder.output.name}")
+  return str(decoder.output)
+
+
+def _discard_staged_audio(staged: Optional[str]) -> None:
+  if staged:
+    Path(staged).unlink(missing_ok=True)
+
+
+def _install_audio_cache(basename: str, staged: Optional[str]) -> None:
+  """Move an audio cache decoded during upload into ``<basename>/`` under the basename lock.
+
+  If another run holds the lock the staged file is dropped and the CLI decodes the
+  media itself (it discards a cache older than the media file).
+  """
+  if not staged or not Path(staged).exists():
+    return
+  workdir = TRANSCRIPTION_DIR / basename
+  try:
+    with workdir_lock(workdir, timeout=0):
+      os.replace(staged, audio_cache_path(workdir, basename))
+  except LockTimeout:
+    print(f"Another run on {basename} is active; its audio will be decoded by the CLI")
+    _discard_staged_audio(staged)
+
+
+async def _stream_upload_to_disk(file: UploadFile,
+                                 dest_path: Path,
+                                 decoder: Optional[StreamingDecoder] = None) -> str:
+  """Copy an upload to dest_path in chunks off the event loop and return its SHA-256.
+
+  Data is written to a temporary file first and atomically renamed into place, so a
+  half-written upload never shows up in TRANSCRIPTION_DIR. If a decoder is given,
+  each chunk is also streamed into it.
+  """
+  digest = hashlib.sha256()
+  fd, tmp_name = tempfile.mkstemp(prefix=f"{dest_path.name}.", suffix=".part", dir=str(_uploads_dir()))
+  try:
+    with os.fdopen(fd, "wb") as out:
+      while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+          break
+        await run_in_threadpool(_write_chunk, out, digest, chunk, decoder)
+    await run_in_threadpool(os.replace, tmp_name, dest_path)
+  except BaseException:
+    try:
+      os.unlink(tmp_name)
+    except OSError:
+      pass
+    raise
+  return digest.hexdigest()
+
+
+# Single-flight: one CLI run per (media file, options) at a time
+_inflight_jobs: Dict[tuple, str] = {}
+_inflight_lock = threading.Lock()
+
+
+def _inflight_key(filename: str,
+                  speakers: Optional[List[str]],
+                  num_speakers: Optional[int],
+                  min_speakers: Optional[int],
+                  max_speakers: Optional[int],
+                  preset: Optional[str] = None) -> tuple:
+  """Identify a request by file contents (size + mtime) and the options that change the output."""
+  try:
+    st = (TRANSCRIPTION_DIR / filename).stat()
+    stamp = (st.st_size, st.st_mtime_ns)
+  except OSError:
+    stamp = None
+  return (Path(filename).stem, stamp, tuple(speakers or ()), num_speakers, min_speakers,
+          max_speakers, preset)
+
+
+def _release_inflight(job_id: str) -> None:
+  key = jobs.get(job_id, {}).get("inflight_key")
+  with _inflight_lock:
+    if key is not None and _inflight_jobs.get(key) == job_id:
+      del _inflight_jobs[key]
+
+
+def _start_transcription_job(filename: str,
+                             speakers: Optional[List[str]] = None,
+                             num_speakers: Optional[int] = None,
+                             min_speakers: Optional[int] = None,
+                             max_speakers: Optional[int] = None,
+                             file_duration: Optional[float] = None,
+                             sha256: Optional[str] = None,
+                             preset: Optional[str] = None,
+                             progressive: bool = False,
+                             staged_audio: Optional[str] = None) -> str:
+  """Register a job record and start the CLI in a background thread.
+
+  A request identical to a job that is still starting or running (same media
+  file and speaker options) is attached to that job instead of starting another
+  CLI run; the existing job_id is returned. ``staged_audio`` is an audio cache
+  decoded during upload, moved into the working directory when the job starts.
+  """
+  global job_counter, jobs
+  key = _inflight_key(filename, speakers, num_speakers, min_speakers, max_speakers, preset)
+  with _inflight_lock:
+    existing = _inflight_jobs.get(key)
+    if existing and jobs.get(existing, {}).get("status") in ACTIVE_STATUSES:
+      jobs[existing]["subscribers"] = jobs[existing].get("subscribers", 1) + 1
+      _discard_staged_audio(staged_audio)
+      return existing
+    job_counter += 1
+    queue = _job_queue()
+    # Ids must be unique across every web node sharing the queue
+    job_id = uuid.uuid4().hex if queue is not None else str(job_counter)
+    _inflight_jobs[key] = job_id
+
+  jobs[job_id] = {
+      "status": "starting",
+      "progress": 0,
+      "message": "Preparing transcription...",
+      "filename": filename,
+      "start_time": time.time(),
+      "file_duration": file_duration,
+  }
+  if sha256:
+    jobs[job_id]["sha256"] = sha256
+  if preset:
+    jobs[job_id]["preset"] = preset
+  if progressive:
+    jobs[job_id]["progressive"] = True
+
+  if queue is not None:
+    # Workers share TRANSCRIPTION_DIR but not this node's upload area
+    _install_audio_cache(Path(filename).stem, staged_audio)
+    jobs[job_id].update(status="queued", message="Waiting for a worker...", remote=True)
+    payload = {
+        "filename": filename,
+        "speakers": list(speakers or []),
+        "num_speakers": num_speakers,
+        "min_speakers": min_speakers,
+        "max_speakers": max_speakers,
+        "file_duration": file_duration,
+        "sha256": sha256,
+        "preset": preset,
+        "progressive": progressive,
+    }
+    queue.enqueue(payload, job_id, state=dict(jobs[job_id]))
+    jobs[job_id]["inflight_key"] = key
+    return job_id
+
+  if staged_audio:
+    jobs[job_id]["staged_audio"] = staged_audio
+  jobs[job_id].update(inflight_key=key,
+                      status="queued",
+                      message="Waiting for a free transcription slot...",
+                      queued_at=time.time())
+  _job_args[job_id] = (filename, speakers, num_speakers, min_speakers, max_speakers, preset,
+                       progressive)
+  _schedule()
+  return job_id
+
+
+# Local scheduling: at most MAX_CONCURRENT_JOBS CLI runs at once (0 = no limit).
+# Waiting jobs start shortest-first; a job longer than LONG_JOB_SECONDS is paused
+# at its next checkpoint when a short job is waiting for its slot, and resumed
+# from its journal once the short jobs are through.
+# With a limit, each slot owns an equal share of the cores: the CLI is pinned to
+# them and sizes its thread pools to match. MAX_CONCURRENT_JOBS=auto gives one
+# slot per THREADS_PER_JOB (default 4) cores.
+_job_args: Dict[str, tuple] = {}
+_scheduler_lock = threading.RLock()
+
+
+def _max_concurrent_jobs() -> int:
+  value = os.getenv("MAX_CONCURRENT_JOBS", "0").strip().lower()
+  try:
+    if value == "auto":
+      return max(1, len(available_cores()) // max(1, int(os.getenv("THREADS_PER_JOB", "4"))))
+    return max(0, int(value))
+  except ValueError:
+    return 0
+
+
+def _assign_cpu_slot(job_id: str, running: List[str], limit: int) -> None:
+  if not limit or os.getenv("PIN_JOB_CORES", "1") == "0":
+    return
+  taken = {jobs[j].get("cpu_slot") for j in running}
+  slot = next(i for i in range(limit + 1) if i not in taken)
+  slots = partition_cores(limit)
+  jobs[job_id]["cpu_slot"] = slot
+  jobs[job_id]["cpu_cores"] = slots[slot % limit]
+
+
+def _is_long_job(job_id: str) -> bool:
+  try:
+    limit = float(os.getenv("LONG_JOB_SECONDS", "1800"))
+  except ValueError:
+    limit = 1800.0
+  duration = jobs.get(job_id, {}).get("file_duration")
+  return isinstance(duration, (int, float)) and duration > limit
+
+
+def _job_priority(job_id: str) -> tuple:
+  job = jobs[job_id]
+  duration = job.get("file_duration")
+  if not isinstance(duration, (int, float)):
+    duration = float("inf")
+  return (_is_long_job(job_id), duration, job.get("queued_at", 0))
+
+
+def _launch_job(job_id: str) -> None:
+  jobs[job_id]["status"] = "starting"
+  jobs[job_id]["message"] = "Preparing transcription..."
+  thread = threading.Thread(target=_run_transcription_job, args=(job_id, *_job_args[job_id]))
+  thread.daemon = True
+  thread.start()
+
+
+def _schedule() -> None:
+  """Start waiting jobs while slots are free, pausing a long job for a short one if needed."""
+  with _scheduler_lock:
+    for job_id in [j for j in _job_args if jobs.get(j, {}).get("status") in (None, "cancelled")]:
+      del _job_args[job_id]
+    running = [j for j in _job_args if jobs[j].get("status") in ("starting", "running")]
+    waiting = sorted((j for j in _job_args if jobs[j].get("status") == "queued"),
+                     key=_job_priority)
+    limit = _max_concurrent_jobs()
+    while waiting and (not limit or len(running) < limit):
+      job_id = waiting.pop(0)
+      _assign_cpu_slot(job_id, running, limit)
+      _launch_job(job_id)
+      running.append(job_id)
+    if not waiting or _is_long_job(waiting[0]):
+      return
+    if any(jobs[j].get("pausing") for j in running):
+      return  # one pause at a time; its slot goes to the waiting job
+    victims = [j for j in running if _is_long_job(j) and jobs[j].get("basename")]
+    if victims:
+      victim = max(victims, key=lambda j: jobs[j]["file_duration"])
+      jobs[victim]["pausing"] = True
+      jobs[victim]["message"] = "Pausing to let a shorter job run..."
+      request_pause(TRANSCRIPTION_DIR / jobs[victim]["basename"])
+
+
+# Exports of finished transcripts are built ahead of time only while nothing is
+# being transcribed, and not until EXPORT_PREWARM_IDLE_SECONDS of quiet
+_prewarm_pending: List[str] = []
+_prewarm_lock = threading.Lock()
+_prewarm_thread: Optional[threading.Thread] = None
+_prewarm_last_busy = 0.0
+PREWARM_POLL_SECONDS = 5.0
+
+
+def _prewarm_idle_seconds() -> float:
+  try:
+    return float(os.getenv("EXPORT_PREWARM_IDLE_SECONDS", "30"))
+  except ValueError:
+    return 30.0
+
+
+def _system_idle() -> bool:
+  global _prewarm_last_busy
+  if any(job.get("status") in ACTIVE_STATUSES for job in list(jobs.values())):
+    _prewarm_last_busy = time.time()
+    return False
+  return time.time() - _prewarm_last_busy >= _prewarm_idle_seconds()
+
+
+def _request_prewarm(basename: str) -> None:
+  """Queue a finished transcript's exports to be built the next time the server is idle."""
+  global _prewarm_thread, _prewarm_last_busy
+  if os.getenv("EXPORT_PREWARM", "1") == "0":
+    return
+  with _prewarm_lock:
+    _prewarm_last_busy = time.time()
+    if basename not in _prewarm_pending:
+      _prewarm_pending.append(basename)
+    if _prewarm_thread is None:
+      _prewarm_thread = threading.Thread(target=_prewarm_exports, daemon=True)
+      _prewarm_thread.start()
+
+
+def _prewarm_exports() -> None:
+  """Build pending exports one file at a time, rechecking for new jobs between files."""
+  global _prewarm_thread
+  while True:
+    with _prewarm_lock:
+      if not _prewarm_pending:
+        _prewarm_thread = None
+        return
+      basename = _prewarm_pending[0]
+    if not _system_idle():
+      time.sleep(PREWARM_POLL_SECONDS)
+      continue
+    try:
+      todo = missing_exports(TRANSCRIPTION_DIR, basename)
+      if todo:
+        ensure_export(TRANSCRIPTION_DIR, basename, todo[0])
+        continue
+    except Exception as e:
+      print(f"⚠️ Could not prepare exports of {basename}: {e}")
+    with _prewarm_lock:
+      _prewarm_pending.remove(basename)
+
+
+def _resume_journaled_jobs() -> List[str]:
+  """Restart transcriptions whose journal says they were running or paused."""
+  job_ids = []
+  for path in sorted(TRANSCRIPTION_DIR.glob("*/*-journal.json")):
+    journal = read_journal(path)
+    if not journal or journal.get("state") not in UNFINISHED_STATES:
+      continue
+    name = journal.get("input", {}).get("name")
+    if not name or not (TRANSCRIPTION_DIR / name).is_file():
+      continue
+    options = journal.get("options") or {}
+    job_id = _start_transcription_job(name,
+                                      speakers=options.get("speaker_names") or None,
+                                      num_speakers=options.get("num_speakers"),
+                                      min_speakers=options.get("min_speakers"),
+                                      max_speakers=options.get("max_speakers"),
+                                      preset=options.get("preset"),
+                                      progressive=bool(options.get("progressive")),
+                                      file_duration=_get_audio_duration(TRANSCRIPTION_DIR /
+                                                                        name))
+    jobs[job_id]["message"] = "Resuming after restart..."
+    job_ids.append(job_id)
+  return job_ids
 
 
 @app.post("/upload")
@@ -1285,65 +2230,459 @@ async def upload(file: UploadFile = File(...),
                  speaker: Optional[List[str]] = Form(default=None),
                  num_speakers: Optional[str] = Form(default=None),
                  min_speakers: Optional[str] = Form(default=None),
-                 max_speakers: Optional[str] = Form(default=None)):
-  global job_counter, jobs
+                 max_speakers: Optional[str] = Form(default=None),
+                 preset: Optional[str] = Form(default=None),
+                 progressive: Optional[str] = Form(default=None)):
   if not _prime_token_env():
     return PlainTextResponse("HUGGING_FACE_AUTH_TOKEN not set. Set it when running the server.",
                              status_code=500)
 
-  dest_path = TRANSCRIPTION_DIR / file.filename
-  with dest_path.open("wb") as out:
-    shutil.copyfileobj(file.file, out)
-
-  job_counter += 1
-  job_id = str(job_counter)
-  speakers = [s.strip() for s in (speaker or []) if s and s.strip()]
+  try:
+    filename = _safe_upload_name(file.filename)
+  except ValueError as e:
+    return PlainTextResponse(str(e), status_code=400)
 
   # Parse and validate speaker constraints (handle empty strings from form)
-  num_speakers_int = None
-  min_speakers_int = None
-  max_speakers_int = None
-
   try:
-    if num_speakers and num_speakers.strip():
-      num_speakers_int = int(num_speakers)
-    if min_speakers and min_speakers.strip():
-      min_speakers_int = int(min_speakers)
-    if max_speakers and max_speakers.strip():
-      max_speakers_int = int(max_speakers)
+    num_speakers_int, min_speakers_int, max_speakers_int = _parse_speaker_constraints(
+        num_speakers, min_speakers, max_speakers)
   except ValueError as e:
     return PlainTextResponse(f"Invalid speaker number: {e}", status_code=400)
+  try:
+    preset = _parse_preset(preset)
+  except ValueError as e:
+    return PlainTextResponse(str(e), status_code=400)
+
+  dest_path = TRANSCRIPTION_DIR / filename
+  decoder = await run_in_threadpool(_start_stream_decoder, uuid.uuid4().hex)
+  try:
+    sha256 = await _stream_upload_to_disk(file, dest_path, decoder)
+  except BaseException:
+    if decoder is not None:
+      await run_in_threadpool(decoder.abort)
+    raise
+  staged_audio = await _finish_stream_decoder(decoder)
+  speakers = [s.strip() for s in (speaker or []) if s and s.strip()]
 
   # Get audio duration for progress feedback
-  file_duration = _get_audio_duration(dest_path)
+  file_duration = await run_in_threadpool(_get_audio_duration, dest_path)
 
-  jobs[job_id] = {
-      "status": "starting",
-      "progress": 0,
-      "message": "Preparing transcription...",
-      "filename": file.filename,
-      "start_time": time.time(),
-      "file_duration": file_duration,
+  job_id = _start_transcription_job(filename, speakers, num_speakers_int, min_speakers_int,
+                                    max_speakers_int, file_duration, sha256, preset,
+                                    _parse_flag(progressive), staged_audio)
+  return RedirectResponse(url=f"/progress/{job_id}", status_code=303)
+
+
+# Resumable chunked uploads
+#
+#   POST   /api/uploads                  {"filename": ..., "size": N}   -> {"upload_id", "offset"}
+#   PUT    /api/uploads/{id}?offset=K    raw bytes appended at K        -> {"offset"}
+#   GET    /api/uploads/{id}                                             -> {"offset", "size", ...}
+#   POST   /api/uploads/{id}/complete    speaker options (JSON)          -> {"job_id", "progress_url"}
+#   DELETE /api/uploads/{id}
+#
+# The partial file on disk is the source of truth for the offset, so a client can
+# resume after a dropped connection or a server restart by asking for the offset.
+# Requests for one upload are serialised, so a retried chunk racing the original
+# can't be appended twice. Sessions left untouched for UPLOAD_EXPIRE_HOURS
+# (default 24) are removed when the next upload starts.
+
+# upload_id -> (rolling sha256, number of bytes hashed)
+_upload_digests: Dict[str, tuple] = {}
+# upload_id -> decoder fed in lockstep with the upload (lost on restart; the CLI then decodes)
+_upload_decoders: Dict[str, StreamingDecoder] = {}
+_upload_lock = threading.Lock()
+# upload_id -> lock held by a request while it reads or changes that upload (event loop only)
+_upload_request_locks: Dict[str, asyncio.Lock] = {}
+
+
+def _upload_request_lock(upload_id: str) -> asyncio.Lock:
+  return _upload_request_locks.setdefault(upload_id, asyncio.Lock())
+
+
+def _upload_expire_seconds() -> float:
+  try:
+    return float(os.getenv("UPLOAD_EXPIRE_HOURS", "24")) * 3600
+  except ValueError:
+    return 24 * 3600
+
+
+def _expire_upload_sessions() -> List[str]:
+  """Remove upload sessions, partial files and staged audio untouched for UPLOAD_EXPIRE_HOURS.
+
+  Returns the ids of the resumable sessions that were removed.
+  """
+  cutoff = time.time() - _upload_expire_seconds()
+  uploads = _uploads_dir()
+  expired = []
+  for path in uploads.iterdir():
+    upload_id = path.name.split(".", 1)[0]
+    if path.suffix == ".json" and re.fullmatch(r"[0-9a-f]{32}", upload_id):
+      # A session is as fresh as the last chunk that landed
+      part = path.with_suffix(".part")
+      try:
+        latest = max(path.stat().st_mtime, part.stat().st_mtime if part.exists() else 0)
+      except OSError:
+        continue
+      if latest < cutoff:
+        path.unlink(missing_ok=True)
+        part.unlink(missing_ok=True)
+        expired.append(upload_id)
+      continue
+    try:
+      if path.suffix in (".part", ".wav") and path.stat().st_mtime < cutoff:
+        path.unlink()
+    except OSError:
+      pass
+  with _upload_lock:
+    decoders = [_upload_decoders.pop(upload_id, None) for upload_id in expired]
+    for upload_id in expired:
+      _upload_digests.pop(upload_id, None)
+  for decoder in decoders:
+    if decoder is not None:
+      decoder.abort()
+  return expired
+
+
+def _upload_paths(upload_id: str) -> tuple[Path, Path]:
+  if not re.fullmatch(r"[0-9a-f]{32}", upload_id or ""):
+    raise ValueError("Invalid upload id")
+  base = _uploads_dir()
+  return base / f"{upload_id}.json", base / f"{upload_id}.part"
+
+
+def _load_upload_session(upload_id: str) -> Optional[dict]:
+  meta_path, part_path = _upload_paths(upload_id)
+  if not meta_path.exists():
+    return None
+  meta = json.loads(meta_path.read_text(encoding="utf-8"))
+  meta["offset"] = part_path.stat().st_size if part_path.exists() else 0
+  meta["upload_id"] = upload_id
+  return meta
+
+
+def _upload_digest(upload_id: str, part_path: Path, offset: int):
+  """Return the rolling digest for an upload, rebuilding it from disk after a restart."""
+  with _upload_lock:
+    entry = _upload_digests.get(upload_id)
+  if entry and entry[1] == offset:
+    return entry[0]
+  digest = hashlib.sha256()
+  if part_path.exists():
+    with part_path.open("rb") as fh:
+      for chunk in iter(lambda: fh.read(UPLOAD_CHUNK_SIZE), b""):
+        digest.update(chunk)
+  with _upload_lock:
+    _upload_digests[upload_id] = (digest, offset)
+  return digest
+
+
+def _create_upload_session(upload_id: str, filename: str, size: int) -> None:
+  meta_path, part_path = _upload_paths(upload_id)
+  meta = {"filename": filename, "size": size, "created": time.time()}
+  meta_path.write_text(json.dumps(meta), encoding="utf-8")
+  part_path.touch()
+
+
+@app.post("/api/uploads")
+async def create_upload(request: Request):
+  """Start a resumable chunked upload."""
+  try:
+    data = await request.json()
+    filename = _safe_upload_name(data.get("filename"))
+    size = int(data.get("size"))
+    if size < 0:
+      raise ValueError("size must be non-negative")
+  except (ValueError, TypeError) as e:
+    return JSONResponse({"success": False, "error": f"Invalid upload request: {e}"},
+                        status_code=400)
+
+  expired = await run_in_threadpool(_expire_upload_sessions)
+  for old_id in expired:
+    _upload_request_locks.pop(old_id, None)
+  upload_id = uuid.uuid4().hex
+  await run_in_threadpool(_create_upload_session, upload_id, filename, size)
+  decoder = await run_in_threadpool(_start_stream_decoder, upload_id)
+  if decoder is not None:
+    with _upload_lock:
+      _upload_decoders[upload_id] = decoder
+  return {"success": True, "upload_id": upload_id, "offset": 0, "chunk_size": UPLOAD_CHUNK_SIZE}
+
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+  """Report how many bytes of a resumable upload the server has."""
+  try:
+    meta = await run_in_threadpool(_load_upload_session, upload_id)
+  except ValueError as e:
+    return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+  if meta is None:
+    return JSONResponse({"success": False, "error": "Upload not found"}, status_code=404)
+  return {"success": True, **meta}
+
+
+@app.put("/api/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, request: Request, offset: int = 0):
+  """Append the request body to a resumable upload at the given offset."""
+  try:
+    _upload_paths(upload_id)
+  except ValueError as e:
+    return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+  async with _upload_request_lock(upload_id):
+    response = await _append_upload_chunk(upload_id, request, offset)
+  if getattr(response, "status_code", 200) == 404:
+    _upload_request_locks.pop(upload_id, None)
+  return response
+
+
+async def _append_upload_chunk(upload_id: str, request: Request, offset: int):
+  meta = await run_in_threadpool(_load_upload_session, upload_id)
+  if meta is None:
+    return JSONResponse({"success": False, "error": "Upload not found"}, status_code=404)
+  if offset != meta["offset"]:
+    # Client is out of sync (e.g. retried a chunk that already landed); tell it where to resume.
+    return JSONResponse({"success": False, "error": "Offset mismatch", "offset": meta["offset"]},
+                        status_code=409)
+
+  _, part_path = _upload_paths(upload_id)
+  digest = await run_in_threadpool(_upload_digest, upload_id, part_path, offset)
+  with _upload_lock:
+    decoder = _upload_decoders.get(upload_id)
+    if decoder is not None and decoder.bytes_fed != offset:
+      # The decoder missed bytes (e.g. a chunk failed mid-stream); let the CLI decode instead
+      _upload_decoders.pop(upload_id)
+      decoder.abort()
+      decoder = None
+  received = offset
+  out = await run_in_threadpool(part_path.open, "ab")
+  try:
+    async for chunk in request.stream():
+      if not chunk:
+        continue
+      if received + len(chunk) > meta["size"]:
+        return JSONResponse({"success": False, "error": "Upload exceeds declared size",
+                             "offset": received}, status_code=400)
+      await run_in_threadpool(_write_chunk, out, digest, chunk, decoder)
+      received += len(chunk)
+  finally:
+    await run_in_threadpool(out.close)
+  with _upload_lock:
+    _upload_digests[upload_id] = (digest, received)
+  return {"success": True, "offset": received, "size": meta["size"]}
+
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, request: Request):
+  """Move a fully received upload into TRANSCRIPTION_DIR and start transcription."""
+  if not _prime_token_env():
+    return JSONResponse(
+        {"success": False, "error": "HUGGING_FACE_AUTH_TOKEN not set. Set it when running the server."},
+        status_code=500)
+  try:
+    _upload_paths(upload_id)
+  except ValueError as e:
+    return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+  async with _upload_request_lock(upload_id):
+    response = await _complete_upload(upload_id, request)
+  if isinstance(response, dict):
+    _upload_request_locks.pop(upload_id, None)
+  return response
+
+
+async def _complete_upload(upload_id: str, request: Request):
+  meta = await run_in_threadpool(_load_upload_session, upload_id)
+  if meta is None:
+    return JSONResponse({"success": False, "error": "Upload not found"}, status_code=404)
+  if meta["offset"] != meta["size"]:
+    return JSONResponse({"success": False, "error": "Upload incomplete", "offset": meta["offset"]},
+                        status_code=409)
+
+  try:
+    data = await request.json()
+  except Exception:
+    data = {}
+  try:
+    num_speakers_int, min_speakers_int, max_speakers_int = _parse_speaker_constraints(
+        data.get("num_speakers"), data.get("min_speakers"), data.get("max_speakers"))
+  except ValueError as e:
+    return JSONResponse({"success": False, "error": f"Invalid speaker number: {e}"},
+                        status_code=400)
+  try:
+    preset = _parse_preset(data.get("preset"))
+  except ValueError as e:
+    return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+  speakers = [s.strip() for s in (data.get("speaker") or []) if s and str(s).strip()]
+
+  meta_path, part_path = _upload_paths(upload_id)
+  digest = await run_in_threadpool(_upload_digest, upload_id, part_path, meta["offset"])
+  sha256 = digest.hexdigest()
+  expected = (data.get("sha256") or "").strip().lower()
+  if expected and expected != sha256:
+    return JSONResponse({"success": False, "error": "Checksum mismatch", "sha256": sha256},
+                        status_code=400)
+
+  dest_path = TRANSCRIPTION_DIR / meta["filename"]
+  await run_in_threadpool(os.replace, part_path, dest_path)
+  await run_in_threadpool(meta_path.unlink, missing_ok=True)
+  with _upload_lock:
+    _upload_digests.pop(upload_id, None)
+    decoder = _upload_decoders.pop(upload_id, None)
+  staged_audio = await _finish_stream_decoder(decoder, meta["size"])
+
+  file_duration = await run_in_threadpool(_get_audio_duration, dest_path)
+  job_id = _start_transcription_job(meta["filename"], speakers, num_speakers_int,
+                                    min_speakers_int, max_speakers_int, file_duration, sha256,
+                                    preset, _parse_flag(data.get("progressive")), staged_audio)
+  return {
+      "success": True,
+      "job_id": job_id,
+      "progress_url": f"/progress/{job_id}",
+      "sha256": sha256,
   }
 
-  thread = threading.Thread(target=_run_transcription_job,
-                            args=(job_id, file.filename, speakers, num_speakers_int,
-                                  min_speakers_int, max_speakers_int))
-  thread.daemon = True
-  thread.start()
 
-  return RedirectResponse(url=f"/progress/{job_id}", status_code=303)
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+  """Discard a resumable upload and its partial data."""
+  try:
+    meta_path, part_path = _upload_paths(upload_id)
+  except ValueError as e:
+    return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+  async with _upload_request_lock(upload_id):
+    await run_in_threadpool(meta_path.unlink, missing_ok=True)
+    await run_in_threadpool(part_path.unlink, missing_ok=True)
+    with _upload_lock:
+      _upload_digests.pop(upload_id, None)
+      decoder = _upload_decoders.pop(upload_id, None)
+    if decoder is not None:
+      await run_in_threadpool(decoder.abort)
+  _upload_request_locks.pop(upload_id, None)
+  return {"success": True}
+
+
+# Live sessions load Whisper in this process (batch jobs run the CLI in a subprocess)
+LIVE_WHISPER_MODEL = os.getenv("LIVE_WHISPER_MODEL", "base")
+_live_transcribers: Dict[str, object] = {}
+_live_lock = threading.Lock()
+
+
+def _live_transcriber(language: Optional[str]):
+  """A Transcriber per language, shared by all live sessions (models load once)."""
+  from transcribe_with_whisper.transcriber import Transcriber
+
+  with _live_lock:
+    key = language or ""
+    if key not in _live_transcribers:
+      _live_transcribers[key] = Transcriber(model_size=LIVE_WHISPER_MODEL,
+                                            language=language,
+                                            word_timestamps=True,
+                                            batched=False)
+    return _live_transcribers[key]
+
+
+def _live_basename(name: Optional[str]) -> str:
+  """A transcript name for a live session that doesn't clash with an existing one."""
+  stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+  try:
+    base = Path(_safe_upload_name(name)).stem
+  except ValueError:
+    base = f"live-{stamp}"
+  if (TRANSCRIPTION_DIR / base).exists() or (TRANSCRIPTION_DIR / f"{base}.html").exists():
+    base = f"{base}-{stamp}"
+  return base
+
+
+def _new_live_session(start: dict):
+  from transcribe_with_whisper.live import LIVE_FORMATS, LiveSession
+
+  fmt = str(start.get("format") or "pcm_s16le")
+  if fmt not in LIVE_FORMATS:
+    raise ValueError(f"Unsupported audio format {fmt!r} (choose from {', '.join(LIVE_FORMATS)})")
+  sample_rate = int(start.get("sample_rate") or 16000)
+  max_speakers = start.get("max_speakers")
+  transcriber = _live_transcriber(start.get("language", "en") or None)
+  transcriber.whisper_model  # load before the client starts sending audio
+  return LiveSession(transcriber,
+                     TRANSCRIPTION_DIR,
+                     _live_basename(start.get("name")),
+                     fmt=fmt,
+                     sample_rate=sample_rate,
+                     max_speakers=int(max_speakers) if max_speakers else None)
+
+
+@app.websocket("/ws/live")
+async def live_transcription(websocket: WebSocket):
+  """Caption a live audio stream.
+
+  The client sends a JSON start message ({"format": "pcm_s16le" | "pcm_f32le" |
+  "webm" | "ogg", "sample_rate", "name", "language", "max_speakers"}), then
+  binary audio frames, then {"type": "stop"}. The server answers with "ready",
+  any number of "partial" and "final" captions, and "done" with the transcript
+  URL once the session is saved.
+  """
+  await websocket.accept()
+  try:
+    start = await websocket.receive_json()
+    session = await run_in_threadpool(_new_live_session, start)
+  except WebSocketDisconnect:
+    return
+  except Exception as e:
+    await websocket.send_json({"type": "error", "error": str(e)})
+    await websocket.close(code=1003)
+    return
+
+  await websocket.send_json({"type": "ready", "basename": session.basename})
+  connected = True
+  try:
+    while True:
+      message = await websocket.receive()
+      if message["type"] == "websocket.disconnect":
+        connected = False
+        break
+      if message.get("bytes"):
+        for event in await run_in_threadpool(session.feed, message["bytes"]):
+          await websocket.send_json(event)
+      elif message.get("text"):
+        try:
+          command = json.loads(message["text"])
+        except ValueError:
+          command = {}
+        if command.get("type") == "stop":
+          break
+  except Exception:
+    await run_in_threadpool(session.abort)
+    raise
+
+  # A dropped connection still keeps everything said so far
+  events, html_path = await run_in_threadpool(session.finish)
+  if not connected:
+    return
+  for event in events:
+    await websocket.send_json(event)
+  await websocket.send_json({
+      "type": "done",
+      "basename": session.basename,
+      "duration": round(session.seconds, 3),
+      "result": f"/files/{html_path.name}" if html_path else None,
+  })
+  await websocket.close()
 
 
 @app.get("/list", response_class=HTMLResponse)
 async def list_files(_: Request):
   files = _list_dir_entries(TRANSCRIPTION_DIR)
   rows = []
-  media_exts = {".mp4", ".m4a", ".wav", ".mp3", ".mkv", ".mov"}
+  media_exts = MEDIA_EXTENSIONS
   vtt_dir = TRANSCRIPTION_DIR / "vtt"
+  # Durations come from the header-probe cache, so this only touches new or changed media
+  durations = await run_in_threadpool(
+      lambda: {p: _get_audio_duration(p)
+               for p in files if p.suffix.lower() in media_exts})
   for p in files:
     name = p.name
     size = _human_size(p.stat().st_size)
+    duration = durations.get(p)
+    duration_str = _format_duration(duration) if duration else ""
     mtime = datetime.fromtimestamp(p.stat().st_mtime).strftime("%Y-%m-%d %H:%M")
     actions = []
 
@@ -1364,11 +2703,20 @@ async def list_files(_: Request):
     # Download links (strong for DOCX)
     if p.suffix.lower() == ".docx":
       actions.append(f'<a href="/files/{name}" download><strong>📄 Download DOCX</strong></a>')
+    elif p.suffix.lower() == ".html":
+      # Shared assets inlined, so the file still works once it leaves the server
+      actions.append(f'<a href="/standalone/{name}" download>Download</a>')
+      # Other formats are built on first download
+      exports = [f'<a href="/export/{p.stem}.{fmt}" download>{fmt.upper()}</a>'
+                 for fmt in EXPORT_FORMATS
+                 if fmt != "docx" or not p.with_suffix(".docx").exists()]
+      actions.append("Export: " + " ".join(exports))
     else:
       actions.append(f'<a href="/files/{name}" download>Download</a>')
 
     rows.append(
-        f"<tr><td>{name}</td><td style='text-align:right'>{size}</td><td>{mtime}</td><td>{' | '.join(actions)}</td></tr>"
+        f"<tr><td>{name}</td><td style='text-align:right'>{size}</td>"
+        f"<td style='text-align:right'>{duration_str}</td><td>{mtime}</td><td>{' | '.join(actions)}</td></tr>"
     )
 
   html = _apply_branding(f"""
@@ -1389,7 +2737,7 @@ async def list_files(_: Request):
   <h1>Available Files</h1>
   <p><a href='/'>⬅ Upload</a></p>
   <table>
-    <thead><tr><th>File</th><th style='text-align:right'>Size</th><th>Modified</th><th>Actions</th></tr></thead>
+    <thead><tr><th>File</th><th style='text-align:right'>Size</th><th style='text-align:right'>Length</th><th>Modified</th><th>Actions</th></tr></thead>
     <tbody>
       {''.join(rows)}
     </tbody>
@@ -1400,38 +2748,40 @@ async def list_files(_: Request):
   return HTMLResponse(html)
 
 
+def _previous_preset(basename: str) -> Optional[str]:
+  """The preset the last run on basename used, from its journal (None: default settings)."""
+  journal = read_journal(journal_path(TRANSCRIPTION_DIR / basename, basename)) or {}
+  try:
+    return _parse_preset((journal.get("options") or {}).get("preset"))
+  except ValueError:
+    return None
+
+
 @app.post("/rerun")
-async def rerun(filename: str = Form(...)):
-  """Re-run transcription for an existing media file in the transcription dir."""
-  global job_counter, jobs
+async def rerun(filename: str = Form(...), preset: Optional[str] = Form(default=None)):
+  """Re-run transcription for an existing media file in the transcription dir.
 
+  Without a ``preset`` field the rerun keeps the preset of the file's previous run;
+  an empty one means the default settings.
+  """
   target = (TRANSCRIPTION_DIR / filename).resolve()
   if not target.exists() or target.parent != TRANSCRIPTION_DIR.resolve():
     return PlainTextResponse("Invalid file.", status_code=400)
 
-  if target.suffix.lower() not in {".mp4", ".m4a", ".wav", ".mp3", ".mkv", ".mov"}:
+  if target.suffix.lower() not in MEDIA_EXTENSIONS:
     return PlainTextResponse("Re-run is only supported for media files.", status_code=400)
-
-  job_counter += 1
-  job_id = str(job_counter)
+  try:
+    if preset is None:
+      preset = await run_in_threadpool(_previous_preset, target.stem)
+    else:
+      preset = _parse_preset(preset)
+  except ValueError as e:
+    return PlainTextResponse(str(e), status_code=400)
 
   # Get audio duration for progress feedback
-  file_duration = _get_audio_duration(target)
-
-  jobs[job_id] = {
-      "status": "starting",
-      "progress": 0,
-      "message": "Preparing transcription...",
-      "filename": filename,
-      "start_time": time.time(),
-      "file_duration": file_duration,
-  }
-
-  thread = threading.Thread(target=_run_transcription_job,
-                            args=(job_id, target.name, None, None, None, None))
-  thread.daemon = True
-  thread.start()
+  file_duration = await run_in_threadpool(_get_audio_duration, target)
 
+  job_id = _start_transcription_job(target.name, file_duration=file_duration, preset=preset)
   return RedirectResponse(url=f"/progress/{job_id}", status_code=303)
 
 
@@ -1488,84 +2838,16 @@ async def save_in_place_transcript_edits(basename: str, request: Request):
     if debug:
       print(f"[DEBUG] Processing {len(changes)} changes for {basename}")
 
-    # Track which VTT files we've modified
-    modified_files: set[Path] = set()
-    applied = 0
-    failed: List[dict] = []
-
-    for change in changes:
-      # Extract VTT-specific information from the change
-      vtt_file = change.get("vttFile", "").strip()
-      caption_idx_str = change.get("captionIdx", "").strip()
-      new_text = change.get("text", "").strip()
-
-      if debug:
-        print(
-            f"[DEBUG] Change: vttFile='{vtt_file}', captionIdx='{caption_idx_str}', text='{new_text[:50]}...'"
-        )
-
-      # Validate that we have the required VTT-specific information
-      if not vtt_file or not caption_idx_str:
-        if debug:
-          print("[DEBUG] Missing VTT info, skipping change")
-        failed.append({
-            "error": "Missing vttFile or captionIdx - HTML may be from legacy version",
-            "change": change
-        })
-        continue
-
-      try:
-        caption_idx = int(caption_idx_str)
-      except ValueError:
-        if debug:
-          print(f"[DEBUG] Invalid captionIdx '{caption_idx_str}', skipping")
-        failed.append({"error": f"Invalid captionIdx: {caption_idx_str}", "change": change})
-        continue
-
-      # Locate the specific VTT file
-      vtt_path = vtt_dir / vtt_file
-      if not vtt_path.exists():
-        if debug:
-          print(f"[DEBUG] VTT file not found: {vtt_path}")
-        failed.append({"error": f"VTT file not found: {vtt_file}", "change": change})
-        continue
-
-      try:
-        # Load the VTT file
-        captions = webvtt.read(str(vtt_path))
-
-        # Validate caption index
-        if caption_idx < 0 or caption_idx >= len(captions):
-          if debug:
-            print(f"[DEBUG] Caption index {caption_idx} out of range (0-{len(captions)-1})")
-          failed.append({
-              "error": f"Caption index {caption_idx} out of range (0-{len(captions)-1})",
-              "change": change
-          })
-          continue
-
-        # Update the specific caption
-        old_text = captions[caption_idx].text.strip()
-        if old_text != new_text:
-          captions[caption_idx].text = new_text
-          captions.save(str(vtt_path))
-          modified_files.add(vtt_path)
-          if debug:
-            print(f"[DEBUG] Updated {vtt_file}[{caption_idx}]: '{old_text}' -> '{new_text}'")
-        else:
-          if debug:
-            print(f"[DEBUG] No change needed for {vtt_file}[{caption_idx}]")
-
-        applied += 1
-
-      except Exception as e:
-        if debug:
-          print(f"[DEBUG] Error processing {vtt_file}: {e}")
-        failed.append({"error": f"Error processing {vtt_file}: {str(e)}", "change": change})
+    # One parse and one atomic write per VTT file, then the new text goes into the page,
+    # timeline and exports without reprocessing; all off the event loop
+    outcome = await run_in_threadpool(save_caption_edits, TRANSCRIPTION_DIR, basename, changes,
+                                      debug)
+    applied, modified_files, failed = outcome["applied"], outcome["modified"], outcome["failed"]
 
     result = {
         "success": True,
-        "message": f"Applied {applied}/{len(changes)} changes to {len(modified_files)} VTT files"
+        "message": f"Applied {applied}/{len(changes)} changes to {len(modified_files)} VTT files",
+        "updated": outcome["updated"],
     }
 
     if failed:
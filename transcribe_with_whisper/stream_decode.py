@@ -0,0 +1,100 @@
+"""Decode uploads to the CLI's audio cache while the bytes are still arriving.
+
+The CLI's first stage converts the input media to ``<basename>/<basename>.cache.wav``
+and skips that work when the file already exists. The server can therefore pipe
+upload chunks into an ffmpeg process as they land on disk, so the PCM cache is
+ready by the time the last byte arrives instead of being produced afterwards.
+
+Streaming decode is best effort: some containers (e.g. MP4 with the ``moov``
+atom at the end) can't be decoded from a pipe. In that case the partial output
+is discarded and the CLI converts the finished file as before.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+from transcribe_with_whisper.media_probe import find_ffmpeg_tool
+
+CACHE_SAMPLE_RATE = 16000
+
+
+def audio_cache_path(workdir: Path, basename: str) -> Path:
+  """Location of the decoded audio cache the CLI looks for."""
+  return Path(workdir) / f"{basename}.cache.wav"
+
+
+class StreamingDecoder:
+  """Pipe media bytes into ffmpeg and atomically publish a 16 kHz mono WAV on success."""
+
+  def __init__(self, output: Path, sample_rate: int = CACHE_SAMPLE_RATE):
+    self.output = Path(output)
+    self._tmp = self.output.with_name(self.output.name + ".part")
+    self.bytes_fed = 0
+    self.failed = False
+    self._proc: subprocess.Popen | None = None
+
+    ffmpeg = find_ffmpeg_tool("ffmpeg")
+    if not ffmpeg:
+      self.failed = True
+      return
+    self.output.parent.mkdir(parents=True, exist_ok=True)
+    try:
+      self._proc = subprocess.Popen(
+          [ffmpeg, "-hide_banner", "-loglevel", "error", "-y", "-i", "pipe:0", "-vn", "-ac", "1",
+           "-ar", str(sample_rate), "-f", "wav", str(self._tmp)],
+          stdin=subprocess.PIPE,
+          stdout=subprocess.DEVNULL,
+          stderr=subprocess.DEVNULL,
+      )
+    except OSError:
+      self.failed = True
+
+  def feed(self, chunk: bytes) -> None:
+    """Send the next chunk of the upload to ffmpeg (blocking provides backpressure)."""
+    if self.failed or self._proc is None:
+      return
+    try:
+      self._proc.stdin.write(chunk)
+      self.bytes_fed += len(chunk)
+    except (BrokenPipeError, OSError, ValueError):
+      # ffmpeg gave up (unsupported for streaming); the CLI will convert normally
+      self.failed = True
+
+  def finish(self, expected_bytes: int | None = None, timeout: float = 600) -> bool:
+    """Close the stream and publish the cache. Returns True if the cache is ready."""
+    if self._proc is None:
+      return False
+    try:
+      self._proc.stdin.close()
+    except (BrokenPipeError, OSError):
+      self.failed = True
+    try:
+      returncode = self._proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+      self._proc.kill()
+      self._proc.wait()
+      returncode = -1
+
+    complete = expected_bytes is None or self.bytes_fed == expected_bytes
+    if (returncode == 0 and not self.failed and complete and self._tmp.exists()
+        and self._tmp.stat().st_size > 44):
+      os.replace(self._tmp, self.output)
+      return True
+    self._discard()
+    return False
+
+  def abort(self) -> None:
+    """Stop decoding and remove any partial output."""
+    self.failed = True
+    if self._proc is not None and self._proc.poll() is None:
+      self._proc.kill()
+      self._proc.wait()
+    self._discard()
+
+  def _discard(self) -> None:
+    try:
+      self._tmp.unlink()
+    except OSError:
+      pass
@@ -0,0 +1,166 @@
+"""Compact JSON timeline of a transcript, written next to its VTT files.
+
+``<basename>/<basename>-timeline.json`` holds every caption in column form
+(one array per field rather than one object per caption) together with the
+speaker table and the speaker turns, so a six-hour transcript is a few hundred
+kilobytes of JSON instead of a multi-megabyte DOM::
+
+    {"version": 1, "media": "talk.mp4",
+     "speakers": [{"id": "SPEAKER_00", "name": "Alice", "bg": "...", "fg": "..."}],
+     "turns": {"speaker": [0, 1], "vtt": ["0.vtt", "1.vtt"], "first": [0, 12]},
+     "captions": {"start": [...], "end": [...], "turn": [...],
+                  "vtt_start": [...], "vtt_end": [...], "text": [...]},
+     "search": {"start": [...], "end": [...]}}
+
+Captions are in turn order, and overlapping diarization turns can start a
+caption before the one above it, so time lookups binary-search ``search``
+instead: ``start[i]`` is the earliest start from caption i on and ``end[i]``
+the latest end up to caption i, both never decreasing. The HTML viewer of a long transcript renders only
+the captions near the viewport and loads them by index or time range (from the
+web server's ``/api/timeline/<basename>`` or straight from this file).
+"""
+from __future__ import annotations
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from pathlib import Path
+
+TIMELINE_VERSION = 1
+CAPTION_FIELDS = ("start", "end", "turn", "vtt_start", "vtt_end", "text")
+
+
+def timeline_path(workdir: Path, basename: str) -> Path:
+  return Path(workdir) / f"{basename}-timeline.json"
+
+
+def display_time(seconds: float) -> str:
+  """The transcript's ``H:MM:SS.s`` timestamp."""
+  return f"{int(seconds // 3600):01d}:{int((seconds % 3600) // 60):02d}:{seconds % 60:04.1f}"
+
+
+def build_timeline(media: str, speakers: dict, turns) -> dict:
+  """Build the timeline from ``(speaker_id, vtt_filename, captions)`` turns.
+
+  ``captions`` are ``group_captions()`` dicts; speakers maps id -> (name, bg, fg).
+  """
+  speaker_ids = sorted(speakers, key=str)
+  # Speakers missing from the config still get an entry (the HTML's default colours)
+  speaker_ids += list(dict.fromkeys(t[0] for t in turns if t[0] not in speakers))
+  position = {speaker_id: i for i, speaker_id in enumerate(speaker_ids)}
+
+  def entry(speaker_id) -> dict:
+    name, bg, fg = speakers.get(speaker_id, (str(speaker_id), "white", "orange"))
+    return {"id": str(speaker_id), "name": name, "bg": bg, "fg": fg}
+
+  table = {"speaker": [], "vtt": [], "first": []}
+  columns = {name: [] for name in CAPTION_FIELDS}
+  for turn, (speaker_id, vtt_name, captions) in enumerate(turns):
+    table["speaker"].append(position[speaker_id])
+    table["vtt"].append(vtt_name)
+    table["first"].append(len(columns["start"]))
+    for c in captions:
+      for name in ("start", "end", "vtt_start", "vtt_end"):
+        columns[name].append(round(c[name], 3))
+      columns["turn"].append(turn)
+      columns["text"].append(c["text"])
+
+  return {
+      "version": TIMELINE_VERSION,
+      "media": media,
+      "speakers": [entry(speaker_id) for speaker_id in speaker_ids],
+      "turns": table,
+      "captions": columns,
+      "search": search_index(columns),
+  }
+
+
+def search_index(captions: dict) -> dict:
+  """Never-decreasing start/end columns to binary-search captions by time."""
+  starts, ends = [], []
+  for end in captions["end"]:
+    ends.append(max(end, ends[-1]) if ends else end)
+  for start in reversed(captions["start"]):
+    starts.append(min(start, starts[-1]) if starts else start)
+  return {"start": starts[::-1], "end": ends}
+
+
+def _search(timeline: dict) -> dict:
+  # Sidecars written before the search index existed get it computed here
+  return timeline.get("search") or search_index(timeline["captions"])
+
+
+def write_timeline(path: Path, timeline: dict) -> None:
+  path = Path(path)
+  tmp = path.with_name(path.name + ".tmp")
+  tmp.write_text(json.dumps(timeline, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+  os.replace(tmp, path)
+
+
+@lru_cache(maxsize=8)
+def _load(path: str, mtime_ns: int, size: int) -> dict | None:
+  try:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+  except (OSError, ValueError):
+    return None
+  return data if isinstance(data, dict) and data.get("version") == TIMELINE_VERSION else None
+
+
+def read_timeline(path: Path) -> dict | None:
+  """Load a timeline (cached until the file changes); None if missing or unreadable."""
+  try:
+    st = Path(path).stat()
+  except OSError:
+    return None
+  return _load(str(path), st.st_mtime_ns, st.st_size)
+
+
+def caption_count(timeline: dict) -> int:
+  return len(timeline["captions"]["start"])
+
+
+def time_range(timeline: dict, start: float, end: float) -> tuple[int, int]:
+  """Index range [lo, hi) holding every caption that overlaps [start, end) seconds.
+
+  With overlapping turns the range can also hold a few captions that don't.
+  """
+  search = _search(timeline)
+  # Everything before lo has ended by start; everything from hi on starts at or after end
+  lo = bisect_right(search["end"], start)
+  hi = bisect_left(search["start"], end)
+  return lo, max(lo, hi)
+
+
+def caption_rows(timeline: dict, lo: int, hi: int) -> list[dict]:
+  """Captions lo..hi as dicts carrying everything the viewer and editor need."""
+  captions, turns = timeline["captions"], timeline["turns"]
+  speakers = timeline["speakers"]
+  rows = []
+  for i in range(max(0, lo), min(hi, caption_count(timeline))):
+    turn = captions["turn"][i]
+    rows.append({
+        "i": i,
+        "start": captions["start"][i],
+        "end": captions["end"][i],
+        "turn": turn,
+        "speaker": speakers[turns["speaker"][turn]]["id"],
+        "vtt_file": turns["vtt"][turn],
+        "vtt_start": captions["vtt_start"][i],
+        "vtt_end": captions["vtt_end"][i],
+        "caption_idx": i - turns["first"][turn],
+        "text": captions["text"][i],
+    })
+  return rows
+
+
+def timeline_index(timeline: dict) -> dict:
+  """What a viewer needs up front: speakers, caption count and the searchable start times."""
+  search = _search(timeline)
+  return {
+      "media": timeline.get("media"),
+      "speakers": timeline["speakers"],
+      "count": len(search["start"]),
+      "duration": search["end"][-1] if search["end"] else 0.0,
+      "starts": search["start"],
+  }
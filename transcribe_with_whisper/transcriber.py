@@ -0,0 +1,363 @@
+"""Library entry point: transcribe audio in-process and get structured results back.
+
+The CLI and web server write an HTML transcript and return nothing. Services that
+embed this package can instead keep a ``Transcriber`` around, which loads the
+Whisper model and the diarization pipeline once and reuses them for every call::
+
+    from transcribe_with_whisper import Transcriber
+
+    transcriber = Transcriber(model_size="small")
+    result = transcriber.transcribe("meeting.mp4", num_speakers=2)
+    for turn in result.turns:
+        print(turn.speaker, turn.start, turn.text)
+
+Audio can be a path, raw file bytes, a binary file object or a NumPy array of
+samples. Writing the usual HTML/VTT artifacts is optional (``output_dir=``).
+"""
+from __future__ import annotations
+
+import importlib
+import io
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Sequence, Union
+
+import numpy as np
+
+from transcribe_with_whisper import preflight_skipped
+
+# Library callers do their own setup; the CLI preflight (which can exit) must not
+# run just because the pipeline module is imported.
+with preflight_skipped():
+  # The package namespace has a legacy main() function that shadows the submodule name
+  pipeline = importlib.import_module("transcribe_with_whisper.main")
+
+SAMPLE_RATE = 16000
+
+AudioInput = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, np.ndarray]
+
+
+@dataclass
+class Word:
+  start: float
+  end: float
+  text: str
+  probability: float | None = None
+
+
+@dataclass
+class Segment:
+  start: float
+  end: float
+  text: str
+  speaker: str
+  words: list[Word] = field(default_factory=list)
+
+
+@dataclass
+class Turn:
+  """A stretch of audio attributed to one speaker."""
+  speaker: str
+  start: float
+  end: float
+  segments: list[Segment] = field(default_factory=list)
+  speaker_name: str | None = None
+
+  @property
+  def text(self) -> str:
+    return " ".join(s.text for s in self.segments if s.text)
+
+
+@dataclass
+class TranscriptionResult:
+  turns: list[Turn]
+  duration: float
+  language: str | None = None
+  html_path: Path | None = None
+
+  @property
+  def segments(self) -> list[Segment]:
+    return [s for t in self.turns for s in t.segments]
+
+  @property
+  def words(self) -> list[Word]:
+    return [w for s in self.segments for w in s.words]
+
+  @property
+  def text(self) -> str:
+    return "\n".join(t.text for t in self.turns if t.text)
+
+  def to_dict(self) -> dict:
+    data = asdict(self)
+    data["html_path"] = str(self.html_path) if self.html_path else None
+    return data
+
+
+def load_audio(audio: AudioInput, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+  """Return mono float32 samples at 16 kHz.
+
+  ``sample_rate`` only applies to NumPy input; files and bytes are decoded and
+  resampled by faster-whisper's decoder.
+  """
+  if isinstance(audio, np.ndarray):
+    samples = audio
+    if samples.ndim == 2:
+      # Accept (channels, samples) as well as (samples, channels)
+      channel_axis = 0 if samples.shape[0] < samples.shape[1] else 1
+      samples = samples.mean(axis=channel_axis)
+    elif samples.ndim != 1:
+      raise ValueError(f"Expected 1-D or 2-D audio array, got shape {audio.shape}")
+    if np.issubdtype(samples.dtype, np.integer):
+      samples = samples / float(np.iinfo(samples.dtype).max + 1)
+    samples = samples.astype(np.float32, copy=False)
+    if sample_rate != SAMPLE_RATE and len(samples):
+      target_len = int(round(len(samples) * SAMPLE_RATE / sample_rate))
+      positions = np.linspace(0, len(samples) - 1, target_len)
+      samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    return samples
+
+  from faster_whisper import decode_audio
+
+  if isinstance(audio, (bytes, bytearray, memoryview)):
+    return decode_audio(io.BytesIO(bytes(audio)), sampling_rate=SAMPLE_RATE)
+  if isinstance(audio, (str, os.PathLike)):
+    return decode_audio(str(audio), sampling_rate=SAMPLE_RATE)
+  if hasattr(audio, "read"):
+    return decode_audio(audio, sampling_rate=SAMPLE_RATE)
+  raise TypeError(f"Unsupported audio input: {type(audio).__name__}")
+
+
+def _merge_turns(tracks: Sequence[tuple[float, float, str]]) -> list[Turn]:
+  """Join consecutive diarization tracks of the same speaker, like group_segments()."""
+  turns: list[Turn] = []
+  for start, end, speaker in tracks:
+    if turns and turns[-1].speaker == speaker and start >= turns[-1].start:
+      turns[-1].end = max(turns[-1].end, end)
+    else:
+      turns.append(Turn(speaker=speaker, start=start, end=end))
+  return turns
+
+
+class Transcriber:
+  """Holds loaded models and transcribes audio with speaker turns.
+
+  Models are loaded on first use (or by calling ``load()``) and shared with any
+  other Transcriber or CLI run in the same process that uses the same settings.
+  Instances are safe to use from several threads.
+  """
+
+  def __init__(self,
+               model_size: str = "base",
+               device: str = "auto",
+               compute_type: str = "auto",
+               coreml_units: str | None = None,
+               language: str | None = "en",
+               word_timestamps: bool = True,
+               auth_token: str | None = None,
+               batched: bool = True):
+    self.model_size = model_size
+    self.device = device
+    self.compute_type = compute_type
+    self.coreml_units = coreml_units
+    self.language = language
+    self.word_timestamps = word_timestamps
+    self.auth_token = auth_token
+    # Batching needs a fixed language; with language=None each turn is detected serially
+    self.batched = batched and language is not None
+    self._whisper = None
+    self._batcher = None
+    self._diarizer = None
+    self._load_lock = threading.Lock()
+
+  @property
+  def whisper_model(self):
+    with self._load_lock:
+      if self._whisper is None:
+        self._whisper = pipeline.get_whisper_model(self.model_size, self.device,
+                                                   self.compute_type, self.coreml_units)
+      return self._whisper
+
+  @property
+  def diarization_pipeline(self):
+    with self._load_lock:
+      if self._diarizer is None:
+        token = self.auth_token or os.getenv("HUGGING_FACE_AUTH_TOKEN")
+        if not token:
+          raise ValueError("A Hugging Face token is required for speaker diarization "
+                           "(pass auth_token= or set HUGGING_FACE_AUTH_TOKEN)")
+        with pipeline._model_load_lock:
+          self._diarizer = pipeline.load_diarization_pipeline(token)
+      return self._diarizer
+
+  @property
+  def batcher(self):
+    """The process-wide AsrBatcher for this model, shared with other Transcribers and jobs."""
+    with self._load_lock:
+      if self._batcher is None:
+        self._batcher = pipeline.get_asr_batcher(self.model_size, self.device, self.compute_type,
+                                                 self.coreml_units, self.language)
+      return self._batcher
+
+  def load(self, diarize: bool = True) -> "Transcriber":
+    """Load the models now instead of on the first transcribe() call."""
+    self.whisper_model
+    if diarize:
+      self.diarization_pipeline
+    return self
+
+  def diarize(self,
+              samples: np.ndarray,
+              num_speakers: int | None = None,
+              min_speakers: int | None = None,
+              max_speakers: int | None = None) -> list[Turn]:
+    """Return speaker turns (without text) for 16 kHz mono samples."""
+    import torch
+
+    params = {}
+    if num_speakers is not None:
+      params["num_speakers"] = num_speakers
+    else:
+      if min_speakers is not None:
+        params["min_speakers"] = min_speakers
+      if max_speakers is not None:
+        params["max_speakers"] = max_speakers
+
+    waveform = torch.from_numpy(np.ascontiguousarray(samples)).unsqueeze(0)
+    diarizer = self.diarization_pipeline
+    with pipeline._diarization_lock:
+      dz = diarizer({"waveform": waveform, "sample_rate": SAMPLE_RATE}, **params)
+    annotation = dz.speaker_diarization if hasattr(dz, "speaker_diarization") else dz
+    tracks = [(float(seg.start), float(seg.end), str(label))
+              for seg, _, label in annotation.itertracks(yield_label=True)]
+    return _merge_turns(tracks)
+
+  def _clip(self, samples: np.ndarray, turn: Turn) -> np.ndarray:
+    return samples[int(turn.start * SAMPLE_RATE):int(turn.end * SAMPLE_RATE)]
+
+  @staticmethod
+  def _add_segments(turn: Turn, segments) -> None:
+    for s in segments:
+      words = [
+          Word(start=turn.start + w.start,
+               end=turn.start + w.end,
+               text=w.word.strip(),
+               probability=getattr(w, "probability", None)) for w in (s.words or [])
+      ]
+      turn.segments.append(
+          Segment(start=turn.start + s.start,
+                  end=turn.start + s.end,
+                  text=s.text.strip(),
+                  speaker=turn.speaker,
+                  words=words))
+
+  def _transcribe_turn(self, samples: np.ndarray, turn: Turn) -> str | None:
+    clip = self._clip(samples, turn)
+    if not len(clip):
+      return None
+    segments, info = self.whisper_model.transcribe(clip,
+                                                   language=self.language,
+                                                   word_timestamps=self.word_timestamps,
+                                                   **pipeline.decode_options(self.model_size))
+    self._add_segments(turn, segments)
+    return getattr(info, "language", None)
+
+  def _transcribe_turns_batched(self, samples: np.ndarray, turns: list[Turn]) -> None:
+    # All turns go to the shared batcher at once, so they batch with each other and
+    # with whatever other jobs in this process are transcribing
+    futures = [(turn, self.batcher.submit(self._clip(samples, turn), self.word_timestamps))
+               for turn in turns if len(self._clip(samples, turn))]
+    for turn, future in futures:
+      self._add_segments(turn, future.result())
+
+  def transcribe(self,
+                 audio: AudioInput,
+                 *,
+                 sample_rate: int = SAMPLE_RATE,
+                 diarize: bool = True,
+                 num_speakers: int | None = None,
+                 min_speakers: int | None = None,
+                 max_speakers: int | None = None,
+                 speaker_names: Sequence[str] | None = None,
+                 output_dir: str | os.PathLike | None = None,
+                 basename: str | None = None) -> TranscriptionResult:
+    """Transcribe audio and return turns, segments and words with absolute timings.
+
+    With ``output_dir`` the usual artifacts are also written: ``<basename>.html``
+    plus VTT files, the diarization and the speaker config in ``<basename>/``.
+    """
+    samples = load_audio(audio, sample_rate)
+    duration = len(samples) / SAMPLE_RATE
+    if diarize:
+      turns = self.diarize(samples, num_speakers, min_speakers, max_speakers)
+    else:
+      turns = [Turn(speaker="SPEAKER_00", start=0.0, end=duration)]
+
+    language = None
+    if self.batched:
+      self._transcribe_turns_batched(samples, turns)
+      language = self.language
+    else:
+      for turn in turns:
+        language = self._transcribe_turn(samples, turn) or language
+
+    # Names are handed out in sorted speaker-id order, as the CLI does
+    names = dict(zip(sorted({t.speaker for t in turns}), speaker_names or ()))
+    for turn in turns:
+      turn.speaker_name = names.get(turn.speaker)
+
+    result = TranscriptionResult(turns=turns, duration=duration, language=language)
+    if output_dir is not None:
+      if basename is None:
+        if not isinstance(audio, (str, os.PathLike)):
+          raise ValueError("basename is required to write artifacts for in-memory audio")
+        basename = Path(audio).stem
+      media_name = Path(audio).name if isinstance(audio, (str, os.PathLike)) else basename
+      result.html_path = write_artifacts(result, output_dir, basename, media_name)
+    return result
+
+
+def write_artifacts(result: TranscriptionResult,
+                    output_dir: str | os.PathLike,
+                    basename: str,
+                    media_name: str | None = None) -> Path:
+  """Write the CLI's HTML/VTT layout for a result and return the HTML path."""
+  output_dir = Path(output_dir)
+  workdir = output_dir / basename
+  workdir.mkdir(parents=True, exist_ok=True)
+
+  groups, vtt_files = [], []
+  for idx, turn in enumerate(result.turns):
+    groups.append([
+        f"[ {pipeline.format_time(turn.start)} -->  {pipeline.format_time(turn.end)}] _ {turn.speaker}"
+    ])
+    vtt_file = workdir / f"{idx}.vtt"
+    with open(vtt_file, "w", encoding="utf-8") as out:
+      out.write("WEBVTT\n\n")
+      for s in turn.segments:
+        # VTT times are relative to the turn, as for the CLI's per-segment files
+        out.write(f"{pipeline.format_time(max(0.0, s.start - turn.start))} --> "
+                  f"{pipeline.format_time(max(0.0, s.end - turn.start))}\n{s.text}\n\n")
+    vtt_files.append(str(vtt_file))
+  (workdir / f"{basename}-diarization.txt").write_text("\n".join(g[0] for g in groups) + "\n",
+                                                       encoding="utf-8")
+
+  speakers = pipeline.load_speaker_config(basename, workdir) or {}
+  for i, speaker_id in enumerate(sorted({t.speaker for t in result.turns})):
+    if speaker_id not in speakers:
+      bgcolor, textcolor = pipeline.DEFAULT_SPEAKER_COLORS[i % len(pipeline.DEFAULT_SPEAKER_COLORS)]
+      name = next((t.speaker_name for t in result.turns
+                   if t.speaker == speaker_id and t.speaker_name), f"Speaker {i+1}")
+      speakers[speaker_id] = (name, bgcolor, textcolor)
+  pipeline.save_speaker_config(basename, speakers, workdir)
+
+  html_out = output_dir / f"{basename}.html"
+  # The library never pads the audio, so there is no spacer to subtract
+  pipeline.generate_html(str(html_out),
+                         groups,
+                         vtt_files,
+                         media_name or basename,
+                         speakers,
+                         spacermilli=0)
+  return html_out
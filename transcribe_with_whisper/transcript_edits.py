@@ -0,0 +1,246 @@
+"""Apply caption text edits from the transcript page to its VTT files.
+
+The page sends a list of changes, each naming a VTT file of the transcript
+folder, a caption index in it and the new text. Changes are grouped by file so
+each file is parsed once and written once, however many of its captions were
+edited; the new version is written next to it and renamed into place, so a
+reader never sees a half-written file.
+
+``patch_transcript()`` carries the new text into what was rendered from
+those files: the caption nodes of the HTML page (or, for a virtualised page, its
+embedded timeline), the timeline sidecar, and any DOCX/SRT/TXT/JSON export that
+was up to date. No transcription step is re-run. ``save_caption_edits()`` does
+both while holding the folder's lock, so concurrent saves can't interleave. All
+of this is blocking file work: the web server runs it on a worker thread.
+"""
+from __future__ import annotations
+
+import html as html_module
+import json
+import os
+import threading
+from pathlib import Path
+
+import webvtt
+
+from transcribe_with_whisper.assets import json_script_tag
+from transcribe_with_whisper.exports import EXPORT_FORMATS, ensure_export, missing_exports
+from transcribe_with_whisper.timeline import read_timeline, timeline_path, write_timeline
+
+_SEGMENT_TAG = '<div class="transcript-segment" '
+_TIMELINE_DATA = '<script type="application/json" id="timeline-data">'
+
+_dir_locks: dict[Path, threading.RLock] = {}
+_dir_locks_guard = threading.Lock()
+
+
+def _dir_lock(vtt_dir: Path) -> threading.RLock:
+  with _dir_locks_guard:
+    return _dir_locks.setdefault(Path(vtt_dir).resolve(), threading.RLock())
+
+
+def save_vtt(captions: webvtt.WebVTT, path: Path) -> None:
+  """Write captions to path atomically (temp file in the same folder, then rename)."""
+  path = Path(path)
+  tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+  try:
+    with open(tmp, "w", encoding="utf-8") as f:
+      captions.write(f)
+    os.replace(tmp, path)
+  except BaseException:
+    tmp.unlink(missing_ok=True)
+    raise
+
+
+def apply_caption_edits(vtt_dir: Path, changes: list, debug: bool = False) -> dict:
+  """Apply ``changes`` ({vttFile, captionIdx, text}) to the VTT files in vtt_dir.
+
+  Returns {"applied": n, "modified": [file names], "edited": [(file, index, text)],
+  "failed": [{"error", "change"}]}, failures in the order the changes were given. Saves to the same folder are
+  serialised so concurrent requests can't lose each other's edits.
+  """
+  vtt_dir = Path(vtt_dir)
+  failed: list[tuple[int, dict]] = []
+  by_file: dict[str, list[tuple[int, int, str, dict]]] = {}
+
+  for order, change in enumerate(changes):
+    vtt_file = str(change.get("vttFile", "")).strip()
+    caption_idx_str = str(change.get("captionIdx", "")).strip()
+    new_text = str(change.get("text", "")).strip()
+    if debug:
+      print(f"[DEBUG] Change: vttFile='{vtt_file}', captionIdx='{caption_idx_str}', "
+            f"text='{new_text[:50]}...'")
+
+    if not vtt_file or not caption_idx_str:
+      failed.append((order, {
+          "error": "Missing vttFile or captionIdx - HTML may be from legacy version",
+          "change": change
+      }))
+      continue
+    try:
+      caption_idx = int(caption_idx_str)
+    except ValueError:
+      failed.append((order, {"error": f"Invalid captionIdx: {caption_idx_str}", "change": change}))
+      continue
+    if Path(vtt_file).name != vtt_file or not vtt_file.endswith(".vtt"):
+      failed.append((order, {"error": f"Invalid vttFile: {vtt_file}", "change": change}))
+      continue
+    by_file.setdefault(vtt_file, []).append((order, caption_idx, new_text, change))
+
+  applied = 0
+  modified: list[str] = []
+  edited: list[tuple[str, int, str]] = []
+  with _dir_lock(vtt_dir):
+    for vtt_file, edits in by_file.items():
+      vtt_path = vtt_dir / vtt_file
+      if not vtt_path.exists():
+        failed += [(order, {"error": f"VTT file not found: {vtt_file}", "change": change})
+                   for order, _, _, change in edits]
+        continue
+      try:
+        captions = webvtt.read(str(vtt_path))
+      except Exception as e:
+        failed += [(order, {"error": f"Error processing {vtt_file}: {e}", "change": change})
+                   for order, _, _, change in edits]
+        continue
+
+      ok = []
+      for order, caption_idx, new_text, change in edits:
+        if caption_idx < 0 or caption_idx >= len(captions):
+          failed.append((order, {
+              "error": f"Caption index {caption_idx} out of range (0-{len(captions)-1})",
+              "change": change
+          }))
+          continue
+        old_text = captions[caption_idx].text.strip()
+        if old_text != new_text:
+          captions[caption_idx].text = new_text
+          if debug:
+            print(f"[DEBUG] Updated {vtt_file}[{caption_idx}]: '{old_text}' -> '{new_text}'")
+        ok.append((order, change, caption_idx if old_text != new_text else None))
+
+      changed = {idx for _, _, idx in ok if idx is not None}
+      if changed:
+        try:
+          save_vtt(captions, vtt_path)
+        except Exception as e:
+          failed += [(order, {"error": f"Error processing {vtt_file}: {e}", "change": change})
+                     for order, change, _ in ok]
+          continue
+        modified.append(vtt_file)
+        edited += [(vtt_file, idx, captions[idx].text) for idx in sorted(changed)]
+      applied += len(ok)
+
+  failed.sort(key=lambda item: item[0])
+  return {"applied": applied, "modified": modified, "edited": edited, "failed": [f for _, f in failed]}
+
+
+def _write_atomic(path: Path, text: str) -> None:
+  tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+  try:
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+  except BaseException:
+    tmp.unlink(missing_ok=True)
+    raise
+
+
+def _attribute(tag: str, name: str) -> str | None:
+  start = tag.find(f' {name}="')
+  if start < 0:
+    return None
+  start += len(name) + 3
+  return html_module.unescape(tag[start:tag.find('"', start)])
+
+
+def patch_html_captions(page: str, texts: dict[tuple[str, int], str]) -> tuple[str, int]:
+  """Replace the text of the caption links keyed (vtt file, caption index).
+
+  One forward scan over the page as generate_html() writes it; returns the new
+  page and how many captions were replaced.
+  """
+  out, pos, patched = [], 0, 0
+  while True:
+    start = page.find(_SEGMENT_TAG, pos)
+    if start < 0:
+      break
+    tag_end = page.find(">", start)
+    tag = page[start:tag_end]
+    try:
+      key = (_attribute(tag, "data-vtt-file"), int(_attribute(tag, "data-caption-idx") or ""))
+    except ValueError:
+      key = None
+    link = page.find('class="lt"', tag_end)
+    text_start = page.find(">", link) + 1
+    text_end = page.find("</a></span>", text_start)
+    if key not in texts or link < 0 or text_end < 0:
+      out.append(page[pos:tag_end])
+      pos = tag_end
+      continue
+    out += [page[pos:text_start], texts[key]]
+    pos = text_end
+    patched += 1
+  out.append(page[pos:])
+  return "".join(out), patched
+
+
+def patch_transcript(output_dir: Path, basename: str, edited: list) -> list[str]:
+  """Put edited caption text ((vtt file, index, text) from apply_caption_edits) into
+  the rendered transcript and return the names of the files that were updated."""
+  output_dir = Path(output_dir)
+  texts = {(vtt_file, idx): text for vtt_file, idx, text in edited}
+  if not texts:
+    return []
+  html_path = output_dir / f"{basename}.html"
+  sidecar = timeline_path(output_dir / basename, basename)
+  # Exports that were current before the edit are rebuilt after it; others stay lazy
+  fresh_exports = [fmt for fmt in EXPORT_FORMATS if fmt not in missing_exports(output_dir, basename)]
+  updated = []
+
+  timeline = read_timeline(sidecar)
+  if timeline is not None:
+    turns = timeline["turns"]
+    # read_timeline's result is cached and shared, so edit a copy of the text column
+    column = list(timeline["captions"]["text"])
+    for turn, (vtt_file, first) in enumerate(zip(turns["vtt"], turns["first"])):
+      end = turns["first"][turn + 1] if turn + 1 < len(turns["first"]) else len(column)
+      for idx in range(end - first):
+        if (vtt_file, idx) in texts:
+          column[first + idx] = texts[(vtt_file, idx)]
+    timeline = {**timeline, "captions": {**timeline["captions"], "text": column}}
+    write_timeline(sidecar, timeline)
+    updated.append(sidecar.name)
+
+  if html_path.exists():
+    page = html_path.read_text(encoding="utf-8")
+    page, patched = patch_html_captions(page, texts)
+    start = page.find(_TIMELINE_DATA)
+    if start >= 0 and timeline is not None:
+      # A standalone virtualised page carries its own copy of the timeline
+      end = page.find("</script>", start) + len("</script>")
+      embedded = json_script_tag("timeline-data", json.dumps(timeline, separators=(",", ":")))
+      page, patched = page[:start] + embedded + page[end:], patched + 1
+    if patched:
+      _write_atomic(html_path, page)
+      updated.append(html_path.name)
+
+  for fmt in fresh_exports:
+    updated.append(ensure_export(output_dir, basename, fmt, timeline=timeline).name)
+  return updated
+
+
+def save_caption_edits(output_dir: Path, basename: str, changes: list, debug: bool = False) -> dict:
+  """apply_caption_edits() on ``<basename>/`` then patch_transcript(), as one critical section.
+
+  The outcome gains "updated": the rendered files that were patched (empty if
+  patching failed; the VTT edits are kept either way).
+  """
+  vtt_dir = Path(output_dir) / basename
+  with _dir_lock(vtt_dir):
+    outcome = apply_caption_edits(vtt_dir, changes, debug)
+    try:
+      outcome["updated"] = patch_transcript(output_dir, basename, outcome["edited"])
+    except Exception as e:
+      print(f"⚠️ Could not update the rendered transcript of {basename}: {e}")
+      outcome["updated"] = []
+  return outcome
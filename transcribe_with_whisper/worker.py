@@ -0,0 +1,176 @@
+"""Queue worker: run transcription jobs submitted by any web node.
+
+Start one per transcription machine, pointing at the shared queue and the
+shared TRANSCRIPTION_DIR::
+
+    JOB_QUEUE=sqlite:////mnt/transcripts/.config/queue.db \\
+    TRANSCRIPTION_DIR=/mnt/transcripts transcribe-with-whisper-worker
+
+Each job is run exactly as the web server would run it (same CLI invocation,
+progress parsing and watchdog); the job record is copied back to the
+queue every few seconds and doubles as the worker's heartbeat. Cancelling a job
+from any web node stops it here.
+
+To run several workers on one machine without them fighting over the CPU, give
+each its own cores, e.g. ``--cpus 0-7`` and ``--cpus 8-15``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+
+from transcribe_with_whisper.cpu_budget import parse_cores
+from transcribe_with_whisper.job_queue import DEFAULT_MAX_ATTEMPTS, JobQueue, queue_from_url
+
+# Keys of the server's job record that only make sense inside one process
+_LOCAL_KEYS = ("inflight_key", "remote")
+
+
+def _snapshot(job: dict) -> dict:
+  return {k: v for k, v in job.items() if k not in _LOCAL_KEYS}
+
+
+def run_job(queue: JobQueue,
+            job_id: str,
+            payload: dict,
+            worker_id: str,
+            sync_interval: float = 2.0,
+            cpu_cores: list[int] | None = None) -> dict:
+  """Run one claimed job to completion and return its final record."""
+  from transcribe_with_whisper import server_app
+
+  server_app.jobs[job_id] = {
+      "status": "starting",
+      "progress": 0,
+      "message": f"Picked up by worker {worker_id}...",
+      "filename": payload["filename"],
+      "start_time": time.time(),
+      "file_duration": payload.get("file_duration"),
+      "worker": worker_id,
+  }
+  if payload.get("sha256"):
+    server_app.jobs[job_id]["sha256"] = payload["sha256"]
+  if cpu_cores:
+    server_app.jobs[job_id]["cpu_cores"] = cpu_cores
+  queue.update(job_id, _snapshot(server_app.jobs[job_id]))
+
+  thread = threading.Thread(target=server_app._run_transcription_job,
+                            args=(job_id, payload["filename"], payload.get("speakers") or None,
+                                  payload.get("num_speakers"), payload.get("min_speakers"),
+                                  payload.get("max_speakers"), payload.get("preset"),
+                                  bool(payload.get("progressive"))),
+                            daemon=True)
+  thread.start()
+  while thread.is_alive():
+    thread.join(timeout=sync_interval)
+    job = server_app.jobs[job_id]
+    remote = queue.get(job_id) or {}
+    if remote.get("status") == "cancelled" and job.get("status") != "cancelled":
+      # Same effect as the cancel endpoint: the watchdog kills the process tree
+      job.update(status="cancelled",
+                 error_reason="cancelled",
+                 message="Cancelled by user",
+                 end_time=time.time())
+    queue.update(job_id, _snapshot(job))
+
+  job = server_app.jobs.pop(job_id)
+  if job.get("status") == "cancelled" and job.get("basename"):
+    # Only now has the CLI exited and released the basename lock
+    server_app._cleanup_job_intermediates(job["basename"])
+  if job.get("status") in ("starting", "running"):
+    # _run_transcription_job returned without reaching a final state
+    job.update(status="error", message=job.get("message") or "Job stopped unexpectedly")
+  job.setdefault("end_time", time.time())
+  queue.update(job_id, _snapshot(job))
+  return job
+
+
+def run_worker(queue: JobQueue,
+               worker_id: str | None = None,
+               poll_interval: float = 5.0,
+               stale_after: float = 600.0,
+               max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+               once: bool = False,
+               cpu_cores: list[int] | None = None) -> int:
+  """Claim and run jobs until interrupted (or until the queue is empty with once=True).
+
+  Returns the number of jobs processed.
+  """
+  worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+  processed = 0
+  print(f"👷 Worker {worker_id} waiting for jobs", flush=True)
+  while True:
+    # Jobs whose worker died (no heartbeat) go back to the queue, up to max_attempts runs
+    requeued = queue.requeue_stale(stale_after, max_attempts)
+    if requeued:
+      print(f"↩️  Requeued {requeued} job(s) from unresponsive workers", flush=True)
+    claimed = queue.claim(worker_id)
+    if claimed is None:
+      if once:
+        return processed
+      time.sleep(poll_interval)
+      continue
+    job_id, payload = claimed
+    print(f"▶️  Job {job_id}: {payload['filename']}", flush=True)
+    job = run_job(queue, job_id, payload, worker_id, cpu_cores=cpu_cores)
+    processed += 1
+    print(f"⏹️  Job {job_id}: {job.get('status')} - {job.get('message')}", flush=True)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Run transcription jobs from a shared queue")
+  parser.add_argument("--queue",
+                      default=os.getenv("JOB_QUEUE"),
+                      help="Queue URL, e.g. sqlite:////shared/queue.db or redis://host:6379/0 "
+                      "(default: $JOB_QUEUE)")
+  parser.add_argument("--transcription-dir",
+                      default=os.getenv("TRANSCRIPTION_DIR"),
+                      help="Shared transcription directory (default: $TRANSCRIPTION_DIR)")
+  parser.add_argument("--worker-id", help="Name shown in job records (default: host-pid)")
+  parser.add_argument("--poll-interval", type=float, default=5.0, metavar="SECONDS")
+  parser.add_argument("--stale-after",
+                      type=float,
+                      default=600.0,
+                      metavar="SECONDS",
+                      help="Requeue jobs whose worker hasn't reported for this long")
+  parser.add_argument("--max-attempts",
+                      type=int,
+                      default=int(os.getenv("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+                      help="Fail a job instead of requeueing it once it has been claimed this "
+                      "many times (default: $JOB_MAX_ATTEMPTS or %(default)s)")
+  parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+  parser.add_argument("--cpus",
+                      metavar="LIST",
+                      help="Pin jobs to these cores and size their thread pools to match, "
+                      "e.g. 0-7 or 0,2,4,6")
+  args = parser.parse_args()
+
+  if not args.queue:
+    parser.error("a queue URL is required (--queue or JOB_QUEUE)")
+  if args.transcription_dir:
+    # server_app reads this at import time
+    os.environ["TRANSCRIPTION_DIR"] = args.transcription_dir
+  os.environ.setdefault("SKIP_HF_STARTUP_CHECK", "1")
+  try:
+    cpu_cores = parse_cores(args.cpus) if args.cpus else None
+  except ValueError:
+    parser.error(f"invalid --cpus list: {args.cpus!r}")
+
+  try:
+    run_worker(queue_from_url(args.queue),
+               worker_id=args.worker_id,
+               poll_interval=args.poll_interval,
+               stale_after=args.stale_after,
+               max_attempts=args.max_attempts,
+               once=args.once,
+               cpu_cores=cpu_cores)
+  except KeyboardInterrupt:
+    pass
+
+
+if __name__ == "__main__":
+  main()